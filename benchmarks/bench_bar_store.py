@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from config import Config
+from jarvis_engine.alpha import load_price_data
+from jarvis_engine.bar_store import BarStore
+from jarvis_engine.panel import build_panel, load_store_panel
+
+
+def measure(fn, repeat=3):
+    """返回 (结果, 峰值新增内存 MB, 最快耗时 ms)"""
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, peak / 1e6, best * 1e3
+
+
+def report(name, csv, cache, store):
+    print(f"  {name:<22} CSV {csv[2]:9.1f} ms {csv[1]:7.1f} MB | 列式缓存 {cache[2]:7.1f} ms {cache[1]:6.1f} MB | "
+          f"K 线库 {store[2]:7.2f} ms {store[1]:6.2f} MB")
+
+
+# ==========================================
+# 🗂️ K 线库: 按时间窗口读取 vs 整表加载后切片
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=8)
+    parser.add_argument("--freq", default="1h")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    workdir = tempfile.mkdtemp(prefix="bench-bar-store-")
+    Config.CACHE_DIR = os.path.join(workdir, "cache")
+    try:
+        n_bars = int(args.years * (pd.Timedelta(days=365) / pd.Timedelta(args.freq)))
+        paths = {}
+        for seed, symbol in enumerate(("BTCUSDT", "ETHUSDT")):
+            paths[symbol] = os.path.join(workdir, f"Binance_{symbol}_{args.freq}.csv")
+            bars = make_ohlcv(n_bars, freq=args.freq, seed=seed)
+            write_binance_csv(bars, paths[symbol], symbol=symbol)
+
+        # 切片的年份与快照窗口都从生成的时间索引里取，--years / --freq 任意取值都落在数据范围内
+        index = bars.index
+        years = sorted({str(y) for y in index.year})
+        panel_year = years[len(years) // 2]
+        mid = index[len(index) // 2].normalize()
+        window = (f"{mid:%Y-%m-%d}", f"{mid + pd.Timedelta(days=4):%Y-%m-%d}")
+        store = BarStore()
+        t0 = time.perf_counter()
+        for path in paths.values():
+            store.import_csv(path)
+            load_price_data(path)  # 同时建立列式缓存，作对照
+        print(f"📊 2 个品种 x {n_bars:,} 根 {args.freq} K 线，导入耗时 {time.perf_counter() - t0:.1f}s")
+
+        # 一致性: 全量与窗口读取都与 load_price_data 相同
+        full = load_price_data(paths["BTCUSDT"], use_cache=False)
+        for start, end in ((None, None), window, (panel_year, panel_year)):
+            a = store.frame("BTCUSDT", args.freq, start, end)
+            b = full.loc[start:end]
+            assert a.index.equals(b.index)
+            assert all(np.array_equal(a[c].to_numpy(), b[c].to_numpy()) for c in ("open", "high", "low", "close"))
+        print("✅ 与 load_price_data 逐位一致\n")
+
+        btc = paths["BTCUSDT"]
+        print("⏱️ 单次任务 (最快耗时 | tracemalloc 峰值，不含内存映射分页):")
+        report("熔断快照 (5 天)",
+               measure(lambda: load_price_data(btc, use_cache=False).loc[window[0]:window[1]]),
+               measure(lambda: load_price_data(btc).loc[window[0]:window[1]]),
+               measure(lambda: store.frame("BTCUSDT", args.freq, *window)))
+
+        report(f"走步逐年切片 ({len(years)} 年)",
+               measure(lambda: [load_price_data(btc, use_cache=False).loc[y] for y in years], repeat=1),
+               measure(lambda: [load_price_data(btc).loc[y] for y in years]),
+               measure(lambda: [store.frame("BTCUSDT", args.freq, y, y) for y in years]))
+
+        report(f"双品种面板 ({panel_year} 年)",
+               measure(lambda: build_panel({s: load_price_data(p, use_cache=False).loc[panel_year]
+                                            for s, p in paths.items()}), repeat=1),
+               measure(lambda: build_panel({s: load_price_data(p).loc[panel_year] for s, p in paths.items()})),
+               measure(lambda: load_store_panel(list(paths), args.freq, panel_year, panel_year)))
+
+        bars = store.read("BTCUSDT", args.freq, *window, columns=["close"])
+        print(f"\n🔍 read() 返回内存映射上的视图: {type(bars['close']).__name__}, "
+              f"{len(bars['close'])} 根 = {bars['close'].nbytes / 1024:.1f} KB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from config import Config
+from jarvis_engine.alpha import load_price_data
+from jarvis_engine.lean import run_lean_pipeline, LEAN_COLUMNS
+from jarvis_engine.metrics import performance_summary
+from jarvis_engine.chunked import ChunkedPipeline, iter_price_chunks, run_chunked_pipeline
+
+
+def check_parity(df, chunk_sizes):
+    """各分块大小下逐列对拍 run_lean_pipeline(columns='all')，并比较全历史指标"""
+    ref = run_lean_pipeline(df, columns="all")
+    ref_perf = performance_summary(ref["equity"], returns=ref["net_log_ret"], position=ref["position"],
+                                   benchmark=ref["buy_hold_equity"], benchmark_returns=ref["market_log_ret"])
+    for size in chunk_sizes:
+        pipeline = ChunkedPipeline(columns="all")
+        out = pd.concat([pipeline.process(chunk) for chunk in iter_price_chunks(df, size)])
+        diff = [c for c in LEAN_COLUMNS if not np.array_equal(ref[c].to_numpy(), out[c].to_numpy(), equal_nan=True)]
+        perf = pipeline.metrics()
+        rel = max(abs(perf[k] - v) / max(abs(v), 1e-12) for k, v in ref_perf.items() if v == v)
+        print(f"  chunk {size:>7,}: 不一致的列 {diff or '无'} | 指标最大相对误差 {rel:.1e}")
+        assert not diff and rel < 1e-9
+
+
+def measure(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed
+
+
+# ==========================================
+# 🧱 分块流水线: 对拍 + 峰值内存随历史长度的变化
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, nargs="+", default=[50_000, 200_000, 400_000])
+    parser.add_argument("--chunk", type=int, default=50_000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    print("🔍 对拍 (5 万根，含闪崩):")
+    check_parity(make_ohlcv(50_000, crash_prob=0.002), [997, 10_000, 50_000])
+
+    workdir = tempfile.mkdtemp(prefix="bench-chunked-")
+    Config.CACHE_DIR = os.path.join(workdir, "cache")
+    try:
+        print(f"\n📊 峰值内存 (tracemalloc，不含内存映射的缓存分页；耗时含 tracemalloc 开销)，块大小 {args.chunk:,}:")
+        for n_bars in args.bars:
+            path = os.path.join(workdir, f"bars_{n_bars}.csv")
+            write_binance_csv(make_ohlcv(n_bars), path)
+
+            def in_memory():
+                run_lean_pipeline(load_price_data(path, use_cache=False), columns="all")
+
+            full_peak, full_t = measure(in_memory)
+            csv_peak, csv_t = measure(lambda: run_chunked_pipeline(path, args.chunk, columns="all", sink=lambda c: None))
+            load_price_data(path)  # 建立列式缓存
+            mmap_peak, mmap_t = measure(lambda: run_chunked_pipeline(path, args.chunk, columns="all"))
+            print(f"  {n_bars:>9,} 根 | 整表 {full_peak:7,.0f} MB {full_t:6.2f}s | "
+                  f"分块 CSV {csv_peak:6,.0f} MB {csv_t:6.2f}s | 分块 mmap 缓存 {mmap_peak:6,.0f} MB "
+                  f"{mmap_t:6.2f}s")
+            os.remove(path)
+
+        n_bars = args.bars[-1]
+        df = make_ohlcv(n_bars)
+        t0 = time.perf_counter()
+        run_lean_pipeline(df, columns="all")
+        lean_t = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        run_chunked_pipeline(df, args.chunk, columns="all")
+        chunk_t = time.perf_counter() - t0
+        print(f"\n⏱️ 吞吐 ({n_bars:,} 根，无 tracemalloc): 整表 {lean_t / n_bars * 1e6:.1f} µs/bar | "
+              f"分块 {chunk_t / n_bars * 1e6:.1f} µs/bar")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.alpha import calculate_scaled_forecast, calculate_position_target, run_vectorized_backtest
+from jarvis_engine.metrics import performance_summary
+
+# 进程池 worker 持有的行情 (initializer 传入一次)
+_DATA = {}
+
+
+def make_configs(n: int) -> list:
+    """N 套互不相同的配置: 缓冲 / 目标波动率 / 熔断倍数轮换组合"""
+    base = Config.freeze()
+    buffers, targets, multipliers = (0.1, 0.2, 0.3, 0.4), (0.6, 0.8, 1.0), (4.5, 6.0)
+    return [base.replace(POSITION_BUFFER=buffers[i % 4], TARGET_VOLATILITY=targets[(i // 4) % 3],
+                         SURVIVAL_ATR_MULTIPLIER=multipliers[(i // 12) % 2], VOL_LOOKBACK=200 + 10 * i)
+            for i in range(n)]
+
+
+def evaluate(df, cfg) -> tuple:
+    """完整 DataFrame 流水线 + 统计，只依赖显式传入的 cfg"""
+    df = calculate_position_target(calculate_scaled_forecast(df, config=cfg), buffer=None, config=cfg)
+    df_res = run_vectorized_backtest(df, fee_rate=None, config=cfg)
+    perf = performance_summary(df_res['equity'], returns=df_res['net_log_ret'], position=df_res['position'])
+    return perf['final_equity'], perf['sharpe'], perf['max_drawdown']
+
+
+def _init_worker(df):
+    _DATA['df'] = df
+
+
+def _evaluate_in_worker(cfg):
+    return evaluate(_DATA['df'], cfg)
+
+
+# ==========================================
+# ⏱️ N 套配置: 串行 vs 线程池 vs 进程池 (配置对象显式传入，互不干扰)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=4)
+    parser.add_argument("--configs", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+    Config.INSTRUMENT = False
+
+    df = make_ohlcv(int(args.years * 365 * 24))
+    configs = make_configs(args.configs)
+    workers = args.workers or os.cpu_count() or 1
+    evaluate(df, configs[0])  # 预热 numba 编译
+
+    t0 = time.perf_counter()
+    serial = [evaluate(df, cfg) for cfg in configs]
+    t_serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        threaded = list(pool.map(lambda cfg: evaluate(df, cfg), configs))
+    t_thread = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        processed = list(pool.map(_evaluate_in_worker, configs))
+    t_process = time.perf_counter() - t0
+
+    # 对拍: 并行结果与串行逐位一致；显式配置与 "改全局 Config 再跑" 结果一致
+    assert threaded == serial and processed == serial, "并行结果与串行不一致!"
+    cfg = configs[-1]
+    saved = {k: getattr(Config, k) for k in ("POSITION_BUFFER", "TARGET_VOLATILITY", "SURVIVAL_ATR_MULTIPLIER", "VOL_LOOKBACK")}
+    for k in saved:
+        setattr(Config, k, getattr(cfg, k))
+    try:
+        assert evaluate(df, None) == serial[-1], "显式配置与全局 Config 结果不一致!"
+    finally:
+        for k, v in saved.items():
+            setattr(Config, k, v)
+
+    print(f"📊 {len(df):,} 根 K 线 x {len(configs)} 套配置, {workers} 个 worker (CPU 核数 {os.cpu_count()})")
+    print(f"🐢 串行   : {t_serial:6.2f}s")
+    print(f"🧵 线程池 : {t_thread:6.2f}s (x{t_serial / t_thread:.2f})")
+    print(f"🚀 进程池 : {t_process:6.2f}s (x{t_serial / t_process:.2f}，含进程启动)")
+    print(f"🔍 Sharpe 范围: {min(r[1] for r in serial):.2f} ~ {max(r[1] for r in serial):.2f}")
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+import pandas as pd
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.kline_server import make_app
+from download_async import download_many, update_many, _to_ms, INTERVAL_MS, KLINES_PATH
+
+
+def start_server(port: int, latency: float, listing_ms: dict):
+    """在后台线程里启动仿真服务器"""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(make_app(latency, listing_ms))
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    time.sleep(0.5)
+
+
+def sequential_download(base_url, symbol, start_date, end_date, filename, pause=0.1):
+    """原 download_btc_clean.py 的逐页串行逻辑 (urllib 代替 requests，其余不变)"""
+    current_ts, end_ts = _to_ms(start_date), _to_ms(end_date)
+    data_list = []
+    while current_ts < end_ts:
+        params = urllib.parse.urlencode({"symbol": symbol, "interval": "1h", "limit": 1000, "startTime": current_ts})
+        with urllib.request.urlopen(f"{base_url}{KLINES_PATH}?{params}", timeout=10) as res:
+            data = json.loads(res.read())
+        if not data:
+            break
+        for row in data:
+            if row[0] < end_ts:
+                data_list.append({"unix": row[0], "open": float(row[1]), "high": float(row[2]),
+                                  "low": float(row[3]), "close": float(row[4]), "volume": float(row[5])})
+        current_ts = data[-1][0] + INTERVAL_MS["1h"]
+        time.sleep(pause)
+    pd.DataFrame(data_list).to_csv(filename, index=False)
+
+
+# ==========================================
+# ⏱️ 串行下载 vs 并发异步下载 (本地仿真服务器)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default="2024-01-01")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟往返延迟 (秒)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=40.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{k:02d}USDT" for k in range(args.symbols)]
+    # 第一个品种晚上市一年，测试前段空页
+    listing = {symbols[0]: _to_ms(str(int(args.start[:4]) + 1) + args.start[4:])}
+    start_server(args.port, args.latency, listing)
+    base_url = f"http://127.0.0.1:{args.port}"
+    work = tempfile.mkdtemp(prefix="jarvis_dl_")
+
+    try:
+        t0 = time.perf_counter()
+        for sym in symbols:
+            sequential_download(base_url, sym, args.start, args.end, os.path.join(work, f"seq_{sym}.csv"))
+        t_seq = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        files = download_many(symbols, args.start, end_date=args.end, out_dir=work, concurrency=args.concurrency,
+                              rate=args.rate, base_url=base_url)
+        t_async = time.perf_counter() - t0
+
+        same = True
+        for sym in symbols:
+            a = pd.read_csv(os.path.join(work, f"seq_{sym}.csv"))
+            b = pd.read_csv(files[sym])
+            same &= a.equals(b)
+        print(f"\n📊 {len(symbols)} 品种, {args.start} ~ {args.end}, 延迟 {args.latency * 1000:.0f}ms")
+        print(f"🐢 串行 (sleep 0.1s): {t_seq:7.2f}s")
+        print(f"🚀 并发异步        : {t_async:7.2f}s  (x{t_seq / t_async:.1f})")
+        print(f"🎯 输出一致: {same}")
+
+        # 增量更新: 先下到中点，再 --update 到终点，结果应与一次全量下载逐字节相同
+        inc = os.path.join(work, "update")
+        mid = str(pd.Timestamp(args.start) + (pd.Timestamp(args.end) - pd.Timestamp(args.start)) / 2)[:10]
+        download_many(symbols, args.start, end_date=mid, out_dir=inc, concurrency=args.concurrency,
+                      rate=args.rate, base_url=base_url)
+        t0 = time.perf_counter()
+        updated = update_many(symbols, start_date=args.start, end_date=args.end, out_dir=inc,
+                              concurrency=args.concurrency, rate=args.rate, base_url=base_url)
+        t_update = time.perf_counter() - t0
+        same_update = all(open(updated[sym], "rb").read() == open(files[sym], "rb").read() for sym in symbols)
+        print(f"🔄 增量更新 ({mid} ~ {args.end}): {t_update:7.2f}s  与全量下载一致: {same_update}")
+        assert same and same_update
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.alpha import calculate_forecast_matrix
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+
+
+def with_dtype(dtype, fn, *args, **kwargs):
+    """在指定 COMPUTE_DTYPE 下运行，返回 (结果, 峰值新增内存 MB, 耗时 s)"""
+    old = getattr(Config, 'COMPUTE_DTYPE', 'float64')
+    Config.COMPUTE_DTYPE = dtype
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        Config.COMPUTE_DTYPE = old
+    return out, peak / 1e6, elapsed
+
+
+def summarize(res: pd.DataFrame) -> dict:
+    log_ret = res["net_log_ret"].to_numpy(dtype=np.float64)
+    equity = res["equity"].to_numpy()
+    return {
+        "sharpe": log_ret.mean() / log_ret.std(ddof=1) * np.sqrt(365 * 24),
+        "final_equity": equity[-1],
+        "mdd": (equity / np.maximum.accumulate(equity) - 1.0).min(),
+    }
+
+
+def random_param_sets(n_sets, seed=0):
+    rng = np.random.default_rng(seed)
+    sets = []
+    for _ in range(n_sets):
+        fast = np.sort(rng.choice([4, 6, 8, 12, 16, 24, 32, 48, 64], size=4, replace=False))
+        sets.append({"fast_span": fast.tolist(), "slow_span": (fast * 4).tolist(),
+                     "scalars": rng.uniform(1.5, 6.0, 4).round(2).tolist()})
+    return sets
+
+
+# ==========================================
+# ⏱️ float32 vs float64: 误差范围 + 内存 / 吞吐
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--configs", type=int, default=1000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+    n_bars = args.years * 365 * 24
+    run_lean_pipeline(make_ohlcv(1000))  # 预热 numba
+
+    # 1. 单策略全流程的指标误差 (多个随机行情取最坏值)
+    print(f"📊 精简流水线 {n_bars:,} 根 1h K 线 x {args.seeds} 组行情")
+    worst = {"sharpe": 0.0, "final_equity": 0.0, "mdd": 0.0, "position": 0.0}
+    for seed in range(args.seeds):
+        df = make_ohlcv(n_bars, seed=seed)
+        r64, m64, t64 = with_dtype("float64", run_lean_pipeline, df, columns=REPORT_COLUMNS)
+        r32, m32, t32 = with_dtype("float32", run_lean_pipeline, df, columns=REPORT_COLUMNS)
+        s64, s32 = summarize(r64), summarize(r32)
+        worst["sharpe"] = max(worst["sharpe"], abs(s32["sharpe"] - s64["sharpe"]))
+        worst["final_equity"] = max(worst["final_equity"], abs(s32["final_equity"] / s64["final_equity"] - 1))
+        worst["mdd"] = max(worst["mdd"], abs(s32["mdd"] - s64["mdd"]))
+        worst["position"] = max(worst["position"], np.max(np.abs(r32["position"].to_numpy() - r64["position"].to_numpy())))
+    print(f"🎯 Sharpe 绝对误差      ≤ {worst['sharpe']:.2e}")
+    print(f"🎯 终值相对误差         ≤ {worst['final_equity']:.2e}")
+    print(f"🎯 最大回撤绝对误差     ≤ {worst['mdd']:.2e}")
+    print(f"🎯 仓位最大绝对误差     ≤ {worst['position']:.2e}")
+    print(f"💾 峰值内存 float64 {m64:7.1f} MB / float32 {m32:7.1f} MB, 耗时 {t64:.2f}s / {t32:.2f}s")
+
+    # 2. 参数扫描: 批量 forecast 矩阵
+    df = make_ohlcv(n_bars, seed=0)
+    sets = random_param_sets(args.configs)
+    f64, m64, t64 = with_dtype("float64", calculate_forecast_matrix, df, sets)
+    f32, m32, t32 = with_dtype("float32", calculate_forecast_matrix, df, sets)
+    err = np.max(np.abs(f32.to_numpy(dtype=np.float64) - f64.to_numpy()))
+    print(f"\n📊 Forecast 矩阵 {n_bars:,} x {args.configs} 组参数")
+    print(f"🎯 Forecast 最大绝对误差 {err:.2e} (取值范围 ±20)")
+    print(f"💾 结果 {f64.memory_usage().sum() / 1e6:,.0f} MB -> {f32.memory_usage().sum() / 1e6:,.0f} MB, "
+          f"峰值 {m64:,.0f} MB -> {m32:,.0f} MB")
+    print(f"⚡ 耗时 {t64:.2f}s -> {t32:.2f}s (x{t64 / t32:.1f})")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from jarvis_engine.alpha import calculate_scaled_forecast, calculate_forecast_matrix
+from config import Config
+
+# ==========================================
+# ⏱️ 批量 forecast: N 组参数一次算完 vs 逐组跑 calculate_scaled_forecast
+# ==========================================
+def random_param_sets(n_configs, seed=0):
+    rng = np.random.default_rng(seed)
+    fast_pool = [2, 4, 8, 16, 32, 64]
+    param_sets = []
+    for _ in range(n_configs):
+        fast = rng.choice(fast_pool, size=4, replace=False)
+        slow = fast * rng.choice([2, 4, 8], size=4)
+        scalars = np.round(rng.uniform(1.0, 8.0, size=4), 1)
+        param_sets.append({'fast_span': fast.tolist(), 'slow_span': slow.tolist(), 'scalars': scalars.tolist()})
+    return param_sets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=8 * 365 * 24)
+    parser.add_argument("--configs", type=int, default=500)
+    parser.add_argument("--serial-sample", type=int, default=20, help="逐组跑的抽样数 (按比例外推)")
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.bars)
+    param_sets = random_param_sets(args.configs)
+
+    t0 = time.perf_counter()
+    matrix = calculate_forecast_matrix(df, param_sets)
+    t_batch = time.perf_counter() - t0
+
+    original = Config.STRATEGY_PARAMS
+    max_err = 0.0
+    t0 = time.perf_counter()
+    for k in range(args.serial_sample):
+        Config.STRATEGY_PARAMS = param_sets[k]
+        single = calculate_scaled_forecast(df)['forecast'].to_numpy()
+        max_err = max(max_err, np.max(np.abs(single - matrix[k].to_numpy())))
+    t_serial = (time.perf_counter() - t0) / args.serial_sample * args.configs
+    Config.STRATEGY_PARAMS = original
+
+    print(f"📊 {args.bars:,} bars x {args.configs} configs")
+    print(f"🐢 Serial (外推) : {t_serial:8.2f}s")
+    print(f"🚀 Batched       : {t_batch:8.2f}s  (x{t_serial / t_batch:.1f})")
+    print(f"🎯 Max abs error : {max_err:.2e}")
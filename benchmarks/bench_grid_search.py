@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from jarvis_engine.day12_ma_backtest_pro import get_best_params
+
+# ==========================================
+# ⏱️ get_best_params: 串行 vs 多进程 (n_jobs = 1, 2, 4, ... CPU 核数)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=365 * 24)
+    parser.add_argument("--grid", type=int, default=10, help="short / long 各取多少个窗口")
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.bars, ann_vol=0.3)
+    df["ret"] = df["close"].pct_change().fillna(0)
+    short_params = list(range(10, 10 + 5 * args.grid, 5))
+    long_params = list(range(100, 100 + 25 * args.grid, 25))
+    stop_loss_params = [0.02, 0.05, 0.08, 0.10, 0.15]
+    n_combos = sum(s < l for s in short_params for l in long_params) * len(stop_loss_params)
+    print(f"📊 {args.bars:,} bars | {n_combos} 组参数 | CPU: {os.cpu_count()}")
+
+    baseline = None
+    n_jobs = 1
+    while n_jobs <= (os.cpu_count() or 1):
+        t0 = time.perf_counter()
+        best = get_best_params(df, short_params, long_params, stop_loss_params, 0.0005, 10000, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t0
+        baseline = baseline or (elapsed, best)
+        print(f"n_jobs={n_jobs:<3} {elapsed:7.2f}s | x{baseline[0] / elapsed:5.2f} | "
+              f"same result: {best == baseline[1]}")
+        n_jobs *= 2
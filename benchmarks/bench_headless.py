@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+
+# 在子进程里跑 mission_start: 数据与输出目录都指向临时目录，不动 data_results
+DRIVER = """
+import sys, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+main.Config.DATA_PATH, main.Config.BASE_DIR, main.Config.CACHE_DIR = sys.argv[1], sys.argv[2], sys.argv[3]
+main.Config.USE_RESULT_CACHE = False  # 每次都真正计算 (结果缓存的收益见 bench_result_cache.py)
+main.mission_start(headless=sys.argv[4] == "1")
+print("MPL_LOADED", "matplotlib" in sys.modules, "IMPORT_S", t_import)
+"""
+
+# 旧版 main.py 在模块顶部导入 matplotlib，这里用先导入 pyplot 再导入 main 来模拟
+EAGER_IMPORT = "import matplotlib.pyplot, matplotlib.dates; import main"
+
+
+def run(cmd, env):
+    t0 = time.perf_counter()
+    out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return time.perf_counter() - t0, out
+
+
+# ==========================================
+# ⏱️ headless (不出图、不导入 matplotlib) vs 完整运行
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="jarvis_headless_")
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONWARNINGS="ignore")
+    try:
+        csv_path = os.path.join(work, "btc.csv")
+        write_binance_csv(make_ohlcv(args.years * 365 * 24), csv_path)
+        driver = [sys.executable, "-c", DRIVER, csv_path, work, os.path.join(work, "cache")]
+        run(driver + ["1"], env)  # 预热: 写数据缓存 / numba 缓存 / 字体缓存
+        run(driver + ["0"], env)
+
+        startup_lazy = min(run([sys.executable, "-c", "import main"], env)[0] for _ in range(args.repeat))
+        startup_eager = min(run([sys.executable, "-c", EAGER_IMPORT], env)[0] for _ in range(args.repeat))
+        headless = min(run(driver + ["1"], env)[0] for _ in range(args.repeat))
+        full = min(run(driver + ["0"], env)[0] for _ in range(args.repeat))
+        _, out_headless = run(driver + ["1"], env)
+
+        print(f"📊 {args.years} 年 1h K 线，取 {args.repeat} 次最快 (含解释器启动)")
+        print(f"🚀 启动 (import main)  : 惰性 {startup_lazy:6.2f}s  vs  顶层导入 matplotlib {startup_eager:6.2f}s "
+              f"(x{startup_eager / startup_lazy:.1f})")
+        print(f"⚡ 全流程               : headless {headless:6.2f}s  vs  完整出图 {full:6.2f}s (x{full / headless:.1f})")
+        print(f"🔍 headless 是否导入 matplotlib: {out_headless.split('MPL_LOADED')[1].split()[0]}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
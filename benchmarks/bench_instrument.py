@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+from jarvis_engine.instrument import PROFILER, stage
+
+
+def timed_run(df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        PROFILER.reset()
+        t0 = time.perf_counter()
+        with stage("mission", rows=len(df)):
+            run_lean_pipeline(df, columns=REPORT_COLUMNS)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# ==========================================
+# ⏱️ 埋点开销: 关闭 / 只计时 / 计时 + tracemalloc
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    df = make_ohlcv(args.bars)
+    run_lean_pipeline(df.iloc[:1000])  # 预热 numba
+    print(f"📊 精简流水线 {args.bars:,} 根 K 线, 取 {args.repeat} 次最快")
+
+    modes = [("关闭 (INSTRUMENT=False)", False, None),
+             ("只计时", True, None),
+             ("计时 + maxrss (默认)", True, "rss"),
+             ("计时 + tracemalloc", True, "tracemalloc")]
+    base = None
+    for label, enabled, memory in modes:
+        Config.INSTRUMENT, Config.INSTRUMENT_MEMORY = enabled, memory
+        seconds = timed_run(df, args.repeat)
+        base = base or seconds
+        print(f"   {label:<24} {seconds:7.3f}s  ({seconds / base - 1:+.1%})")
+    PROFILER.print_table()
@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from jarvis_engine import kernels
+
+# ==========================================
+# 🐢 原始逐根循环 (改造前的实现，原样保留作为对照)
+# ==========================================
+def legacy_buffer(ideal_values, buffer):
+    n = len(ideal_values)
+    buffered_position = np.zeros(n)
+    current_pos = 0.0
+    for i in range(n):
+        if abs(ideal_values[i] - current_pos) > buffer:
+            current_pos = ideal_values[i]
+        buffered_position[i] = current_pos
+    return buffered_position
+
+
+def legacy_stoploss(df, fee_rate, initial_capital, stop_loss_pct):
+    capital = initial_capital
+    position = 0.0
+    entry_price = 0.0
+    equity_curve = []
+    stop_triggered = False
+    for row in df.itertuples():
+        if row.signal == 0:
+            stop_triggered = False
+        if position > 0:
+            current_equity = position * row.close
+        else:
+            current_equity = capital
+        equity_curve.append(current_equity)
+        if position > 0:
+            stop_price = entry_price * (1 - stop_loss_pct)
+            if row.low <= stop_price:
+                revenue = position * stop_price
+                fee = revenue * fee_rate
+                capital = revenue - fee
+                position = 0.0
+                entry_price = 0.0
+                stop_triggered = True
+                continue
+            elif row.signal == 0:
+                revenue = position * row.close
+                fee = revenue * fee_rate
+                capital = revenue - fee
+                position = 0.0
+                entry_price = 0.0
+                continue
+        elif position == 0:
+            if row.signal == 1 and not stop_triggered:
+                buy_price = row.close
+                cost = capital * (1 - fee_rate)
+                position = cost / buy_price
+                capital = 0.0
+                entry_price = buy_price
+    return np.array(equity_curve, dtype=np.float64)
+
+
+def legacy_signal(df_signals, initial_capital, fee_rate):
+    balance = initial_capital
+    position = 0
+    equity_curve = []
+    for i in range(len(df_signals)):
+        price = df_signals["close"].iloc[i]
+        signal = df_signals["signal"].iloc[i]
+        if signal == 1 and position == 0:
+            cost = balance * (1 - fee_rate)
+            position = cost / price
+            balance = 0
+        elif signal == -1 and position > 0:
+            balance = position * price * (1 - fee_rate)
+            position = 0
+        equity_curve.append(balance + (position * price))
+    return np.array(equity_curve, dtype=np.float64)
+
+
+def best_of(fn, repeat):
+    best, result = np.inf, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run_case(name, legacy_fn, kernel_fn, repeat):
+    t_legacy, ref = best_of(legacy_fn, 1)
+    modes = [("python", False)] + ([("numba", True)] if kernels.HAS_NUMBA else [])
+    for mode, use_jit in modes:
+        kernels.USE_JIT = use_jit
+        kernel_fn()  # 预热 (numba 首次调用会编译)
+        t_kernel, out = best_of(kernel_fn, repeat)
+        identical = np.array_equal(out, ref, equal_nan=True)
+        print(f"{name:<12} {mode:<7} legacy {t_legacy:8.3f}s | kernel {t_kernel:8.4f}s | "
+              f"x{t_legacy / t_kernel:8.1f} | bit-identical: {identical}")
+    kernels.USE_JIT = kernels.HAS_NUMBA
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.bars)
+    rng = np.random.default_rng(0)
+    print(f"📊 {args.bars:,} bars | numba: {kernels.HAS_NUMBA}")
+
+    # 缓冲器: 随机游走的理想仓位
+    ideal = np.clip(np.cumsum(rng.standard_normal(args.bars)) * 0.05, -3, 3)
+    run_case("buffer", lambda: legacy_buffer(ideal, 0.3),
+             lambda: kernels.buffer_hysteresis(ideal, 0.3), args.repeat)
+
+    # 止损回测: 均线交叉信号
+    df_sig = df[["close", "low"]].copy()
+    ma_s = df["close"].rolling(20).mean()
+    ma_l = df["close"].rolling(100).mean()
+    df_sig["signal"] = (ma_s > ma_l).astype(int)
+    run_case("stoploss", lambda: legacy_stoploss(df_sig, 0.0005, 10000, 0.05),
+             lambda: kernels.stoploss_backtest(df_sig["close"].values, df_sig["low"].values,
+                                               df_sig["signal"].values, 0.0005, 10000, 0.05),
+             args.repeat)
+
+    # 布林带回测: 1 / -1 / 0 信号
+    df_bb = df[["close"]].copy()
+    ma = df["close"].rolling(20).mean()
+    std = df["close"].rolling(20).std()
+    df_bb["signal"] = 0
+    df_bb.loc[df_bb["close"] < ma - 2 * std, "signal"] = 1
+    df_bb.loc[df_bb["close"] > ma + 2 * std, "signal"] = -1
+    run_case("bollinger", lambda: legacy_signal(df_bb, 10000, 0.0005),
+             lambda: kernels.signal_backtest(df_bb["close"].values, df_bb["signal"].values, 10000, 0.0005),
+             args.repeat)
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.alpha import calculate_scaled_forecast, calculate_position_target, run_vectorized_backtest
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS, DEFAULT_COLUMNS
+
+
+def full_pipeline(df):
+    # 与 main.mission_start 的写法一致: 每一步覆盖同一个变量
+    df = calculate_scaled_forecast(df)
+    df = calculate_position_target(df, buffer=Config.POSITION_BUFFER)
+    return run_vectorized_backtest(df, fee_rate=Config.FEE_RATE)
+
+
+def measure(fn, df):
+    """返回 (结果, 峰值新增内存 MB, 耗时 s)；峰值不含输入 df 本身"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    out = fn(df)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, peak / 1e6, elapsed
+
+
+# ==========================================
+# ⏱️ 完整流水线 vs 精简流水线 的峰值内存 (tracemalloc)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--freq", default="1min")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    n_bars = int(args.years * (pd.Timedelta(days=365) / pd.Timedelta(args.freq)))
+    df = make_ohlcv(n_bars, freq=args.freq)
+    print(f"📊 {n_bars:,} 根 {args.freq} K 线, 输入 {df.memory_usage(deep=True).sum() / 1e6:,.0f} MB")
+    run_lean_pipeline(df.iloc[:1000])  # 预热 numba 编译，不计入耗时
+
+    lean, lean_peak, lean_t = measure(lambda d: run_lean_pipeline(d, columns=DEFAULT_COLUMNS), df)
+    equity_lean = lean["equity"].to_numpy()
+    del lean
+    report, report_peak, report_t = measure(lambda d: run_lean_pipeline(d, columns=REPORT_COLUMNS), df)
+    del report
+    full, full_peak, full_t = measure(full_pipeline, df)
+
+    print(f"🐢 完整流水线            : 峰值 {full_peak:8,.0f} MB  {full_t:6.2f}s")
+    print(f"🪶 精简 (REPORT_COLUMNS) : 峰值 {report_peak:8,.0f} MB  {report_t:6.2f}s  (x{full_peak / report_peak:.1f})")
+    print(f"🪶 精简 (DEFAULT_COLUMNS): 峰值 {lean_peak:8,.0f} MB  {lean_t:6.2f}s  (x{full_peak / lean_peak:.1f})")
+    print(f"🎯 Equity 一致: {np.array_equal(full['equity'].to_numpy(), equity_lean)}")
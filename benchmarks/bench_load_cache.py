@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+# 从项目根目录导入 jarvis_engine / config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from jarvis_engine.alpha import load_price_data
+from jarvis_engine.data_cache import clear_cache
+from config import Config
+
+# ==========================================
+# ⏱️ load_price_data: 冷启动 (解析 CSV) vs 热启动 (二进制缓存)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n_bars = args.years * 365 * 24
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.CACHE_DIR = os.path.join(tmp, "cache")
+        csv_path = os.path.join(tmp, "Binance_BTCUSDT_1h.csv")
+        write_binance_csv(make_ohlcv(n_bars), csv_path)
+        size_mb = os.path.getsize(csv_path) / 1e6
+        print(f"📂 合成数据: {n_bars:,} 根 1h K线 ({args.years} 年, {size_mb:.1f} MB)")
+
+        cold = []
+        for _ in range(args.repeat):
+            clear_cache(Config.CACHE_DIR)
+            t0 = time.perf_counter()
+            df_cold = load_price_data(csv_path)
+            cold.append(time.perf_counter() - t0)
+
+        warm = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            df_warm = load_price_data(csv_path)
+            warm.append(time.perf_counter() - t0)
+
+        assert df_warm.equals(df_cold), "缓存读取结果与 CSV 解析不一致!"
+        print(f"🥶 Cold (解析 + 写缓存): {min(cold) * 1000:8.1f} ms")
+        print(f"🔥 Warm (内存映射缓存) : {min(warm) * 1000:8.1f} ms")
+        print(f"🚀 加速比: {min(cold) / min(warm):.1f}x")
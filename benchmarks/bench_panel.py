@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from jarvis_engine.alpha import calculate_scaled_forecast, calculate_position_target, run_vectorized_backtest
+from jarvis_engine.panel import build_panel, run_panel_backtest
+from config import Config
+
+# ==========================================
+# ⏱️ 面板回测 (N 个品种一次矩阵运算) vs 单品种流水线循环 N 遍
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--serial-sample", type=int, default=5, help="单品种抽样数 (按比例外推)")
+    args = parser.parse_args()
+
+    n_bars = args.years * 365 * 24
+    frames = {f"SYM{k:03d}USDT": make_ohlcv(n_bars, seed=k) for k in range(args.symbols)}
+    panel = build_panel(frames)
+    print(f"📊 {args.symbols} 品种 x {n_bars:,} 根 1h K线")
+
+    t0 = time.perf_counter()
+    result = run_panel_backtest(panel)
+    t_panel = time.perf_counter() - t0
+
+    max_err = 0.0
+    t0 = time.perf_counter()
+    for sym in list(frames)[:args.serial_sample]:
+        df = calculate_position_target(calculate_scaled_forecast(frames[sym]), buffer=Config.POSITION_BUFFER)
+        df = run_vectorized_backtest(df, fee_rate=Config.FEE_RATE)
+        max_err = max(max_err, np.max(np.abs(df["equity"].to_numpy() - result["equity"][sym].to_numpy())))
+    t_serial = (time.perf_counter() - t0) / args.serial_sample * args.symbols
+
+    print(f"🐢 单品种循环 (外推): {t_serial:7.2f}s")
+    print(f"🚀 面板回测         : {t_panel:7.2f}s  (x{t_serial / t_panel:.1f})")
+    print(f"🎯 Equity max abs diff: {max_err:.2e}")
+    print(f"💼 组合终值: ${result['portfolio_equity'].iloc[-1]:,.2f}")
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.lean import run_lean_pipeline
+from jarvis_engine.pipeline import PipelineDAG
+
+# 逐个修改的参数 (改完即恢复)，覆盖图中不同深度的阶段
+TWEAKS = (
+    ("POSITION_BUFFER", 0.2),
+    ("FEE_RATE", 0.002),
+    ("SURVIVAL_ATR_MULTIPLIER", 5),
+    ("MAX_LEVERAGE", 2),
+    ("RSI_SCALAR", 1.5),
+    ("VOL_LOOKBACK", 300),
+)
+
+
+def best_of(fn, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# ==========================================
+# ⏱️ 改一个参数: 全量重跑 (run_lean_pipeline，不含统计) vs DAG 局部重算 (含 metrics 阶段)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+    Config.INSTRUMENT = False
+
+    df = make_ohlcv(int(args.years * 365 * 24))
+    dag = PipelineDAG(df)
+    dag.run()  # 预热 numba 编译
+    full = best_of(lambda: run_lean_pipeline(df, columns="all"), args.repeat)
+
+    print(f"📊 {len(df):,} 根 K 线，全量重跑 {full * 1000:.1f} ms")
+    print(f"{'changed':<26} {'dag rerun':>10} {'speedup':>8}  recomputed stages")
+    for field, value in TWEAKS:
+        old = getattr(Config, field)
+        timings = []
+        for _ in range(args.repeat):
+            setattr(Config, field, value)
+            t0 = time.perf_counter()
+            ran = dag.run()
+            timings.append(time.perf_counter() - t0)
+            # 对拍: DAG 的结果表与全量重跑逐位一致
+            ref = run_lean_pipeline(df, columns="all")
+            got = dag.frame("all")
+            assert all(np.array_equal(got[c].to_numpy(), ref[c].to_numpy(), equal_nan=True) for c in ref.columns), field
+            setattr(Config, field, old)
+            dag.run()
+        t = min(timings)
+        print(f"{field + '=' + str(value):<26} {t * 1000:>8.1f}ms {full / t:>7.1f}x  {' -> '.join(ran)}")
@@ -0,0 +1,76 @@
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.image as mpimg
+
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+import main
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - t0
+
+
+def pixel_diff(path_a, path_b) -> float:
+    """两张 PNG 中差异明显 (任一通道 > 0.1) 的像素占比"""
+    a, b = mpimg.imread(path_a), mpimg.imread(path_b)
+    if a.shape != b.shape:
+        return 1.0
+    return float((np.abs(a - b).max(axis=-1) > 0.1).mean())
+
+
+# ==========================================
+# ⏱️ 出图耗时: 逐点串行 (旧) vs 降采样串行 vs 降采样并行
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--freq", default="1h")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数 (默认 min(任务数, CPU 核数))")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    work = tempfile.mkdtemp(prefix="jarvis_render_")
+    old_base = Config.BASE_DIR
+    Config.BASE_DIR = work
+    report_png = os.path.join(work, "data_results", "Jarvis_Full_Report.png")
+    try:
+        # 预热: 字体缓存 / numba 编译
+        df_warm = run_lean_pipeline(make_ohlcv(2000, freq=args.freq), columns=REPORT_COLUMNS)
+        timed(lambda: main.render_reports(df_warm, workers=1))
+
+        print(f"{'history':>10} {'bars':>10} {'raw serial':>12} {'ds serial':>11} {'ds parallel':>12} {'diff px':>9}")
+        for years in args.years:
+            n_bars = int(years * (pd.Timedelta(days=365) / pd.Timedelta(args.freq)))
+            df_res = run_lean_pipeline(make_ohlcv(n_bars, freq=args.freq), columns=REPORT_COLUMNS)
+
+            raw = timed(lambda: main.render_reports(df_res, workers=1, max_points=0))
+            raw_png = report_png + ".raw.png"
+            shutil.copy(report_png, raw_png)
+            ds_serial = timed(lambda: main.render_reports(df_res, workers=1))
+            ds_parallel = timed(lambda: main.render_reports(df_res, workers=args.workers))
+            diff = pixel_diff(raw_png, report_png)
+
+            print(f"{years:>9g}y {n_bars:>10,} {raw:>11.2f}s {ds_serial:>10.2f}s {ds_parallel:>11.2f}s {diff:>8.2%}")
+        print(f"💻 CPU 核数: {os.cpu_count()} (单核机器上并行没有收益，只体现降采样)")
+    finally:
+        Config.BASE_DIR = old_base
+        shutil.rmtree(work, ignore_errors=True)
@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import contextlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from config import Config
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+from jarvis_engine.result_cache import result_key, load_result, cached_run, clear_results
+import main
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+# ==========================================
+# ⏱️ 结果缓存: 冷启动 (完整回测) vs 命中，以及重复访问同一批参数的扫描
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=8)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    work = tempfile.mkdtemp(prefix="jarvis_result_cache_")
+    old = (Config.DATA_PATH, Config.BASE_DIR, Config.CACHE_DIR, Config.INSTRUMENT, Config.STRATEGY_PARAMS)
+    try:
+        Config.BASE_DIR, Config.CACHE_DIR, Config.INSTRUMENT = work, os.path.join(work, "cache"), False
+        Config.DATA_PATH = os.path.join(work, "btc.csv")
+        df = make_ohlcv(args.years * 365 * 24)
+        write_binance_csv(df, Config.DATA_PATH)
+        timed(main.mission_start, headless=True)  # 预热: 数据缓存 / numba 编译
+
+        clear_results()
+        cold, m_cold = timed(main.mission_start, headless=True)
+        warm, m_warm = timed(main.mission_start, headless=True)
+        frame, (df_res, _) = timed(load_result, result_key(Config.DATA_PATH), with_frame=True)
+        assert m_cold == m_warm, "缓存中的指标与重新计算不一致!"
+        assert len(df_res) == len(df)
+        print(f"📊 {len(df):,} 根 1h K 线 ({args.years} 年)")
+        print(f"🥶 mission_start (headless, 完整回测): {cold * 1000:8.1f} ms")
+        print(f"🔥 mission_start (headless, 命中)    : {warm * 1000:8.1f} ms (x{cold / warm:.0f})")
+        print(f"🔥 命中并内存映射读回回测结果表      : {frame * 1000:8.1f} ms")
+
+        # 参数扫描: 6 组快线参数跑两轮，第二轮全部命中
+        def compute():
+            df_res = run_lean_pipeline(df, columns=REPORT_COLUMNS, buffer=Config.POSITION_BUFFER,
+                                       fee_rate=Config.FEE_RATE)
+            return df_res, main.print_analytics(df_res)
+
+        base = dict(old[4])
+        rounds = []
+        for _ in range(2):
+            t0 = time.perf_counter()
+            for scale in (0.5, 0.75, 1.0, 1.25, 1.5, 2.0):
+                Config.STRATEGY_PARAMS = dict(base, fast_span=[max(int(s * scale), 2) for s in base['fast_span']])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    cached_run(df, compute, with_frame=False)
+            rounds.append(time.perf_counter() - t0)
+        print(f"🔁 6 组参数扫描: 第一轮 {rounds[0]:.2f}s / 第二轮 (全部命中) {rounds[1] * 1000:.1f} ms")
+    finally:
+        Config.DATA_PATH, Config.BASE_DIR, Config.CACHE_DIR, Config.INSTRUMENT, Config.STRATEGY_PARAMS = old
+        shutil.rmtree(work, ignore_errors=True)
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis_engine.rolling_metrics import rolling_return_stats, rolling_drawdown, RollingPerformance
+
+
+def naive_sharpe(net_ret, window, periods=24 * 365, step=1):
+    """逐窗口重算 (O(n·w))，只算每 step 个位置，耗时按比例外推"""
+    out = {}
+    for end in range(window, len(net_ret) + 1, step):
+        w = net_ret[end - window:end]
+        out[end - 1] = w.mean() / w.std(ddof=1) * np.sqrt(periods)
+    return out
+
+
+# ==========================================
+# ⏱️ 滚动指标: 逐窗口重算 vs 前缀和 / 单调队列 vs 逐点更新
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=8 * 365 * 24)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 90, 365])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    net_ret = rng.standard_normal(args.bars) * 0.006 + 1e-5
+    equity = 10000 * np.cumprod(1 + net_ret)
+
+    print(f"📊 {args.bars:,} 根 1h K 线")
+    for days in args.days:
+        window = days * 24
+        t0 = time.perf_counter()
+        stats = rolling_return_stats(net_ret, window)
+        dd = rolling_drawdown(equity, window)
+        t_fast = time.perf_counter() - t0
+
+        step = max((args.bars - window) // 2000, 1)
+        t0 = time.perf_counter()
+        naive = naive_sharpe(net_ret, window, step=step)
+        t_naive = (time.perf_counter() - t0) * step
+
+        idx = np.fromiter(naive.keys(), dtype=np.int64)
+        err = np.max(np.abs(stats["sharpe"][idx] - np.fromiter(naive.values(), dtype=np.float64)))
+
+        t0 = time.perf_counter()
+        live = RollingPerformance(window).update_many(net_ret, equity)
+        t_live = time.perf_counter() - t0
+        live_err = max(np.nanmax(np.abs(live[k].to_numpy() - v)) for k, v in stats.items())
+        live_dd = np.nanmax(np.abs(live["drawdown"].to_numpy() - dd))
+
+        print(f"   {days:>4}D: 逐窗口 {t_naive:7.2f}s (外推)  前缀和 {t_fast:6.3f}s  "
+              f"逐点更新 {t_live:6.2f}s ({t_live / args.bars * 1e6:.1f}µs/根)  "
+              f"误差: 对逐窗口 {err:.1e} / 对逐点 {live_err:.1e} / 回撤 {live_dd:.1e}")
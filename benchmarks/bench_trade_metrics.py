@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis_engine.metrics import trade_analytics
+
+
+def legacy_trades(df_res):
+    """旧版 calculate_trade_metrics 的拆分逻辑: groupby('trade_id') + Python 循环"""
+    df = df_res.copy()
+    df['pos_sign'] = np.sign(df['position'])
+    df.loc[df['position'].abs() < 0.01, 'pos_sign'] = 0
+    df['trade_id'] = (df['pos_sign'] != df['pos_sign'].shift(1)).cumsum()
+    trade_stats = []
+    for tid, group in df[df['pos_sign'] != 0].groupby('trade_id'):
+        trade_stats.append({
+            'trade_id': tid,
+            'direction': 'Long' if group['pos_sign'].iloc[0] > 0 else 'Short',
+            'duration': (group.index[-1] - group.index[0]).total_seconds() / 3600,
+            'return': group['net_log_ret'].sum(),
+        })
+    return pd.DataFrame(trade_stats)
+
+
+def make_result(n_bars: int, avg_hold: int, seed: int = 7) -> pd.DataFrame:
+    """随机持仓段 (多 / 空 / 空仓交替)，平均每段 avg_hold 根 K 线"""
+    rng = np.random.default_rng(seed)
+    n_seg = max(n_bars // avg_hold, 1)
+    lengths = rng.geometric(1 / avg_hold, n_seg)
+    levels = rng.choice([-1.5, -0.5, 0.0, 0.005, 0.5, 2.0], n_seg) * rng.uniform(0.5, 1.5, n_seg)
+    position = np.repeat(levels, lengths)[:n_bars]
+    position = np.pad(position, (0, n_bars - len(position)))
+    index = pd.date_range("2018-01-01", periods=n_bars, freq="1min", name="time")
+    return pd.DataFrame({"position": position, "net_log_ret": rng.standard_normal(n_bars) * 1e-3}, index=index)
+
+
+# ==========================================
+# ⏱️ 交易拆分: groupby 循环 (旧) vs 数组边界 + reduceat
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=5_000_000)
+    parser.add_argument("--avg-hold", type=int, default=12, help="平均每段持仓的 K 线数 (越小交易越多)")
+    parser.add_argument("--legacy-bars", type=int, default=500_000, help="旧实现太慢，只在这个规模上对比")
+    args = parser.parse_args()
+
+    df = make_result(args.bars, args.avg_hold)
+    trade_analytics(df.iloc[:1000])
+    t0 = time.perf_counter()
+    trades, summary = trade_analytics(df)
+    t_new = time.perf_counter() - t0
+    print(f"📊 {args.bars:,} 根 K 线 -> {len(trades):,} 笔交易: 数组版 {t_new:.3f}s")
+
+    small = df.iloc[:args.legacy_bars]
+    t0 = time.perf_counter()
+    old = legacy_trades(small)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new, _ = trade_analytics(small)
+    t_small = time.perf_counter() - t0
+    print(f"🐢 {len(small):,} 根 K 线 -> {len(old):,} 笔交易: groupby 循环 {t_old:.2f}s  vs  数组版 {t_small:.4f}s "
+          f"(x{t_old / t_small:,.0f})")
+
+    same_ids = np.array_equal(old["trade_id"].to_numpy(), new["trade_id"].to_numpy())
+    same_dir = np.array_equal(old["direction"].to_numpy(), new["direction"].to_numpy())
+    dur_err = np.abs(old["duration"].to_numpy() - new["duration"].to_numpy()).max()
+    ret_err = np.abs(old["return"].to_numpy() - new["return"].to_numpy()).max()
+    print(f"🎯 trade_id 一致: {same_ids}  direction 一致: {same_dir}  "
+          f"duration 最大误差: {dur_err:.1e}  return 最大误差: {ret_err:.1e}")
@@ -0,0 +1,38 @@
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv
+from jarvis_engine.day12_ma_backtest_pro import run_walk_forward
+
+# ==========================================
+# ⏱️ run_walk_forward: 串行 vs 各年份优化并行 (BTC + ETH, 默认 8 年 = 7 折)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    short_params = [20, 30, 50]
+    long_params = [100, 150, 200, 300]
+    stop_loss_params = [0.05, 0.08, 0.10, 0.15]
+
+    for seed, symbol in enumerate(["BTC", "ETH"]):
+        df = make_ohlcv(args.years * 365 * 24, seed=seed, ann_vol=0.6)
+        df["ret"] = df["close"].pct_change().fillna(0)
+        timings = {}
+        for n_jobs in (1, args.n_jobs):
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                curve, history = run_walk_forward(df, short_params, long_params, stop_loss_params,
+                                                  0.0005, 10000, n_jobs=n_jobs)
+            timings[n_jobs] = (time.perf_counter() - t0, curve)
+        (t_serial, c_serial), (t_par, c_par) = timings[1], timings[args.n_jobs]
+        print(f"{symbol}: {len(history)} folds | serial {t_serial:6.2f}s | parallel {t_par:6.2f}s "
+              f"(x{t_serial / t_par:.2f}) | same curve: {c_serial.equals(c_par)}")
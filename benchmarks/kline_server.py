@@ -0,0 +1,59 @@
+import zlib
+import asyncio
+import argparse
+import numpy as np
+from aiohttp import web
+
+# ==========================================
+# 🧪 本地仿真 K 线服务器 (/api/v3/klines)
+# ==========================================
+# 与币安接口参数 / 返回格式一致 (symbol, interval, startTime, endTime, limit)。
+# 价格由 (品种, 时间戳) 确定性生成，同一请求永远返回同样的数据，便于对拍。
+# latency 模拟公网往返延迟；listing 之前的时间段返回空列表 (模拟新币上市)。
+
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+
+
+def _kline_rows(symbol: str, step: int, first: int, n: int):
+    seed = zlib.crc32(symbol.encode("utf-8"))
+    opens = first + step * np.arange(n, dtype=np.int64)
+    # 用时间戳做确定性扰动，保证分页切法不同也得到同样的价格
+    phase = (opens // step + seed) % 100_003
+    close = 100.0 + (seed % 1000) + 20.0 * np.sin(phase / 500.0) + (phase % 97) / 10.0
+    open_ = close - (phase % 13 - 6) / 10.0
+    high = np.maximum(open_, close) + 0.5
+    low = np.minimum(open_, close) - 0.5
+    volume = 1000.0 + (phase % 211)
+    return [
+        [int(t), f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.1f}", int(t) + step - 1]
+        for t, o, h, l, c, v in zip(opens, open_, high, low, close, volume)
+    ]
+
+
+def make_app(latency: float = 0.05, listing_ms: dict = None) -> web.Application:
+    listing_ms = listing_ms or {}
+
+    async def klines(request):
+        q = request.query
+        symbol = q["symbol"]
+        step = INTERVAL_MS[q.get("interval", "1h")]
+        limit = min(int(q.get("limit", 500)), 1000)
+        start = max(int(q.get("startTime", 0)), listing_ms.get(symbol, 0))
+        end = int(q.get("endTime", 2 ** 62))
+        await asyncio.sleep(latency)
+
+        first = -(-start // step) * step  # 向上对齐到 K 线周期
+        n = 0 if first > end else min(limit, (end - first) // step + 1)
+        return web.json_response(_kline_rows(symbol, step, first, n))
+
+    app = web.Application()
+    app.router.add_get("/api/v3/klines", klines)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency), host="127.0.0.1", port=args.port)
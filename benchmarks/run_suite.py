@@ -0,0 +1,218 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import warnings
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from config import Config
+from jarvis_engine.alpha import load_price_data, calculate_scaled_forecast
+from jarvis_engine.alpha import calculate_position_target, run_vectorized_backtest
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+from jarvis_engine import day12_ma_backtest_pro as day12
+import main
+
+# ==========================================
+# 🏁 性能基准套件 (Benchmark Suite)
+# ==========================================
+# 合成 OHLCV (无需联网) -> 逐阶段计时 + 端到端 mission_start -> JSON 结果
+# 可与保存的基线 JSON 对比，耗时增长超过阈值的项标记为回归 (退出码 1，方便接 CI)。
+#
+#   python benchmarks/run_suite.py --sizes 10k 100k 1m --out base.json
+#   python benchmarks/run_suite.py --sizes 10k 100k 1m --baseline base.json --threshold 0.2
+#
+# 注意: 完整 DataFrame 流水线在 10M 根 K 线下峰值内存约 7 GB，内存不够时用 --skip 跳过。
+
+SIZE_PRESETS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+STAGES = (
+    "load_price_data.csv",
+    "load_price_data.cache",
+    "calculate_scaled_forecast",
+    "calculate_position_target",
+    "run_vectorized_backtest",
+    "calculate_trade_metrics",
+    "run_backtest_with_stoploss",
+    "run_lean_pipeline",
+    "mission_start",
+)
+
+
+def _quiet(fn, *args, **kwargs):
+    """吞掉被测函数自己的打印输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def _time(fn, repeat: int) -> float:
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _mission_start(csv_path: str, work_dir: str):
+    # 端到端走 headless 模式: 只计算回测与统计，不出图 (出图开销见 benchmarks/bench_headless.py)
+    # BASE_DIR 指向临时目录，阶段报告不会覆盖 data_results 里的正式结果
+    # 关闭结果缓存，否则重复计时测到的只是缓存命中
+    old = (Config.DATA_PATH, Config.BASE_DIR, getattr(Config, 'USE_RESULT_CACHE', True))
+    Config.DATA_PATH, Config.BASE_DIR, Config.USE_RESULT_CACHE = csv_path, work_dir, False
+    try:
+        _quiet(main.mission_start, headless=True)
+    finally:
+        Config.DATA_PATH, Config.BASE_DIR, Config.USE_RESULT_CACHE = old
+
+
+def run_size(n_bars: int, freq: str, stages, repeat: int, work_dir: str) -> dict:
+    """在一个数据规模上跑所有选中的阶段，返回 {stage: 秒}"""
+    df = make_ohlcv(n_bars, freq=freq)
+    csv_path = os.path.join(work_dir, f"bench_{n_bars}.csv")
+    write_binance_csv(df, csv_path)
+
+    results = {}
+
+    def record(stage, fn):
+        if stage not in stages:
+            return
+        seconds = _time(fn, repeat)
+        results[stage] = seconds
+        print(f"   {stage:<28} {seconds:9.4f}s  ({n_bars / seconds:>14,.0f} bars/s)")
+
+    record("load_price_data.csv", lambda: load_price_data(csv_path, use_cache=False))
+    load_price_data(csv_path)  # 写入缓存
+    record("load_price_data.cache", lambda: load_price_data(csv_path, use_cache=True))
+
+    # 各阶段的输入在计时外准备好，只计被测函数本身
+    need_frames = {"calculate_position_target", "run_vectorized_backtest", "calculate_trade_metrics"} & set(stages)
+    record("calculate_scaled_forecast", lambda: calculate_scaled_forecast(df))
+    if need_frames:
+        df_alpha = calculate_scaled_forecast(df)
+        record("calculate_position_target",
+               lambda: calculate_position_target(df_alpha, buffer=Config.POSITION_BUFFER))
+        df_pos = calculate_position_target(df_alpha, buffer=Config.POSITION_BUFFER)
+        del df_alpha
+        record("run_vectorized_backtest", lambda: run_vectorized_backtest(df_pos, fee_rate=Config.FEE_RATE))
+        if "calculate_trade_metrics" in stages:
+            df_res = run_vectorized_backtest(df_pos, fee_rate=Config.FEE_RATE)
+            record("calculate_trade_metrics", lambda: _quiet(main.calculate_trade_metrics, df_res))
+            del df_res
+        del df_pos
+
+    if "run_backtest_with_stoploss" in stages:
+        df12 = day12.calc_ma_signal(df.assign(ret=df["close"].pct_change()), 20, 60, atr_threshold=0.001)
+        record("run_backtest_with_stoploss",
+               lambda: day12.run_backtest_with_stoploss(df12, 0.001, 10000.0, stop_loss_pct=0.05))
+        del df12
+
+    record("run_lean_pipeline", lambda: run_lean_pipeline(df, columns=REPORT_COLUMNS))
+    record("mission_start", lambda: _mission_start(csv_path, work_dir))
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": numba_version,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """打印对比表，返回回归项列表 [(key, 基线秒, 当前秒, 比值)]"""
+    regressions = []
+    print(f"\n📐 对比基线 ({baseline['env'].get('commit') or '?'} @ {baseline['env'].get('timestamp', '?')})，"
+          f"阈值 +{threshold:.0%}")
+    print(f"   {'case':<40} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"   {key:<40} {'-':>10} {cur['seconds']:>9.4f}s {'new':>7}")
+            continue
+        ratio = cur["seconds"] / base["seconds"]
+        # 太短的计时噪声大，不参与回归判定
+        regressed = ratio > 1 + threshold and max(cur["seconds"], base["seconds"]) >= min_seconds
+        flag = "  ❌" if regressed else ("  ✅" if ratio < 1 - threshold else "")
+        print(f"   {key:<40} {base['seconds']:>9.4f}s {cur['seconds']:>9.4f}s {ratio:>6.2f}x{flag}")
+        if regressed:
+            regressions.append((key, base["seconds"], cur["seconds"], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jarvis 性能基准套件")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "100k", "1m"], choices=sorted(SIZE_PRESETS))
+    parser.add_argument("--freq", default="1h", help="合成 K 线周期，如 1h / 1min")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--skip", nargs="+", default=[], choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径 (默认 benchmarks/results/suite_<时间>.json)")
+    parser.add_argument("--baseline", default=None, help="对比用的基线 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="耗时增长超过该比例视为回归")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="低于该耗时的项不判定回归")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    stages = [s for s in args.stages if s not in args.skip]
+    work_dir = tempfile.mkdtemp(prefix="jarvis_bench_")
+    old_cache_dir = Config.CACHE_DIR
+    Config.CACHE_DIR = os.path.join(work_dir, "cache")
+    # 预热: 小数据上把所有阶段跑一遍 (numba 编译 / pandas 首次调用的开销不计入结果)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_size(2000, args.freq, stages, 1, work_dir)
+
+    report = {"env": environment(), "freq": args.freq, "repeat": args.repeat, "results": {}}
+    try:
+        for size in args.sizes:
+            n_bars = SIZE_PRESETS[size]
+            print(f"\n📊 {n_bars:,} 根 {args.freq} K 线")
+            for stage, seconds in run_size(n_bars, args.freq, stages, args.repeat, work_dir).items():
+                report["results"][f"{stage}@{size}"] = {
+                    "stage": stage, "bars": n_bars, "seconds": seconds, "bars_per_sec": n_bars / seconds,
+                }
+    finally:
+        Config.CACHE_DIR = old_cache_dir
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"suite_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 结果已保存: {out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项性能回归")
+            sys.exit(1)
+        print("\n✅ 无性能回归")
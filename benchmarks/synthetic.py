@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🧪 合成行情生成器 (无需联网)
+# ==========================================
+def make_ohlcv(n_bars: int, freq: str = "1h", start: str = "2018-01-01", seed: int = 42,
+               start_price: float = 10000.0, ann_vol: float = 0.6,
+               crash_prob: float = 0.0002) -> pd.DataFrame:
+    """
+    几何布朗运动 + 随机影线，生成与 load_price_data 输出同构的 OHLCV (索引为 time)。
+    crash_prob: 每根 K 线出现 -10% ~ -25% 闪崩的概率 (用于触发 Survival Stop)
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=n_bars, freq=freq, name="time")
+    bars_per_year = pd.Timedelta(days=365) / pd.Timedelta(freq)
+    sigma = ann_vol / np.sqrt(bars_per_year)
+
+    log_ret = rng.standard_normal(n_bars) * sigma
+    crashes = rng.random(n_bars) < crash_prob
+    log_ret[crashes] += np.log(1 - rng.uniform(0.10, 0.25, crashes.sum()))
+    close = start_price * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n_bars)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.standard_normal((2, n_bars))) * sigma * 0.5
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.gamma(2.0, 50.0, n_bars)
+
+    return pd.DataFrame({
+        "open": open_, "high": high, "low": low, "close": close, "volume": volume,
+    }, index=index)
+
+
+def write_binance_csv(df: pd.DataFrame, path: str, symbol: str = "BTCUSDT"):
+    """
+    写成 CryptoDataDownload 风格的 CSV (第一行网址 + Unix 毫秒时间戳)，
+    与 data_raw/Binance_BTCUSDT_1h.csv 的格式一致。
+    """
+    unix_ms = df.index.asi8 // 1_000_000
+    out = pd.DataFrame({
+        "Unix": unix_ms,
+        "Date": df.index.strftime("%Y-%m-%d %H:%M:%S"),
+        "Symbol": symbol,
+        "Open": df["open"].values,
+        "High": df["high"].values,
+        "Low": df["low"].values,
+        "Close": df["close"].values,
+        f"Volume {symbol[:-4]}": df["volume"].values,
+        "Volume USDT": (df["volume"] * df["close"]).values,
+    })
+    with open(path, "w", newline="") as f:
+        f.write("https://www.CryptoDataDownload.com\n")
+        out.to_csv(f, index=False)
@@ -1,10 +1,89 @@
 import os
 
+
+class _FrozenDict(dict):
+    """只读、可哈希的 dict (FrozenConfig 里的 STRATEGY_PARAMS 等字段)"""
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenConfig 的字段是只读的，请用 replace(...) 生成新配置")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return _FrozenDict, (dict(self),)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return _FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class FrozenConfig:
+    """
+    Config 的不可变快照: 可哈希、可 pickle，能显式传给 alpha / lean 里的函数，
+    多个配置可以在同一进程的多个线程里同时跑，也可以直接发给进程池。
+    访问方式与 Config 相同 (cfg.VOL_LOOKBACK / getattr(cfg, 'X', default))，列表字段冻结为 tuple。
+    由 Config.freeze(**overrides) 生成，cfg.replace(**overrides) 派生新配置。
+    """
+    __slots__ = ("_items", "_hash")
+
+    def __init__(self, items: dict):
+        object.__setattr__(self, "_items", {k: _freeze(v) for k, v in items.items()})
+        object.__setattr__(self, "_hash", None)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._items[name]
+        except KeyError:
+            raise AttributeError(f"FrozenConfig 没有字段 {name!r}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenConfig 是只读的，请用 replace(...) 生成新配置")
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(tuple(sorted(self._items.items()))))
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenConfig) and self._items == other._items
+
+    def __reduce__(self):
+        return FrozenConfig, (self._items,)
+
+    def __repr__(self):
+        return f"FrozenConfig({len(self._items)} fields)"
+
+    def replace(self, **overrides) -> "FrozenConfig":
+        return FrozenConfig(dict(self._items, **overrides))
+
+    def to_dict(self) -> dict:
+        return dict(self._items)
+
+
 class Config:
     """
     Jarvis-Code 全局配置中心 (V3.3 Survival Edition)
     Vol-Targeting 主导仓位 + 6.0x ATR 灾难阻断器。
+    函数默认读取这个类上的属性；需要同时评估多套配置时，用 Config.freeze(...) 生成不可变快照显式传入。
     """
+
+    @classmethod
+    def freeze(cls, **overrides) -> FrozenConfig:
+        """当前全部大写字段的不可变快照，overrides 覆盖其中的字段"""
+        items = {name: getattr(cls, name) for name in dir(cls) if name.isupper() and not name.startswith("_")}
+        items.update(overrides)
+        return FrozenConfig(items)
     
     # ==========================================
     # 1. 基础设施 (Infrastructure)
@@ -73,4 +152,56 @@ class Config:
     # ==========================================
     POSITION_BUFFER = 0.3 
     FEE_RATE = 0.001
-    INITIAL_CAPITAL = 10000.0
\ No newline at end of file
+    INITIAL_CAPITAL = 10000.0
+
+    # ==========================================
+    # 5. 数据缓存 (Data Cache)
+    # ==========================================
+    # CSV 首次解析后写入二进制列式缓存 (每列一个 .npy)，
+    # 之后按 (路径 + 文件大小 + 修改时间) 命中，内存映射读取。
+    USE_DATA_CACHE = True
+    CACHE_DIR = os.path.join(BASE_DIR, "data_cache")
+
+    # 回测结果缓存 (jarvis_engine/result_cache.py): 影响结果的 Config 字段 + 数据指纹都没变时，
+    # mission_start 直接返回上次的回测结果与指标。RESULT_CACHE_DIR = None 时放在 CACHE_DIR/results。
+    # 总大小超过 RESULT_CACHE_MAX_MB 后按最近使用时间淘汰 (LRU)。
+    USE_RESULT_CACHE = True
+    RESULT_CACHE_DIR = None
+    RESULT_CACHE_MAX_MB = 512
+
+    # 本地 K 线库 (jarvis_engine/bar_store.py): 按 品种 / 周期 存定长列式文件，按时间区间零拷贝切片。
+    # BAR_STORE_DIR = None 时放在 CACHE_DIR/bars。
+    BAR_STORE_DIR = None
+
+    # 分块流水线 (jarvis_engine/chunked.py) 每块的 K 线根数: 分钟线 / 多年历史下内存只随块大小增长
+    CHUNK_SIZE = 100_000
+
+    # ==========================================
+    # 6. 执行模式 (Execution)
+    # ==========================================
+    # True: main.py 走精简流水线 (jarvis_engine/lean.py)，只在数组间传递、不复制宽表，
+    # 只落地作图/统计需要的列；结果与完整流水线逐位一致。
+    # False: 走原始三段式 DataFrame 流水线 (保留全部中间列，方便调试)。
+    LEAN_PIPELINE = True
+
+    # 派生序列的存储精度: 'float64' (默认，与历史结果逐位一致) / 'float32' (内存与带宽减半)。
+    # float32 只作用于数组流水线 (lean / panel / calculate_forecast_matrix)：
+    # EWMA 等统计仍在 float64 下计算，熔断判断在 float64 下完成，净值始终 float64 累乘。
+    # 误差范围见 benchmarks/bench_float32.py。
+    COMPUTE_DTYPE = 'float64'
+
+    # 阶段埋点 (jarvis_engine/instrument.py): 每个阶段的耗时 / CPU / 峰值内存 / 行数
+    # INSTRUMENT = False 时完全关闭；INSTRUMENT_MEMORY = 'rss' (默认) 时峰值内存取进程最大常驻内存的增长，
+    # 开销可忽略，可常开；'tracemalloc' 时精确追踪每个阶段的 Python 分配峰值 (约 +15% 耗时，排查内存时再打开)；
+    # None 时只计时
+    INSTRUMENT = True
+    INSTRUMENT_MEMORY = 'rss'
+
+    # 出图 (main.py): 每条序列按 min-max 分桶降采样后再画，桶数约等于全景图横向像素 (14in x 300dpi)。
+    # 0 = 不降采样 (逐点画，耗时随历史长度线性增长)。
+    REPORT_MAX_POINTS = 4000
+    # 全景图与快照并行渲染的进程数，None = min(任务数, CPU 核数)，1 = 当前进程内依次渲染
+    REPORT_WORKERS = None
+    # 全景图底部追加滚动指标子图 (Sharpe / Sortino / 波动率 / 回撤) 的窗口 (天)，() = 不画
+    # 例如 (30, 90, 365)；计算见 jarvis_engine/rolling_metrics.py (O(n))
+    REPORT_ROLLING_WINDOWS = ()
@@ -0,0 +1,440 @@
+import os
+import csv
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+import aiohttp
+
+# ==========================================
+# ⚡ 并发异步下载器 (Async Kline Downloader)
+# ==========================================
+# 与 download_btc_clean.py 的区别:
+#   1. 按时间把每个品种切成若干页 (每页 1000 根)，多个品种 / 多页同时抓取
+#   2. 所有请求共用一个 aiohttp 连接池 (Keep-Alive)，不再每次重新握手
+#   3. 令牌桶限速代替固定 sleep: 平均速率受控，但空闲额度可以突发使用
+#   4. 页面解析完直接按时间顺序写入磁盘 (乱序到达的页先暂存，凑齐再写)，不在内存里攒整张表
+# 输出格式与 download_btc_clean.py 一致: unix(毫秒),open,high,low,close,volume
+# --update: 增量模式，只读已有文件的最后一根 K 线，从那里接着抓 (见 update_many_async)。
+#   CryptoDataDownload 导出的文件 (首行网址、按时间倒序) 没法在末尾追加，默认跳过 (load_price_data 照常能读)；
+#   加 --convert 时整表改写成升序格式一次 (见 convert_to_ascending，会丢掉 Date / Symbol / 计价币成交量等列，
+#   原文件保留为 .orig)，之后即可增量更新。
+# base_url 可指向本地的仿真 K 线服务器 (见 benchmarks/kline_server.py)，方便离线测试。
+
+BINANCE_BASE_URL = "https://api.binance.com"
+KLINES_PATH = "/api/v3/klines"
+PAGE_LIMIT = 1000  # 币安单次最多 1000 根
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000,
+}
+
+CSV_HEADER = "unix,open,high,low,close,volume\n"
+FILENAME_FMT = "Binance_{symbol}_{interval}.csv"
+
+
+class TokenBucket:
+    """
+    异步令牌桶: 每秒补充 rate 个令牌，最多攒 capacity 个。
+    每个请求消耗一个令牌，没有令牌时等待。
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _OrderedCsvWriter:
+    """
+    按页序号顺序写 CSV: 先到的后页暂存在 pending 里，前面的页到齐后依次落盘。
+    先写 .part 临时文件，全部成功后再 rename，失败时不会留下半截文件。
+    增量模式下先把旧文件的前 keep_bytes 字节原样拷进临时文件，再接着写新数据。
+    """
+
+    def __init__(self, filename: str, n_pages: int, row_format=None, keep_bytes: int = 0, carry=None):
+        self.filename = filename
+        self.tmp_path = f"{filename}.part"
+        self.n_pages = n_pages
+        self.row_format = row_format or _format_rows
+        # carry = (时间戳, 原始行): 被截掉的旧文件最后一行，新数据没有覆盖到它时补写回去
+        self.carry = carry
+        self.pending = {}
+        self.next_page = 0
+        self.rows = 0
+        if keep_bytes:
+            with open(filename, "rb") as src, open(self.tmp_path, "wb") as dst:
+                dst.write(src.read(keep_bytes))
+            self._f = open(self.tmp_path, "a", encoding="utf-8", newline="")
+        else:
+            self._f = open(self.tmp_path, "w", encoding="utf-8", newline="")
+            self._f.write(CSV_HEADER)
+
+    def put(self, page_idx: int, data: list):
+        self.pending[page_idx] = data
+        while self.next_page in self.pending:
+            data = self.pending.pop(self.next_page)
+            if self.carry is not None:
+                carry_ts, carry_line = self.carry
+                # 与旧数据的重叠部分去重: 旧文件里已有的更早的 K 线不再重复写
+                data = [row for row in data if row[0] >= carry_ts]
+                if data:
+                    if data[0][0] > carry_ts:
+                        self._f.write(carry_line)
+                    self.carry = None
+            self._f.write(self.row_format(data))
+            self.rows += len(data)
+            self.next_page += 1
+
+    @property
+    def done(self) -> bool:
+        return self.next_page == self.n_pages
+
+    def commit(self):
+        if self.carry is not None:
+            self._f.write(self.carry[1])
+        self._f.close()
+        os.replace(self.tmp_path, self.filename)
+
+    def abort(self):
+        self._f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def _to_ms(date_str: str) -> int:
+    return int(datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _format_rows(data) -> str:
+    # 币安格式: [Open Time, Open, High, Low, Close, Volume, ...]，价格原样写回 (字符串，不经过 float 转换)
+    return "".join(f"{row[0]},{row[1]},{row[2]},{row[3]},{row[4]},{row[5]}\n" for row in data)
+
+
+def _format_rows_timestamp(data) -> str:
+    # download_data.py 的格式: 本地时间字符串 + float 价格 (与 pandas to_csv 的写法一致)
+    return "".join(
+        f"{datetime.fromtimestamp(row[0] / 1000)},{float(row[1])},{float(row[2])},{float(row[3])},"
+        f"{float(row[4])},{float(row[5])}\n"
+        for row in data
+    )
+
+
+# 首列名 -> (解析该列为毫秒时间戳, 新数据的写法)
+_FILE_FORMATS = {
+    "unix": (lambda v: int(float(v)), _format_rows),
+    "timestamp": (lambda v: int(datetime.fromisoformat(v).timestamp() * 1000), _format_rows_timestamp),
+}
+
+
+def read_last_bar(filename: str, tail_bytes: int = 1 << 16):
+    """
+    只读文件头和文件尾，返回 (首列名, 最后一根 K 线的毫秒时间戳, 该行原文, 该行的起始字节偏移)。
+    文件里没有数据行时时间戳为 None；无法识别的格式 / 按时间倒序的文件返回 None。
+    """
+    with open(filename, "rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+        first = f.readline()
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(header_end, size - tail_bytes)
+        f.seek(tail_start)
+        tail = f.read()
+
+    first_col = header.decode("utf-8").strip().lower().split(",")[0]
+    if first_col not in _FILE_FORMATS:
+        return None
+    body = tail.rstrip(b"\r\n")
+    if not body:
+        return first_col, None, "", header_end
+    cut = body.rfind(b"\n") + 1
+    line = tail[cut:].decode("utf-8").rstrip("\r\n") + "\n"
+    try:
+        last_ts = _FILE_FORMATS[first_col][0](line.split(",")[0])
+    except ValueError:
+        return None
+    if first_col == "unix" and not 1e11 <= last_ts < 1e14:
+        return None  # 只支持毫秒时间戳 (秒 / 微秒的文件追加会混单位)
+    try:
+        if _FILE_FORMATS[first_col][0](first.decode("utf-8").split(",")[0]) > last_ts:
+            return None  # 倒序文件: 末行是最早的 K 线，不能在后面追加
+    except ValueError:
+        return None
+    return first_col, last_ts, line, tail_start + cut
+
+
+def _unix_ms(value: str) -> int:
+    """秒 / 毫秒 / 微秒时间戳统一成毫秒 (与 load_price_data 的判断一致)"""
+    ts = int(float(value))
+    if ts > 1e14:
+        return ts // 1000
+    if ts < 1e11:
+        return ts * 1000
+    return ts
+
+
+def convert_to_ascending(filename: str):
+    """
+    把 CryptoDataDownload 格式 (首行网址，表头 Unix,Date,Symbol,Open,High,Low,Close,Volume <币>,...，
+    按时间倒序) 或其它倒序的 unix 文件，一次性改写成本模块的格式 (unix 毫秒升序)，之后即可增量追加。
+    价格原样保留 (字符串)，成交量取第一个 Volume 列 (基础币计价)，其余列丢弃。
+    原文件改名为 .orig 保留；无法识别时返回 None，否则返回转换后的行数。
+    """
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if header and header[0].strip().lower() not in _FILE_FORMATS:
+            header = next(reader, [])  # 第一行是网址
+        columns = [c.strip().lower() for c in header]
+        if not columns or columns[0] != "unix":
+            return None
+        volume = next((i for i, c in enumerate(columns) if c.startswith("volume")), None)
+        try:
+            picks = [columns.index(c) for c in ("open", "high", "low", "close")]
+        except ValueError:
+            return None
+        rows = {}
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            try:
+                ts = _unix_ms(row[0])
+            except ValueError:
+                return None
+            rows.setdefault(ts, [row[i] for i in picks] + [row[volume] if volume is not None else "0"])
+
+    tmp_path = f"{filename}.part"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(CSV_HEADER)
+        f.write("".join(f"{ts},{','.join(values)}\n" for ts, values in sorted(rows.items())))
+    os.replace(filename, f"{filename}.orig")
+    os.replace(tmp_path, filename)
+    return len(rows)
+
+
+def plan_pages(start_ts: int, end_ts: int, interval: str, limit: int = PAGE_LIMIT):
+    """
+    把 [start_ts, end_ts) 切成互不重叠的页: [(page_start, page_end), ...]
+    页边界对齐到 K 线周期，每页正好 limit 根，因此页与页之间不会有重复数据。
+    """
+    step = INTERVAL_MS[interval]
+    span = step * limit
+    pages = []
+    page_start = start_ts
+    while page_start < end_ts:
+        pages.append((page_start, min(page_start + span, end_ts) - 1))
+        page_start += span
+    return pages
+
+
+async def fetch_page(session, bucket, base_url, symbol, interval, page_start, page_end,
+                     limit=PAGE_LIMIT, retries=5):
+    """
+    抓取一页 K 线 (带限速与指数退避重试)，返回币安原始 list。
+    只重试限流 (418 / 429)、5xx、超时与连接错误；其它 4xx 立即抛出 ClientResponseError。
+    """
+    params = {
+        "symbol": symbol,
+        "interval": interval,
+        "limit": limit,
+        "startTime": page_start,
+        "endTime": page_end,
+    }
+    url = base_url.rstrip("/") + KLINES_PATH
+    delay = 1.0
+    for attempt in range(retries):
+        await bucket.acquire()
+        try:
+            async with session.get(url, params=params) as res:
+                if res.status in (418, 429):
+                    # 被限流: 优先遵守服务器给的 Retry-After
+                    wait = float(res.headers.get("Retry-After", delay))
+                    print(f"   🚦 {symbol} 触发限流，{wait:.1f}s 后重试")
+                    await asyncio.sleep(wait)
+                    delay *= 2
+                    continue
+                res.raise_for_status()
+                return await res.json()
+        except aiohttp.ClientResponseError as e:
+            # 4xx (品种不存在 / 参数错误) 重试也不会成功，直接失败，不再占用令牌桶额度
+            if 400 <= e.status < 500 or attempt == retries - 1:
+                raise
+            print(f"   ⚠️ {symbol} 服务器错误 {e.status}，重试中...")
+            await asyncio.sleep(delay)
+            delay *= 2
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries - 1:
+                raise
+            print(f"   ⚠️ {symbol} {datetime.fromtimestamp(page_start / 1000, tz=timezone.utc):%Y-%m-%d} 下载出错: {e}，重试中...")
+            await asyncio.sleep(delay)
+            delay *= 2
+    raise RuntimeError(f"{symbol} 重试 {retries} 次仍被限流")
+
+
+async def _worker(queue, session, bucket, base_url, interval, writers, failed):
+    while True:
+        job = await queue.get()
+        try:
+            symbol, page_idx, page_start, page_end = job
+            if symbol in failed:
+                continue
+            try:
+                data = await fetch_page(session, bucket, base_url, symbol, interval, page_start, page_end)
+            except Exception as e:
+                print(f"❌ {symbol} 下载失败: {e}")
+                failed.add(symbol)
+                continue
+            writers[symbol].put(page_idx, data)
+        finally:
+            queue.task_done()
+
+
+async def _run_downloads(plans: dict, writers: dict, interval, concurrency, rate, burst, base_url) -> dict:
+    """plans: {symbol: [(page_start, page_end), ...]}，全部抓完后提交 / 回滚每个品种的文件"""
+    # 按 (页序号, 品种) 交错排队: 各品种齐头并进，乱序暂存的页数不超过在途请求数
+    queue = asyncio.Queue()
+    for page_idx in range(max((len(p) for p in plans.values()), default=0)):
+        for sym, pages in plans.items():
+            if page_idx < len(pages):
+                queue.put_nowait((sym, page_idx) + pages[page_idx])
+
+    bucket = TokenBucket(rate, burst)
+    failed = set()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        workers = [asyncio.create_task(_worker(queue, session, bucket, base_url, interval, writers, failed))
+                   for _ in range(concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    results = {}
+    for sym, writer in writers.items():
+        if sym in failed or not writer.done:
+            writer.abort()
+            continue
+        writer.commit()
+        results[sym] = writer.filename
+        print(f"✅ {sym}: 写入 {writer.rows} 行 -> {writer.filename}")
+    return results
+
+
+async def download_many_async(symbols, start_date, end_date=None, interval="1h", out_dir=".",
+                              concurrency=8, rate=10.0, burst=None, base_url=BINANCE_BASE_URL,
+                              filename_fmt=FILENAME_FMT) -> dict:
+    """
+    并发下载多个品种，返回 {symbol: 文件路径} (失败的品种不在其中)。
+    concurrency: 同时在途的请求数；rate / burst: 令牌桶的每秒请求数 / 突发上限。
+    """
+    start_ts = _to_ms(start_date)
+    end_ts = _to_ms(end_date) if end_date else int(time.time() * 1000)
+    pages = plan_pages(start_ts, end_ts, interval)
+    os.makedirs(out_dir, exist_ok=True)
+
+    plans = {sym: pages for sym in symbols}
+    writers = {
+        sym: _OrderedCsvWriter(os.path.join(out_dir, filename_fmt.format(symbol=sym, interval=interval)), len(pages))
+        for sym in symbols
+    }
+    return await _run_downloads(plans, writers, interval, concurrency, rate, burst, base_url)
+
+
+async def update_many_async(symbols, start_date="2018-01-01", end_date=None, interval="1h", out_dir=".",
+                            concurrency=8, rate=10.0, burst=None, base_url=BINANCE_BASE_URL,
+                            filename_fmt=FILENAME_FMT, convert=False) -> dict:
+    """
+    增量更新: 从已有文件的最后一根 K 线开始往后抓 (这一根会被重新下载，覆盖下载时尚未收盘的数据)，
+    重叠部分去重后追加写入 (临时文件 + rename，原子替换)。
+    文件不存在的品种从 start_date 开始全量下载；无法识别格式的文件跳过。
+    convert=True 时，CryptoDataDownload 格式 (倒序) 的文件先改写成升序 (convert_to_ascending，
+    原文件留作 .orig) 再更新；默认不改动这类文件，只提示后跳过。
+    """
+    end_ts = _to_ms(end_date) if end_date else int(time.time() * 1000)
+    os.makedirs(out_dir, exist_ok=True)
+
+    plans, writers = {}, {}
+    for sym in symbols:
+        filename = os.path.join(out_dir, filename_fmt.format(symbol=sym, interval=interval))
+        if not os.path.exists(filename):
+            pages = plan_pages(_to_ms(start_date), end_ts, interval)
+            plans[sym], writers[sym] = pages, _OrderedCsvWriter(filename, len(pages))
+            continue
+
+        info = read_last_bar(filename)
+        if info is None and convert:
+            converted = convert_to_ascending(filename)
+            if converted is not None:
+                print(f"🔁 {sym}: {filename} 为倒序格式，已转换为升序 ({converted} 行，原文件保留为 .orig)")
+                info = read_last_bar(filename)
+        if info is None:
+            print(f"⚠️ {sym}: 无法识别 {filename} 的格式 (需要按时间升序、unix 毫秒或 timestamp 首列)，已跳过；"
+                  f"倒序的 CryptoDataDownload 文件可加 --convert 转换后再更新")
+            continue
+        first_col, last_ts, last_line, line_start = info
+        if last_ts is None:
+            last_ts = _to_ms(start_date)
+        pages = plan_pages(last_ts, end_ts, interval)
+        plans[sym] = pages
+        writers[sym] = _OrderedCsvWriter(filename, len(pages), row_format=_FILE_FORMATS[first_col][1],
+                                         keep_bytes=line_start, carry=(last_ts, last_line) if last_line else None)
+        print(f"🔄 {sym}: 本地数据截至 {datetime.fromtimestamp(last_ts / 1000, tz=timezone.utc):%Y-%m-%d %H:%M}，"
+              f"需抓取 {len(pages)} 页")
+
+    return await _run_downloads(plans, writers, interval, concurrency, rate, burst, base_url)
+
+
+def download_many(symbols, start_date, **kwargs) -> dict:
+    """同步入口 (脚本 / Notebook 里直接调用)"""
+    return asyncio.run(download_many_async(symbols, start_date, **kwargs))
+
+
+def update_many(symbols, **kwargs) -> dict:
+    """增量更新的同步入口"""
+    return asyncio.run(update_many_async(symbols, **kwargs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="并发下载币安 K 线")
+    parser.add_argument("symbols", nargs="+", help="例如 BTCUSDT ETHUSDT")
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--interval", default="1h", choices=sorted(INTERVAL_MS))
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=10.0, help="每秒请求数上限")
+    parser.add_argument("--base-url", default=BINANCE_BASE_URL)
+    parser.add_argument("--update", action="store_true", help="增量更新已有文件 (只抓最后一根之后的数据)")
+    parser.add_argument("--convert", action="store_true",
+                        help="配合 --update: 把倒序的 CryptoDataDownload 文件改写成升序格式 (原文件保留为 .orig)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    options = dict(end_date=args.end, interval=args.interval, out_dir=args.out_dir,
+                   concurrency=args.concurrency, rate=args.rate, base_url=args.base_url)
+    if args.update:
+        print(f"🔄 增量更新 {len(args.symbols)} 个品种 ({args.interval}) ...")
+        done = update_many(args.symbols, start_date=args.start, convert=args.convert, **options)
+    else:
+        print(f"🚀 并发下载 {len(args.symbols)} 个品种 ({args.interval}, {args.start} ~ {args.end or '现在'}) ...")
+        done = download_many(args.symbols, args.start, **options)
+    print(f"🏁 完成 {len(done)}/{len(args.symbols)} 个品种，耗时 {time.perf_counter() - t0:.1f}s")
@@ -1,7 +1,13 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+# 从项目根目录导入 jarvis_engine
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jarvis_engine.kernels import signal_backtest
+
 # ==========================================
 # 1. 数据加载 (直接复用 Day 17 的完美版)
 # ==========================================
@@ -83,33 +89,12 @@ def run_simple_backtest(df_signals, initial_capital=10000, fee_rate=0.0005):
     """
     简化版回测引擎 (不带止损，纯跑策略逻辑)
     """
-    balance = initial_capital
-    position = 0 
-    equity_curve = []
-    
-    for i in range(len(df_signals)):
-        price = df_signals["close"].iloc[i]
-        signal = df_signals["signal"].iloc[i]
-        
-        # 信号逻辑：
-        # 1 = 即使有仓位也保持，没仓位就买
-        # -1 = 清仓
-        # 0 = 保持现状 (Hold)
-        
-        if signal == 1 and position == 0:
-            # 买入 (All in)
-            cost = balance * (1 - fee_rate)
-            position = cost / price
-            balance = 0
-            
-        elif signal == -1 and position > 0:
-            # 卖出 (Close)
-            balance = position * price * (1 - fee_rate)
-            position = 0
-            
-        # 计算当前净值
-        current_equity = balance + (position * price)
-        equity_curve.append(current_equity)
+    # 信号逻辑：
+    # 1 = 即使有仓位也保持，没仓位就买
+    # -1 = 清仓
+    # 0 = 保持现状 (Hold)
+    equity_curve = signal_backtest(df_signals["close"].values, df_signals["signal"].values,
+                                   initial_capital, fee_rate)
         
     return pd.Series(equity_curve, index=df_signals.index)
 
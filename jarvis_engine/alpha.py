@@ -1,11 +1,32 @@
+import os
 import pandas as pd
 import numpy as np
 from config import Config
+from jarvis_engine.data_cache import read_cached_frame, write_cached_frame
+from jarvis_engine.kernels import buffer_hysteresis
 
-def load_price_data(csv_path: str) -> pd.DataFrame:
+def load_price_data(csv_path: str, use_cache=None) -> pd.DataFrame:
     """
     加载并清洗数据
+    [Cache] 首次解析后写入二进制列式缓存 (Config.CACHE_DIR)，
+    CSV 未变化时直接内存映射读取，跳过 read_csv / to_datetime。
     """
+    if use_cache is None:
+        use_cache = getattr(Config, 'USE_DATA_CACHE', True)
+    if not use_cache:
+        return _parse_price_csv(csv_path)
+
+    cache_root = getattr(Config, 'CACHE_DIR', os.path.join(Config.BASE_DIR, "data_cache"))
+    df = read_cached_frame(csv_path, cache_root)
+    if df is not None:
+        return df
+
+    df = _parse_price_csv(csv_path)
+    if not df.empty:
+        write_cached_frame(csv_path, df, cache_root)
+    return df
+
+def _parse_price_csv(csv_path: str) -> pd.DataFrame:
     try:
         df = pd.read_csv(csv_path, low_memory=False)
     except Exception as e:
@@ -14,7 +35,10 @@ def load_price_data(csv_path: str) -> pd.DataFrame:
 
     if len(df) > 0 and ("http" in str(df.columns[0]) or "www" in str(df.columns[0])):
         df = pd.read_csv(csv_path, skiprows=1, low_memory=False)
+    return _clean_price_frame(df)
 
+def _clean_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """列名归一化 + 时间索引 + 补齐 OHLC (整表加载与分块加载共用)，无法识别时间列时返回空表"""
     df.columns = [c.strip().lower() for c in df.columns]
     
     if "timestamp" in df.columns:
@@ -36,38 +60,35 @@ def load_price_data(csv_path: str) -> pd.DataFrame:
             
     return df
 
-def calculate_scaled_forecast(df: pd.DataFrame) -> pd.DataFrame:
+def resolve_config(config=None):
     """
-    [V4.3 The Silence Protocol] 深度平滑混合信号
-    --------------------------------------------
-    1. Trend: 保持不变
-    2. RSI: 实施 "Soft Deadzone" + "Deep Smoothing"，消除跳变。
+    显式传入的配置 (Config.freeze() 得到的 FrozenConfig，或任何带同名属性的对象) 优先，
+    None 时使用全局 Config 类。本模块和 lean.py 的函数都接受 config 参数，
+    这样多套配置可以在线程 / 进程池里并行评估，互不干扰。
     """
-    data = df.copy()
-    
-    # --- 1. 基础数据准备 ---
-    vol_span = getattr(Config, 'VOL_LOOKBACK', 480) 
-    data['volatility'] = data['close'].ewm(span=vol_span).std().replace(0, np.nan).fillna(method='ffill') + 1e-8
-    
-    # --- 2. 计算趋势信号 (Trend Component) ---
-    fast_spans = Config.STRATEGY_PARAMS['fast_span']
-    slow_spans = Config.STRATEGY_PARAMS['slow_span']
-    scalars = Config.STRATEGY_PARAMS['scalars']
-    weights = getattr(Config, 'TREND_INTERNAL_WEIGHTS', [0.25, 0.25, 0.25, 0.25])
-    
-    forecast_cols = []
-    for i in range(len(fast_spans)):
-        fast, slow, scalar = fast_spans[i], slow_spans[i], scalars[i]
-        raw = data['close'].ewm(span=fast).mean() - data['close'].ewm(span=slow).mean()
-        col = f'fc_{fast}_{slow}'
-        data[col] = (raw * scalar) / data['volatility']
-        forecast_cols.append(col)
+    return Config if config is None else config
 
-    trend_forecast = data[forecast_cols].mul(weights).sum(axis=1)
-    
-    # --- 3. [V4.3] 深度平滑版 RSI 反转信号 ---
-    rsi_period = getattr(Config, 'RSI_PERIOD', 14)
-    delta = data['close'].diff()
+def compute_dtype(config=None) -> np.dtype:
+    """
+    派生序列 (forecast / position / 收益) 的存储精度，由 Config.COMPUTE_DTYPE 决定。
+    float32 时: EWMA / 滚动统计仍在 pandas 内部以 float64 计算，阈值判断也在 float64 下完成，
+    只把结果降精度存储；净值 (cumprod) 始终用 float64 累乘。
+    """
+    name = getattr(resolve_config(config), 'COMPUTE_DTYPE', 'float64')
+    if name not in ('float32', 'float64'):
+        raise ValueError(f"COMPUTE_DTYPE 只支持 'float32' / 'float64'，当前为 {name!r}")
+    return np.dtype(name)
+
+def _forecast_volatility(close, config=None):
+    """价格的 EWMA 标准差 (趋势信号的归一化分母)，close 可以是 Series 或 DataFrame"""
+    vol_span = getattr(resolve_config(config), 'VOL_LOOKBACK', 480)
+    return close.ewm(span=vol_span).std().replace(0, np.nan).ffill() + 1e-8
+
+def _rsi_forecast(close, config=None):
+    """[V4.3] 深度平滑版 RSI 反转信号 (未截断)，close 可以是 Series 或 (时间 x 品种) DataFrame"""
+    cfg = resolve_config(config)
+    rsi_period = getattr(cfg, 'RSI_PERIOD', 14)
+    delta = close.diff()
     gain = (delta.where(delta > 0, 0)).ewm(alpha=1/rsi_period, adjust=False).mean()
     loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/rsi_period, adjust=False).mean()
     rs = gain / loss
@@ -78,7 +99,7 @@ def calculate_scaled_forecast(df: pd.DataFrame) -> pd.DataFrame:
     smooth_rsi = raw_rsi.rolling(window=12).mean().fillna(50)
     
     rsi_diff = 50 - smooth_rsi
-    rsi_scalar = getattr(Config, 'RSI_SCALAR', 1.0)
+    rsi_scalar = getattr(cfg, 'RSI_SCALAR', 1.0)
     
     # [V4.3 优化 B] 软死区逻辑 (Soft Deadzone)
     # 替换之前的 np.where 硬截断。
@@ -90,12 +111,65 @@ def calculate_scaled_forecast(df: pd.DataFrame) -> pd.DataFrame:
     
     # [V4.3 优化 C] 输出信号再次平滑
     # 对最终生成的 Forecast 再做一次 EMA，确保曲线像丝绸一样顺滑
-    rsi_forecast = rsi_forecast.ewm(span=24).mean()
+    # (上市前的空白行置 NaN，面板数据里每个品种都从自己的第一根 K 线开始平滑)
+    rsi_forecast = rsi_forecast.where(close.ffill().notna()).ewm(span=24).mean()
+    return rsi_forecast
+
+def _trend_forecast(close, volatility, config=None) -> np.ndarray:
+    """
+    加权趋势信号 (未截断) 的数组版本，close 可以是 Series 或 DataFrame。
+    逐条规则累加，NaN 记为 0，与 calculate_scaled_forecast 里 sum(axis=1) 的结果逐位一致。
+    """
+    cfg = resolve_config(config)
+    fast_spans = cfg.STRATEGY_PARAMS['fast_span']
+    slow_spans = cfg.STRATEGY_PARAMS['slow_span']
+    scalars = cfg.STRATEGY_PARAMS['scalars']
+    weights = getattr(cfg, 'TREND_INTERNAL_WEIGHTS', [0.25, 0.25, 0.25, 0.25])
+
+    ewma = {span: close.ewm(span=span).mean().to_numpy() for span in sorted(set(fast_spans) | set(slow_spans))}
+    trend = np.zeros(close.shape)
+    for fast, slow, scalar, weight in zip(fast_spans, slow_spans, scalars, weights):
+        fc = ((ewma[fast] - ewma[slow]) * scalar) / volatility * weight
+        trend += np.nan_to_num(fc, nan=0.0)
+    return trend
+
+def calculate_scaled_forecast(df: pd.DataFrame, config=None) -> pd.DataFrame:
+    """
+    [V4.3 The Silence Protocol] 深度平滑混合信号
+    --------------------------------------------
+    1. Trend: 保持不变
+    2. RSI: 实施 "Soft Deadzone" + "Deep Smoothing"，消除跳变。
+    config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+    cfg = resolve_config(config)
+    data = df.copy()
+    
+    # --- 1. 基础数据准备 ---
+    data['volatility'] = _forecast_volatility(data['close'], cfg)
+    
+    # --- 2. 计算趋势信号 (Trend Component) ---
+    fast_spans = cfg.STRATEGY_PARAMS['fast_span']
+    slow_spans = cfg.STRATEGY_PARAMS['slow_span']
+    scalars = cfg.STRATEGY_PARAMS['scalars']
+    weights = list(getattr(cfg, 'TREND_INTERNAL_WEIGHTS', [0.25, 0.25, 0.25, 0.25]))
+    
+    forecast_cols = []
+    for i in range(len(fast_spans)):
+        fast, slow, scalar = fast_spans[i], slow_spans[i], scalars[i]
+        raw = data['close'].ewm(span=fast).mean() - data['close'].ewm(span=slow).mean()
+        col = f'fc_{fast}_{slow}'
+        data[col] = (raw * scalar) / data['volatility']
+        forecast_cols.append(col)
+
+    trend_forecast = data[forecast_cols].mul(weights).sum(axis=1)
+    
+    # --- 3. [V4.3] 深度平滑版 RSI 反转信号 ---
+    rsi_forecast = _rsi_forecast(data['close'], cfg)
     
     # --- 4. 信号融合 ---
     # 使用配置的权重，默认倾向于趋势 (0.9/0.1 or 0.8/0.2)
-    w_trend = getattr(Config, 'TREND_WEIGHT', 0.9)
-    w_rsi = getattr(Config, 'RSI_WEIGHT', 0.1)
+    w_trend = getattr(cfg, 'TREND_WEIGHT', 0.9)
+    w_rsi = getattr(cfg, 'RSI_WEIGHT', 0.1)
     
     data['trend_forecast'] = trend_forecast.clip(-20, 20).fillna(0)
     data['rsi_forecast'] = rsi_forecast.clip(-20, 20).fillna(0)
@@ -105,21 +179,93 @@ def calculate_scaled_forecast(df: pd.DataFrame) -> pd.DataFrame:
     
     return data
 
-def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=0.1) -> pd.DataFrame:
+def _normalize_param_set(param_set, config=None) -> list:
+    """
+    把一组参数展开成 [(fast, slow, scalar * weight), ...]
+    支持两种写法:
+      - dict: 与 Config.STRATEGY_PARAMS 同结构 (可选 'weights')
+      - tuple: 单条规则 (fast, slow, scalar)，权重为 1.0
+    """
+    if isinstance(param_set, dict):
+        fast_spans = param_set['fast_span']
+        slow_spans = param_set['slow_span']
+        scalars = param_set['scalars']
+        weights = param_set.get('weights', getattr(resolve_config(config), 'TREND_INTERNAL_WEIGHTS', None))
+        if weights is None or len(weights) != len(fast_spans):
+            weights = [1.0 / len(fast_spans)] * len(fast_spans)
+    else:
+        fast, slow, scalar = param_set
+        fast_spans, slow_spans, scalars, weights = [fast], [slow], [scalar], [1.0]
+    return [(int(f), int(s), sc * w) for f, s, sc, w in zip(fast_spans, slow_spans, scalars, weights)]
+
+def calculate_forecast_matrix(df: pd.DataFrame, param_sets, config=None) -> pd.DataFrame:
+    """
+    [Batch] 一次性计算多组趋势参数的最终 forecast
+    --------------------------------------------
+    返回 (bars x configs) 的 DataFrame，第 k 列 = 用 param_sets[k] 跑 calculate_scaled_forecast
+    得到的 'forecast' (浮点误差以内)。
+    - 每个不同的 EWMA span 只算一次
+    - 每个不同的 (fast, slow) 规则只归一化一次
+    - 波动率与 RSI 分量所有配置共享
+    最后用一次矩阵乘法把规则组合成各配置的趋势信号。
+    Config.COMPUTE_DTYPE='float32' 时整个矩阵以 float32 存储与相乘 (内存减半)。
+    """
+    cfg = resolve_config(config)
+    close = df['close']
+    dtype = compute_dtype(cfg)
+    volatility = _forecast_volatility(close, cfg).to_numpy()
+
+    rules = [_normalize_param_set(ps, cfg) for ps in param_sets]
+    pairs = sorted({(f, s) for rule in rules for f, s, _ in rule})
+    spans = sorted({span for pair in pairs for span in pair})
+
+    # 1. 每个 span 的 EWMA 只算一次
+    ewma = {span: close.ewm(span=span).mean().to_numpy() for span in spans}
+
+    # 2. 每个 (fast, slow) 规则的归一化原始信号 -> 矩阵列
+    # NaN 置 0，对应单配置版本 sum(axis=1) 跳过 NaN 的行为
+    pair_col = {pair: j for j, pair in enumerate(pairs)}
+    pair_matrix = np.empty((len(close), len(pairs)), dtype=dtype)
+    for (fast, slow), j in pair_col.items():
+        pair_matrix[:, j] = (ewma[fast] - ewma[slow]) / volatility
+    np.nan_to_num(pair_matrix, copy=False, nan=0.0)
+
+    # 3. 系数矩阵 (规则 x 配置): scalar * weight
+    coef = np.zeros((len(pairs), len(rules)), dtype=dtype)
+    for k, rule in enumerate(rules):
+        for fast, slow, c in rule:
+            coef[pair_col[(fast, slow)], k] += c
+
+    trend = np.clip(pair_matrix @ coef, -20, 20)
+
+    # 4. RSI 分量与配置无关，只算一次
+    rsi = _rsi_forecast(close, cfg).clip(-20, 20).fillna(0).to_numpy().astype(dtype, copy=False)
+    w_trend = getattr(cfg, 'TREND_WEIGHT', 0.9)
+    w_rsi = getattr(cfg, 'RSI_WEIGHT', 0.1)
+
+    forecast = trend * w_trend + (rsi * w_rsi)[:, None]
+    return pd.DataFrame(forecast, index=df.index)
+
+def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=0.1, config=None) -> pd.DataFrame:
     """
     [Risk Engine V4.0] 环境感知型风控 (保持不变)
     Regime Filter + Vol Scaling + Survival Stop
+    buffer: 缓冲带宽度 (默认 0.1，不跟随 Config.POSITION_BUFFER；None 时取配置里的 POSITION_BUFFER)；
+    config: 显式配置，None 时读全局 Config
     """
+    cfg = resolve_config(config)
+    if buffer is None:
+        buffer = getattr(cfg, 'POSITION_BUFFER', 0.1)
     data = df.copy()
     
     # --- 1. 环境过滤器 (Regime Filter) ---
-    ma_window = getattr(Config, 'REGIME_MA_WINDOW', 4800)
+    ma_window = getattr(cfg, 'REGIME_MA_WINDOW', 4800)
     regime_ma = data['close'].rolling(window=ma_window).mean()
     is_bull_regime = data['close'] > regime_ma
     
     # 动态杠杆上限
-    normal_cap = getattr(Config, 'MAX_LEVERAGE', 2.5)      
-    bear_cap = getattr(Config, 'BEAR_MODE_MAX_LEVERAGE', 1.0) 
+    normal_cap = getattr(cfg, 'MAX_LEVERAGE', 2.5)
+    bear_cap = getattr(cfg, 'BEAR_MODE_MAX_LEVERAGE', 1.0)
     
     dynamic_max_cap = np.where(is_bull_regime, normal_cap, bear_cap)
     data['regime_ma'] = regime_ma 
@@ -127,12 +273,12 @@ def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=
     
     # --- 2. 波动率目标管理 (Vol Scaling) ---
     hourly_ret = data['close'].pct_change().fillna(0)
-    long_term_vol = hourly_ret.ewm(span=Config.VOL_LOOKBACK).std().fillna(0)
+    long_term_vol = hourly_ret.ewm(span=cfg.VOL_LOOKBACK).std().fillna(0)
     ann_vol_pct = long_term_vol * np.sqrt(365 * 24)
     data['ann_vol_pct'] = ann_vol_pct
     
     safe_vol = ann_vol_pct.replace(0, 1e-6)
-    target_vol = getattr(Config, 'TARGET_VOLATILITY', 0.8)
+    target_vol = getattr(cfg, 'TARGET_VOLATILITY', 0.8)
     raw_leverage_ratio = (target_vol / safe_vol)
     
     # --- 3. 仓位计算 ---
@@ -148,11 +294,11 @@ def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=
     pc = c.shift(1).fillna(c)
     tr = np.maximum(h - l, np.maximum((h - pc).abs(), (l - pc).abs()))
     
-    atr_window = getattr(Config, 'SURVIVAL_ATR_WINDOW', 24)
+    atr_window = getattr(cfg, 'SURVIVAL_ATR_WINDOW', 24)
     atr = tr.ewm(span=atr_window).mean().fillna(0)
     
-    multiplier = getattr(Config, 'SURVIVAL_ATR_MULTIPLIER', 4.5)
-    min_vol = getattr(Config, 'MIN_HOURLY_VOL', 0.005) 
+    multiplier = getattr(cfg, 'SURVIVAL_ATR_MULTIPLIER', 4.5)
+    min_vol = getattr(cfg, 'MIN_HOURLY_VOL', 0.005)
     
     raw_threshold = (atr * multiplier) / c
     crash_threshold = np.maximum(raw_threshold, min_vol * multiplier)
@@ -167,14 +313,8 @@ def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=
     data['is_meltdown'] = is_crash
     
     # --- 5. 缓冲器 (Buffer) ---
-    ideal_values = ideal_position
-    n = len(ideal_values)
-    buffered_position = np.zeros(n)
-    current_pos = 0.0
-    for i in range(n):
-        if abs(ideal_values[i] - current_pos) > buffer:
-            current_pos = ideal_values[i]
-        buffered_position[i] = current_pos
+    # 有记忆的滞回循环，交给 kernels (numba 加速 / 纯 Python 回退)
+    buffered_position = buffer_hysteresis(ideal_position, buffer)
         
     data['raw_target'] = ideal_position
     data['buffered_pos'] = buffered_position
@@ -182,7 +322,14 @@ def calculate_position_target(df: pd.DataFrame, forecast_col='forecast', buffer=
     
     return data
 
-def run_vectorized_backtest(df: pd.DataFrame, fee_rate=0.0005, funding_rate=0.00001):
+def run_vectorized_backtest(df: pd.DataFrame, fee_rate=0.0005, funding_rate=0.00001, config=None):
+    """
+    向量化回测。fee_rate: 默认 0.0005 (不跟随 Config.FEE_RATE)，None 时取配置里的 FEE_RATE；
+    config: 显式配置，None 时读全局 Config
+    """
+    cfg = resolve_config(config)
+    if fee_rate is None:
+        fee_rate = getattr(cfg, 'FEE_RATE', 0.0005)
     data = df.copy()
     
     # [V4.8] 放弃 Log Returns，改用 Simple Returns
@@ -215,7 +362,7 @@ def run_vectorized_backtest(df: pd.DataFrame, fee_rate=0.0005, funding_rate=0.00
     
     # [V4.8 核心修改] 模拟真实资金曲线 (逐行相乘，而非对数累加)
     # 这样能更准确地反映大杠杆下的损耗
-    initial_cap = Config.INITIAL_CAPITAL
+    initial_cap = cfg.INITIAL_CAPITAL
     data['equity'] = initial_cap * (1 + data['net_ret']).cumprod()
     data['buy_hold_equity'] = initial_cap * (1 + data['market_ret']).cumprod()
     
@@ -0,0 +1,297 @@
+import os
+import re
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from config import Config
+from jarvis_engine.alpha import _parse_price_csv
+from jarvis_engine.data_cache import _source_fingerprint
+
+# ==========================================
+# 🗂️ 本地 K 线库 (Bar Store)
+# ==========================================
+# 每个品种一个 CSV、每个任务重新 read_csv 一遍；走步回测只用一年、熔断快照只看前后两天，
+# 却要把整段历史解析进内存。这里按 品种 / 周期 存成定长列式文件:
+#   BAR_STORE_DIR (默认 CACHE_DIR/bars)/<SYMBOL>/<interval>/
+#       meta.json     行数 / 列名 / dtype / 时区
+#       time.bin      int64 纪元纳秒 (升序、无重复)
+#       open.bin ...  每列一个 float64 定长文件 (无文件头)
+# 读取用 np.memmap 映射，时间区间由 np.searchsorted 在 time 上二分定位，
+# 返回的是映射上的切片 (零拷贝视图)，只有真正访问到的分页才会从磁盘读入。
+# 写入: write() 整体替换 (先写临时目录再 rename)；append() 只在文件尾追加更新的 K 线，
+# meta.json 的行数最后才更新，中途失败时多出的字节会在下次追加前截掉。
+# 映射为写时复制 (mmap_mode 'c')，调用方原地修改数组不会改动库文件。
+
+BAR_STORE_VERSION = 1
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+
+_META_FILE = "meta.json"
+_TIME_FILE = "time.bin"
+_TIME_DTYPE = np.dtype("<i8")
+_VALUE_DTYPE = np.dtype("<f8")
+_CSV_NAME = re.compile(r"^[A-Za-z]+_(?P<symbol>[A-Za-z0-9]+)_(?P<interval>\w+)\.csv$")
+
+
+def _store_root(config=None) -> str:
+    cfg = Config if config is None else config
+    root = getattr(cfg, 'BAR_STORE_DIR', None)
+    if root:
+        return root
+    return os.path.join(getattr(cfg, 'CACHE_DIR', os.path.join(cfg.BASE_DIR, "data_cache")), "bars")
+
+
+def _to_epoch_ns(t, tz=None):
+    """str / datetime / Timestamp / datetime64 -> int64 纪元纳秒 (与库内时间同一时区口径)；None 原样返回"""
+    if t is None:
+        return None
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    elif tz:
+        ts = ts.tz_localize(tz).tz_convert("UTC").tz_localize(None)
+    return ts.value
+
+
+def parse_csv_name(csv_path: str) -> tuple:
+    """Binance_BTCUSDT_1h.csv -> ('BTCUSDT', '1h')，不符合命名规则时返回 (None, None)"""
+    match = _CSV_NAME.match(os.path.basename(csv_path))
+    if match is None:
+        return None, None
+    return match.group("symbol").upper(), match.group("interval")
+
+
+def _map(path: str, dtype, rows: int):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="c", shape=(rows,))
+
+
+class BarStore:
+    """
+    多品种 K 线库。
+    store = BarStore()
+    store.import_csv("Binance_BTCUSDT_1h.csv")                 # 文件名里解析出 BTCUSDT / 1h
+    bars = store.read("BTCUSDT", "1h", "2021-01-01", "2021-12-31")   # {列名: 零拷贝视图}
+    df = store.frame("BTCUSDT", "1h", "2021-05-17", "2021-05-21")    # 同样零拷贝的 DataFrame
+    时间区间两端都包含 (与 df.loc[start:end] 一致，end 为日期字符串时包含当天)，None 表示不限。
+    root 默认取 BAR_STORE_DIR (未设置时为 CACHE_DIR/bars)；config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+
+    def __init__(self, root: str = None, config=None):
+        self.root = root or _store_root(config)
+
+    # ---------- 元信息 ----------
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _meta(self, symbol: str, interval: str) -> dict:
+        path = os.path.join(self._dir(symbol, interval), _META_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(f"K 线库中没有 {symbol.upper()} / {interval} ({self.root})") from None
+        if meta.get("version") != BAR_STORE_VERSION:
+            raise KeyError(f"{symbol.upper()} / {interval} 的存储版本不匹配，请重新导入")
+        return meta
+
+    def _write_meta(self, directory: str, meta: dict):
+        tmp = os.path.join(directory, f"{_META_FILE}.tmp{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, _META_FILE))
+
+    def has(self, symbol: str, interval: str) -> bool:
+        return os.path.isfile(os.path.join(self._dir(symbol, interval), _META_FILE))
+
+    def symbols(self) -> list:
+        try:
+            return sorted(n for n in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, n)))
+        except OSError:
+            return []
+
+    def intervals(self, symbol: str) -> list:
+        directory = os.path.join(self.root, symbol.upper())
+        try:
+            return sorted(n for n in os.listdir(directory) if self.has(symbol, n))
+        except OSError:
+            return []
+
+    def info(self, symbol: str, interval: str) -> dict:
+        """行数 / 列名 / 首末时间"""
+        meta = self._meta(symbol, interval)
+        index = self.index(symbol, interval)
+        first = pd.Timestamp(index[0]) if len(index) else None
+        last = pd.Timestamp(index[-1]) if len(index) else None
+        return {"rows": meta["rows"], "columns": meta["columns"], "tz": meta["tz"], "first": first, "last": last}
+
+    # ---------- 写入 ----------
+    @staticmethod
+    def _prepare(df: pd.DataFrame, columns):
+        """清洗后的行情 -> (int64 纪元纳秒, {列名: float64 数组}, 时区)；升序、同一时间戳保留最后一根"""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("行情 DataFrame 的索引必须是 DatetimeIndex")
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind="stable")
+        if df.index.has_duplicates:
+            df = df[~df.index.duplicated(keep="last")]
+        index = df.index
+        tz = str(index.tz) if index.tz is not None else None
+        if tz:
+            index = index.tz_convert("UTC").tz_localize(None)
+        times = np.ascontiguousarray(index.asi8, dtype=_TIME_DTYPE)
+
+        source = {c: c for c in df.columns}
+        if "volume" not in source:
+            # CryptoDataDownload: "Volume BTC" / "Volume USDT" -> 取第一列 (基础币成交量)；老数据为 "vol"
+            alias = [c for c in df.columns if str(c).startswith("volume ")] + [c for c in df.columns if c == "vol"]
+            if alias:
+                source["volume"] = alias[0]
+        if columns is None:
+            columns = [c for c in BAR_COLUMNS if c in source]
+        values = {c: np.ascontiguousarray(df[source[c]].to_numpy(dtype=np.float64), dtype=_VALUE_DTYPE)
+                  for c in columns}
+        return times, values, tz
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame, columns=None, extra: dict = None) -> int:
+        """
+        用 df 整体替换 symbol / interval 的数据 (columns 默认取 BAR_COLUMNS 中存在的列)，返回行数。
+        extra 中的字段一并写入 meta.json。
+        """
+        times, values, tz = self._prepare(df, columns)
+        directory = self._dir(symbol, interval)
+        tmp = f"{directory}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            times.tofile(os.path.join(tmp, _TIME_FILE))
+            for name, arr in values.items():
+                arr.tofile(os.path.join(tmp, f"{name}.bin"))
+            meta = {"version": BAR_STORE_VERSION, "symbol": symbol.upper(), "interval": interval,
+                    "rows": len(times), "columns": list(values), "tz": tz}
+            meta.update(extra or {})
+            self._write_meta(tmp, meta)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.replace(tmp, directory)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return len(times)
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """只追加比库内最后一根更新的 K 线 (库不存在时等同 write)，返回追加的行数"""
+        if not self.has(symbol, interval):
+            return self.write(symbol, interval, df)
+        meta = self._meta(symbol, interval)
+        directory = self._dir(symbol, interval)
+        times, values, tz = self._prepare(df, meta["columns"])
+        if tz != meta["tz"]:
+            raise ValueError(f"时区不一致: 库内 {meta['tz']}，追加数据 {tz}")
+
+        rows = meta["rows"]
+        index = self.index(symbol, interval)
+        start = int(np.searchsorted(times, index[-1], side="right")) if rows else 0
+        del index
+        if start >= len(times):
+            return 0
+        files = [(_TIME_FILE, times, _TIME_DTYPE)] + [(f"{c}.bin", values[c], _VALUE_DTYPE) for c in meta["columns"]]
+        for name, arr, dtype in files:
+            with open(os.path.join(directory, name), "r+b") as f:
+                f.truncate(rows * dtype.itemsize)  # 丢掉上次中断留下的尾部
+                f.seek(0, os.SEEK_END)
+                arr[start:].tofile(f)
+        meta["rows"] = rows + len(times) - start
+        self._write_meta(directory, meta)
+        return len(times) - start
+
+    def import_csv(self, csv_path: str, symbol: str = None, interval: str = None, force: bool = False) -> int:
+        """
+        解析 CSV (与 load_price_data 同一套清洗) 并整体写入，返回行数。
+        symbol / interval 缺省时从 Binance_<SYMBOL>_<interval>.csv 这样的文件名里解析；
+        库内记录的源文件指纹 (路径 + 大小 + mtime) 没变时直接跳过 (force=True 强制重建)。
+        """
+        if symbol is None or interval is None:
+            parsed = parse_csv_name(csv_path)
+            if parsed[0] is None:
+                raise ValueError(f"无法从文件名解析品种 / 周期，请显式传入 symbol 与 interval: {csv_path}")
+            symbol, interval = symbol or parsed[0], interval or parsed[1]
+        fingerprint = _source_fingerprint(csv_path)
+        if not force and self.has(symbol, interval):
+            meta = self._meta(symbol, interval)
+            if meta.get("source_fingerprint") == fingerprint:
+                return meta["rows"]
+        df = _parse_price_csv(csv_path)
+        if df.empty:
+            raise ValueError(f"CSV 解析失败或没有数据: {csv_path}")
+        return self.write(symbol, interval, df,
+                          extra={"source": os.path.abspath(csv_path), "source_fingerprint": fingerprint})
+
+    def delete(self, symbol: str, interval: str = None):
+        """删除某个品种的一个周期 (interval=None 时删除该品种全部周期)"""
+        path = self._dir(symbol, interval) if interval else os.path.join(self.root, symbol.upper())
+        shutil.rmtree(path, ignore_errors=True)
+
+    # ---------- 读取 ----------
+    def index(self, symbol: str, interval: str) -> np.ndarray:
+        """整条时间轴 (int64 纪元纳秒，内存映射)"""
+        meta = self._meta(symbol, interval)
+        return _map(os.path.join(self._dir(symbol, interval), _TIME_FILE), _TIME_DTYPE, meta["rows"])
+
+    @staticmethod
+    def _bounds(index: np.ndarray, meta: dict, start, end) -> tuple:
+        if isinstance(end, str):
+            # 与 df.loc 的部分字符串索引一致: '2021-12-31' 包含当天全部 K 线
+            try:
+                end = pd.Period(end).end_time
+            except ValueError:
+                pass
+        start_ns, end_ns = _to_epoch_ns(start, meta["tz"]), _to_epoch_ns(end, meta["tz"])
+        i0 = 0 if start_ns is None else int(np.searchsorted(index, start_ns, side="left"))
+        i1 = len(index) if end_ns is None else int(np.searchsorted(index, end_ns, side="right"))
+        return i0, max(i0, i1)
+
+    def locate(self, symbol: str, interval: str, start=None, end=None) -> tuple:
+        """时间区间 [start, end] -> 位置区间 [i0, i1)，二分查找，不读取区间外的数据"""
+        meta = self._meta(symbol, interval)
+        index = _map(os.path.join(self._dir(symbol, interval), _TIME_FILE), _TIME_DTYPE, meta["rows"])
+        return self._bounds(index, meta, start, end)
+
+    def _read(self, symbol: str, interval: str, start, end, columns):
+        meta = self._meta(symbol, interval)
+        directory = self._dir(symbol, interval)
+        rows = meta["rows"]
+        index = _map(os.path.join(directory, _TIME_FILE), _TIME_DTYPE, rows)
+        i0, i1 = self._bounds(index, meta, start, end)
+        out = {"time": index[i0:i1]}
+        for name in (meta["columns"] if columns is None else columns):
+            if name not in meta["columns"]:
+                raise KeyError(f"{symbol.upper()} / {interval} 没有列 {name!r}，可选: {meta['columns']}")
+            out[name] = _map(os.path.join(directory, f"{name}.bin"), _VALUE_DTYPE, rows)[i0:i1]
+        return meta, out
+
+    def read(self, symbol: str, interval: str, start=None, end=None, columns=None) -> dict:
+        """
+        {"time": int64 纪元纳秒, 列名: float64} 的零拷贝视图 (内存映射上的切片)。
+        columns 默认读取库内全部列。
+        """
+        return self._read(symbol, interval, start, end, columns)[1]
+
+    def frame(self, symbol: str, interval: str, start=None, end=None, columns=None) -> pd.DataFrame:
+        """与 load_price_data 同构的 DataFrame (索引为 time)，列直接引用映射视图，不复制"""
+        meta, bars = self._read(symbol, interval, start, end, columns)
+        index = pd.DatetimeIndex(bars.pop("time").view("datetime64[ns]"), name="time")
+        if meta["tz"]:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        return pd.DataFrame(bars, index=index, copy=False)
+
+    def frames(self, symbols, interval: str, start=None, end=None, columns=None) -> dict:
+        """多品种: {symbol: frame}，同一时间窗口 (库里没有的品种跳过并提示)"""
+        out = {}
+        for sym in symbols:
+            if not self.has(sym, interval):
+                print(f"⚠️ K 线库中没有 {sym.upper()} / {interval}，已跳过")
+                continue
+            out[sym] = self.frame(sym, interval, start, end, columns)
+        return out
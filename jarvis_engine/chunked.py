@@ -0,0 +1,321 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from jarvis_engine.alpha import resolve_config, _clean_price_frame
+from jarvis_engine.data_cache import read_cached_frame, load_frame, save_frame
+from jarvis_engine.kernels import performance_pass_2d, PERF_ACC_FIELDS
+from jarvis_engine.lean import LEAN_COLUMNS, DEFAULT_COLUMNS
+from jarvis_engine.metrics import performance_from_acc
+from jarvis_engine.streaming import StreamingForecast, StreamingRiskEngine
+
+# ==========================================
+# 🧱 分块流水线 (Chunked / Out-of-core Pipeline)
+# ==========================================
+# load_price_data 一次读入整个 CSV，精简流水线也要为每个字段生成全长数组，
+# 分钟线 / 多年历史下内存随历史长度线性增长。这里按时间顺序逐块处理:
+#   iter_price_chunks   行情来源 (CSV / DataFrame) -> 按时间升序的分块 DataFrame
+#   ChunkedPipeline     预测 / 风控状态由流式引擎 (streaming.py) 跨块携带，
+#                       回测按块向量化，收盘价 / 仓位 / 净值累乘因子在块边界接力
+#   ChunkedPerformance  绩效累加量 (Welford 均值方差 / 峰值回撤 / 杠杆) 逐块合并
+# 常驻内存只有一个分块 + 引擎状态 (REGIME_MA_WINDOW 根的环形缓冲)，与历史总长度无关。
+# 各列与 COMPUTE_DTYPE='float64' 下的 run_lean_pipeline 逐位一致；
+# Sharpe / Sortino 的方差由各块合并 (Chan 合并公式)，与整段单遍统计只差末位舍入。
+# 逐笔交易统计需要完整仓位路径，不在分块指标内 (需要时用 sink 落盘后再跑 trade_analytics)。
+
+# 流水线只读这几列 (命中列式缓存时其余列不映射)
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _first_line(csv_path: str) -> str:
+    with open(csv_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.readline()
+
+
+def _read_csv_chunks(csv_path: str, chunk_size: int):
+    """pd.read_csv 分块读取 + 与 load_price_data 相同的清洗 (块内按时间排序)"""
+    first = _first_line(csv_path)
+    skip = 1 if ("http" in first.split(",")[0] or "www" in first.split(",")[0]) else 0
+    for raw in pd.read_csv(csv_path, skiprows=skip, chunksize=chunk_size, low_memory=False):
+        df = _clean_price_frame(raw)
+        if df.empty:
+            raise ValueError(f"无法识别时间列 (timestamp / unix / date): {csv_path}")
+        yield df
+
+
+def _spool_reversed(chunks, first_chunks, spool_root: str):
+    """
+    倒序 (新 -> 旧) 的 CSV: 逐块写成列式临时文件 (只保留数值列)，再从最后一块开始内存映射读回，
+    整个过程同样只在内存里持有一个分块。
+    """
+    os.makedirs(spool_root, exist_ok=True)
+    spool = tempfile.mkdtemp(prefix="chunks-", dir=spool_root)
+    try:
+        n = 0
+        prev = None
+        for df in _chain(first_chunks, chunks):
+            if prev is not None and df.index[-1] > prev.index[0]:
+                raise ValueError("CSV 时间顺序混乱 (既非整体升序也非整体降序)，请先用 load_price_data 建立列式缓存")
+            numeric = df.select_dtypes(include="number")
+            if not save_frame(os.path.join(spool, f"{n:06d}"), numeric):
+                raise OSError(f"分块临时文件写入失败: {spool}")
+            prev = df.iloc[:1]
+            n += 1
+        for i in range(n - 1, -1, -1):
+            loaded = load_frame(os.path.join(spool, f"{i:06d}"))
+            if loaded is None:
+                raise OSError(f"分块临时文件读取失败: {spool}")
+            yield loaded[0]
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
+
+
+def _chain(head, tail):
+    yield from head
+    yield from tail
+
+
+def iter_price_chunks(source=None, chunk_size: int = None, use_cache=None, columns=PRICE_COLUMNS, config=None):
+    """
+    按时间升序逐块产出行情 DataFrame (索引为 time，含 open / high / low / close)。
+    source: CSV 路径 (默认 Config.DATA_PATH) 或已加载的 DataFrame
+      - DataFrame / 列式缓存命中: 直接切片 (缓存为内存映射，只有被访问的分页进内存)
+      - 否则 pd.read_csv 分块解析；CryptoDataDownload 这类倒序文件经临时列式文件翻转
+    chunk_size: 每块行数，默认 Config.CHUNK_SIZE
+    columns: 命中列式缓存时只映射这些列 (None 为全部)
+    config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+    cfg = resolve_config(config)
+    if chunk_size is None:
+        chunk_size = getattr(cfg, 'CHUNK_SIZE', 100_000)
+    chunk_size = max(int(chunk_size), 1)
+    if source is None:
+        source = cfg.DATA_PATH
+    if use_cache is None:
+        use_cache = getattr(cfg, 'USE_DATA_CACHE', True)
+    cache_root = getattr(cfg, 'CACHE_DIR', os.path.join(cfg.BASE_DIR, "data_cache"))
+
+    if isinstance(source, pd.DataFrame):
+        frame = source
+    else:
+        frame = read_cached_frame(source, cache_root, columns) if use_cache else None
+    if frame is not None:
+        if not frame.index.is_monotonic_increasing:
+            raise ValueError("行情索引不是按时间升序排列")
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+        return
+
+    chunks = _read_csv_chunks(source, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None:
+        yield first
+        return
+    if second.index[0] < first.index[-1]:
+        yield from _spool_reversed(chunks, [first, second], cache_root)
+        return
+
+    prev = first
+    for df in _chain([second], chunks):
+        if df.index[0] < prev.index[-1]:
+            raise ValueError("CSV 时间顺序混乱 (既非整体升序也非整体降序)，请先用 load_price_data 建立列式缓存")
+        yield prev
+        prev = df
+    yield prev
+
+
+class ChunkedPerformance:
+    """
+    performance_summary 的分块版本: 每块用同一个单遍内核统计 (策略净值 + 买入持有基准两列)，
+    再把累加量合并到全局状态；回撤用跨块携带的历史峰值重算。
+    """
+
+    def __init__(self, periods_per_year: int = 24 * 365):
+        self.periods_per_year = periods_per_year
+        self.acc = None
+        self.peak = np.full(2, -np.inf)
+        self.n_bars = 0
+        self.first = None
+        self.last = None
+
+    def update(self, equity, returns, position, benchmark, benchmark_returns):
+        eq = np.column_stack([equity, benchmark])
+        if not len(eq):
+            return
+        pos = np.column_stack([position, np.ones(len(eq))])
+        acc = performance_pass_2d(eq, np.column_stack([returns, benchmark_returns]), pos)
+
+        # 峰值接力: 块内回撤以 "历史峰值" 为基准
+        with np.errstate(invalid="ignore", divide="ignore"):
+            peaks = np.fmax.accumulate(np.vstack([self.peak, eq]), axis=0)[1:]
+            acc[:, 5] = np.fmin(np.fmin.reduce(eq / peaks - 1.0, axis=0), 0.0)
+        self.peak = peaks[-1]
+
+        if self.acc is None:
+            self.acc, self.first = acc, eq[0]
+        else:
+            self.acc = self._merge(self.acc, acc)
+        self.last = eq[-1]
+        self.n_bars += len(eq)
+
+    @staticmethod
+    def _merge(a, b):
+        out = a.copy()
+        na, nb = a[:, 0], b[:, 0]
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = b[:, 1] - a[:, 1]
+            out[:, 0] = n
+            out[:, 1] = np.where(n > 0, a[:, 1] + delta * nb / n, 0.0)
+            out[:, 2] = a[:, 2] + b[:, 2] + np.where(n > 0, delta * delta * na * nb / n, 0.0)
+        for k in (3, 4, 6, 7):
+            out[:, k] = a[:, k] + b[:, k]
+        out[:, 5] = np.minimum(a[:, 5], b[:, 5])
+        out[:, 8] = np.fmax(a[:, 8], b[:, 8])
+        return out
+
+    def summary(self) -> dict:
+        """与 performance_summary(equity, ..., benchmark=buy_hold_equity, ...) 同样的字段"""
+        if self.acc is None:
+            acc = np.zeros((2, len(PERF_ACC_FIELDS)))
+            first = last = np.full(2, np.nan)
+        else:
+            acc, first, last = self.acc, self.first, self.last
+        rows = performance_from_acc(acc, self.n_bars, first, last, True,
+                                    self.periods_per_year).to_dict(orient="records")
+        out, bh = rows[0], rows[1]
+        for key in ("final_equity", "total_return", "ann_return", "ann_volatility", "sharpe", "sortino",
+                    "max_drawdown", "calmar"):
+            out[f"bh_{key}"] = bh[key]
+        return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in out.items()}
+
+
+class ChunkedPipeline:
+    """
+    run_lean_pipeline 的分块版本: 依次调用 process(chunk)，每次返回该块的结果表 (columns 指定的字段)。
+    跨块携带的状态:
+      - StreamingForecast / StreamingRiskEngine (EWMA、滚动均值、ATR、缓冲器)
+      - 上一根收盘价 (灾难止损的成交价基准)、上一根实际仓位 (换手手续费)
+      - 策略 / 买入持有净值的累乘因子
+    """
+
+    def __init__(self, columns=DEFAULT_COLUMNS, buffer=None, fee_rate=None, funding_rate=0.00001, config=None):
+        cfg = resolve_config(config)
+        if columns == "all":
+            columns = LEAN_COLUMNS
+        unknown = set(columns) - set(LEAN_COLUMNS)
+        if unknown:
+            raise ValueError(f"未知字段: {sorted(unknown)}，可选: {LEAN_COLUMNS}")
+        self.columns = tuple(columns)
+        self.fee_rate = getattr(cfg, 'FEE_RATE', 0.0005) if fee_rate is None else fee_rate
+        self.funding_rate = funding_rate
+        self.initial_cap = cfg.INITIAL_CAPITAL
+
+        self.forecast = StreamingForecast(config=cfg)
+        self.risk = StreamingRiskEngine(buffer=buffer, config=cfg)
+        self.performance = ChunkedPerformance()
+        self.prev_close = np.nan    # 上一块最后一根的原始收盘价 (close.shift(1))
+        self.prev_position = None   # 上一块最后一根的实际仓位 (首块为 None: 与 np.diff(prepend=position[:1]) 一致)
+        self.equity_growth = 1.0    # 策略净值的累乘因子
+        self.market_growth = 1.0    # 买入持有净值的累乘因子
+
+    def _step_bars(self, close, high, low) -> dict:
+        """逐根推进两个流式引擎，收集本块的信号与风控字段"""
+        n = len(close)
+        (volatility, trend, rsi, forecast, regime_ma, cap, ann_vol, leverage, sl, raw_target, buffered, position,
+         market_ret) = out = [np.empty(n) for _ in range(13)]
+        crash = np.empty(n, dtype=bool)
+        fc, rk = self.forecast, self.risk
+        update, step = fc.update, rk.step
+        for i, (h, l, c) in enumerate(zip(high.tolist(), low.tolist(), close.tolist())):
+            f = update(c)
+            buffered[i] = step(h, l, c, f)
+            volatility[i] = fc.volatility
+            trend[i] = fc.trend_forecast
+            rsi[i] = fc.rsi_forecast
+            forecast[i] = f
+            regime_ma[i] = rk.regime_ma_value
+            cap[i] = rk.dynamic_max_cap
+            ann_vol[i] = rk.ann_vol_pct
+            leverage[i] = rk.leverage_ratio
+            sl[i] = rk.sl_threshold
+            raw_target[i] = rk.raw_target
+            position[i] = rk.position
+            market_ret[i] = rk.hourly_ret
+            crash[i] = rk.is_crash
+        names = ("volatility", "trend_forecast", "rsi_forecast", "forecast", "regime_ma", "dynamic_max_cap",
+                 "ann_vol_pct", "leverage_ratio", "sl_threshold", "raw_target", "buffered_pos", "position",
+                 "market_ret")
+        cols = dict(zip(names, out))
+        cols["sigma_event"] = crash
+        cols["is_meltdown"] = crash
+        return cols
+
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        c = chunk["close"].to_numpy(dtype=np.float64)
+        result = self._step_bars(c, chunk["high"].to_numpy(dtype=np.float64),
+                                 chunk["low"].to_numpy(dtype=np.float64))
+        result["close"] = chunk["close"].to_numpy()
+        if not len(c):
+            return pd.DataFrame({name: result[name] for name in self.columns}, index=chunk.index, copy=False)
+        market_ret = result["market_ret"]
+        position = result["position"]
+        risk_mask = result["sigma_event"]
+
+        # 灾难止损修正 (与 backtest_stage 相同，prev_close 跨块接力)
+        adjusted_ret = market_ret
+        if risk_mask.any():
+            idx = np.flatnonzero(risk_mask)
+            prev_close = np.concatenate(([self.prev_close], c[:-1]))[idx]
+            execution_price = np.minimum(chunk["open"].to_numpy(dtype=np.float64)[idx]
+                                         * (1.0 - result["sl_threshold"][idx]), c[idx]) * 0.995
+            adjusted_ret = market_ret.copy()
+            adjusted_ret[idx] = (execution_price / prev_close) - 1.0
+        self.prev_close = c[-1]
+
+        strat_ret_raw = position * adjusted_ret
+        prepend = position[:1] if self.prev_position is None else [self.prev_position]
+        pos_change = np.abs(np.diff(position, prepend=prepend))
+        self.prev_position = position[-1]
+        net_ret = strat_ret_raw - pos_change * self.fee_rate
+        net_ret -= np.abs(position) * self.funding_rate
+
+        # 累乘接力: 把上一块末尾的累积因子乘进本块第一项，cumprod 的每一步与整段计算完全相同
+        growth = np.add(1.0, net_ret)
+        growth[0] *= self.equity_growth
+        growth = np.cumprod(growth, out=growth)
+        self.equity_growth = growth[-1]
+        market_growth = np.add(1.0, market_ret)
+        market_growth[0] *= self.market_growth
+        market_growth = np.cumprod(market_growth, out=market_growth)
+        self.market_growth = market_growth[-1]
+
+        result.update(
+            strat_ret_raw=strat_ret_raw, net_ret=net_ret,
+            equity=self.initial_cap * growth, buy_hold_equity=self.initial_cap * market_growth,
+            net_log_ret=np.log(1 + net_ret), market_log_ret=np.log(1 + market_ret),
+        )
+        self.performance.update(result["equity"], result["net_log_ret"], position,
+                                result["buy_hold_equity"], result["market_log_ret"])
+        return pd.DataFrame({name: result[name] for name in self.columns}, index=chunk.index, copy=False)
+
+    def metrics(self) -> dict:
+        return self.performance.summary()
+
+
+def run_chunked_pipeline(source=None, chunk_size: int = None, columns=DEFAULT_COLUMNS, sink=None, buffer=None,
+                         fee_rate=None, funding_rate=0.00001, config=None) -> dict:
+    """
+    分块跑完整段历史，返回全历史指标 (performance_summary 的字段)。
+    sink: 可选回调 sink(df_chunk)，用于把每块结果落盘 / 下采样；不给时结果表用完即丢。
+    """
+    pipeline = ChunkedPipeline(columns, buffer, fee_rate, funding_rate, config)
+    for chunk in iter_price_chunks(source, chunk_size, config=config):
+        out = pipeline.process(chunk)
+        if sink is not None:
+            sink(out)
+    return pipeline.metrics()
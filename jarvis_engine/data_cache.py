@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🗄️ 二进制列式缓存 (Columnar Cache)
+# ==========================================
+# 目录结构:
+#   CACHE_DIR/<csv文件名>-<路径哈希>/<源文件指纹>/
+#       meta.json      列名 / dtype / 时区
+#       index.npy      时间索引 (datetime64)
+#       c0.npy ...     每列一个 .npy，读取时 mmap_mode='c' (写时复制，不会改动缓存文件)
+# 源文件指纹 = 绝对路径 + 文件大小 + mtime，CSV 一旦变化就自动失效。
+
+CACHE_VERSION = 1
+_META_FILE = "meta.json"
+_INDEX_FILE = "index.npy"
+# 写入中的临时目录 (<entry>.tmp<pid>) 超过这个时间仍未完成，视为写入进程已崩溃
+STALE_TMP_SECONDS = 3600
+
+
+def _source_fingerprint(csv_path: str) -> str:
+    st = os.stat(csv_path)
+    raw = f"{os.path.abspath(csv_path)}|{st.st_size}|{st.st_mtime_ns}|v{CACHE_VERSION}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _source_dir(csv_path: str, cache_root: str) -> str:
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_root, f"{stem}-{path_hash}")
+
+
+def load_frame(entry: str, columns=None):
+    """
+    读取一个缓存目录 (meta.json + index.npy + c*.npy)，返回 (DataFrame, meta)；不存在 / 损坏时返回 None。
+    columns: 只读取这些列 (不存在的列忽略)，None 时读取全部
+    """
+    try:
+        with open(os.path.join(entry, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        index_values = np.load(os.path.join(entry, _INDEX_FILE), mmap_mode="c")
+        index = pd.DatetimeIndex(index_values, name=meta["index_name"])
+        if meta["index_tz"]:
+            index = index.tz_localize("UTC").tz_convert(meta["index_tz"])
+
+        data = {}
+        for i, col in enumerate(meta["columns"]):
+            if columns is not None and col["name"] not in columns:
+                continue
+            values = np.load(os.path.join(entry, f"c{i}.npy"), mmap_mode="c")
+            if col["kind"] == "str":
+                # 字符串列以定长 unicode 存储，NaN 通过掩码还原
+                na_mask = np.load(os.path.join(entry, f"c{i}.na.npy"))
+                values = values.astype(object)
+                values[na_mask] = np.nan
+            data[i] = values
+    except (OSError, ValueError, KeyError):
+        return None
+
+    df = pd.DataFrame(data, index=index, copy=False)
+    df.columns = [meta["columns"][i]["name"] for i in data]
+    return df, meta
+
+
+def save_frame(entry: str, df: pd.DataFrame, extra: dict = None) -> bool:
+    """
+    把 DataFrame 写成一个缓存目录，extra 中的字段一并写入 meta.json。
+    先写临时目录再 rename，保证不会留下半成品；同名目录已存在时整体替换。
+    含有无法定长存储的列 (category / 带时区列等) 时放弃缓存，返回 False。
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return False
+
+    columns = []
+    payload = []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        dtype = series.dtype
+        if dtype == object:
+            na_mask = series.isna().to_numpy()
+            values = series.where(~na_mask, "").astype(str).to_numpy(dtype=str)
+            columns.append({"name": name, "kind": "str"})
+            payload.append((values, na_mask))
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufM":
+            columns.append({"name": name, "kind": "num"})
+            payload.append((series.to_numpy(), None))
+        else:
+            return False
+
+    index = df.index
+    index_tz = str(index.tz) if index.tz is not None else None
+    index_values = index.tz_convert("UTC").tz_localize(None).values if index_tz else index.values
+    tmp_entry = f"{entry}.tmp{os.getpid()}"
+
+    try:
+        os.makedirs(tmp_entry, exist_ok=True)
+        np.save(os.path.join(tmp_entry, _INDEX_FILE), index_values)
+        for i, (values, na_mask) in enumerate(payload):
+            np.save(os.path.join(tmp_entry, f"c{i}.npy"), values)
+            if na_mask is not None:
+                np.save(os.path.join(tmp_entry, f"c{i}.na.npy"), na_mask)
+        meta = {
+            "version": CACHE_VERSION,
+            "rows": len(df),
+            "index_name": index.name,
+            "index_tz": index_tz,
+            "columns": columns,
+        }
+        meta.update(extra or {})
+        with open(os.path.join(tmp_entry, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
+    except OSError as e:
+        print(f"⚠️ 缓存写入失败 (不影响本次加载): {e}")
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return False
+    return True
+
+
+def _pid_alive(pid: int) -> bool:
+    if sys.platform == "win32":
+        return True  # Windows 上 os.kill 会结束进程，不能拿来探测，只按时间判断
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # 进程存在但属于别的用户
+    return True
+
+
+def _prune_stale_tmp(directory: str, max_age: float = STALE_TMP_SECONDS):
+    """
+    清理崩溃进程留下的临时目录: 写入进程已不存在，或超过 max_age 秒没有完成 (兼顾共享目录上别的主机的进程)。
+    其它进程正在写的临时目录不动。
+    """
+    try:
+        names = [n for n in os.listdir(directory) if ".tmp" in n]
+    except OSError:
+        return
+    now = time.time()
+    for name in names:
+        path = os.path.join(directory, name)
+        pid = name.rsplit(".tmp", 1)[1]
+        try:
+            age = now - os.stat(path).st_mtime
+        except OSError:
+            continue
+        dead = pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid))
+        if dead or age > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def read_cached_frame(csv_path: str, cache_root: str, columns=None):
+    """
+    命中缓存则返回 DataFrame，否则返回 None (源文件不存在 / 已修改 / 缓存损坏)。
+    columns: 只读取这些列 (如分块流水线只要 OHLC，跳过需要还原成 object 的字符串列)
+    """
+    try:
+        entry = os.path.join(_source_dir(csv_path, cache_root), _source_fingerprint(csv_path))
+    except OSError:
+        return None
+    loaded = load_frame(entry, columns)
+    return None if loaded is None else loaded[0]
+
+
+def write_cached_frame(csv_path: str, df: pd.DataFrame, cache_root: str) -> bool:
+    """
+    把清洗后的 DataFrame 写入缓存，并清理同一 CSV 的旧版本缓存。
+    只删除已写完 (有 meta.json) 且指纹不同的条目；其它进程正在写的 *.tmp<pid> 目录不动，
+    崩溃进程留下的临时目录由 _prune_stale_tmp 回收。
+    """
+    source_dir = _source_dir(csv_path, cache_root)
+    fingerprint = _source_fingerprint(csv_path)
+    if not save_frame(os.path.join(source_dir, fingerprint), df, {"source": os.path.abspath(csv_path)}):
+        return False
+
+    for name in os.listdir(source_dir):
+        stale = os.path.join(source_dir, name)
+        if name == fingerprint or ".tmp" in name or not os.path.isfile(os.path.join(stale, _META_FILE)):
+            continue
+        shutil.rmtree(stale, ignore_errors=True)
+    _prune_stale_tmp(source_dir)
+    return True
+
+
+def clear_cache(cache_root: str):
+    """删除整个缓存目录"""
+    shutil.rmtree(cache_root, ignore_errors=True)
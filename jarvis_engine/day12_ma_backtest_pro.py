@@ -1,5 +1,17 @@
+import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt # 加上画图库
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+if __name__ == "__main__":
+    # 直接运行 python jarvis_engine/day12_ma_backtest_pro.py 时把仓库根目录加进搜索路径，
+    # 之后统一按包名导入 (与 python -m jarvis_engine.day12_ma_backtest_pro 相同)
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jarvis_engine.kernels import stoploss_backtest
+from jarvis_engine.metrics import performance_summary
+from jarvis_engine.bar_store import BarStore, parse_csv_name
 
 # ==== 0. 配置参数 ====
 PARAMS = {
@@ -80,7 +92,55 @@ def load_price_data(csv_path: str) -> pd.DataFrame:
     
     return df
 
+def _has_ohlc(csv_path: str) -> bool:
+    """只读表头 (跳过 CryptoDataDownload 的网址行)，检查 open / high / low / close 是否齐全"""
+    try:
+        header = pd.read_csv(csv_path, nrows=0)
+        if len(header.columns) and ("http" in str(header.columns[0]) or "www" in str(header.columns[0])):
+            header = pd.read_csv(csv_path, skiprows=1, nrows=0)
+    except Exception:
+        return False
+    return {"open", "high", "low", "close"} <= {c.strip().lower() for c in header.columns}
+
+
+def load_bars(csv_path: str, start=None, end=None) -> pd.DataFrame:
+    """
+    K 线库优先: 首次 (或 CSV 变化后) 导入一次，之后按时间窗口内存映射读取，不再逐个任务 read_csv。
+    文件名不符合 Binance_<SYMBOL>_<interval>.csv、文件缺列 / 读不了时退回 load_price_data
+    (缺 OHLC 列时与它一样抛 ValueError)。
+    与 load_price_data 的差别: K 线库要求时间戳唯一，重复的时间戳只保留最后一根 (load_price_data 全部保留)。
+    """
+    symbol, interval = parse_csv_name(csv_path)
+    if symbol is None or not _has_ohlc(csv_path):
+        return load_price_data(csv_path)
+    store = BarStore()
+    if os.path.exists(csv_path):
+        store.import_csv(csv_path, symbol, interval)  # 指纹没变时直接跳过
+    # 与 load_price_data 一致: 只要 2010 年以后的数据
+    first = pd.Timestamp("2010-01-01") + pd.Timedelta(1, "ns")
+    df = store.frame(symbol, interval, first if start is None else max(pd.Timestamp(start), first), end)
+    df["ret"] = df["close"].pct_change().fillna(0)
+    return df
+
 # ==== 2. 指标与信号模块 (向量化) ====
+def add_atr_columns(data:pd.DataFrame,atr_window:int=20)->pd.DataFrame:
+    """
+    原地加入 tr / atr / natr 三列 (data 需含 close/high/low)
+    """
+    prev_close=data["close"].shift(1)
+    tr1=data["high"]-data["low"]
+    tr2=(data["high"]-prev_close).abs()
+    tr3=(data["low"]-prev_close).abs()
+    # 向量化计算最大值
+    data["tr"]=pd.concat([tr1,tr2,tr3],axis=1).max(axis=1)
+
+    #计算ATR
+    data["atr"]=data["tr"].rolling(atr_window).mean()
+
+    #计算NATR(波动率百分比)->方便我们设定统一的阈值
+    data["natr"]=(data["atr"]/data["close"])*100
+    return data
+
 def calc_ma_signal(df: pd.DataFrame, short: int, long: int,atr_window:int=20,atr_threshold:float=0.5) -> pd.DataFrame:
     #df = df.copy()##可以选择传入拷贝值
     ##或者我们提取我们只需要的列数即可
@@ -102,18 +162,7 @@ def calc_ma_signal(df: pd.DataFrame, short: int, long: int,atr_window:int=20,atr
     #TR3=|L-Prevclose|
     #TR=max(TR1,TR2,TR3)
 
-    prev_close=data["close"].shift(1)
-    tr1=data["high"]-data["low"]
-    tr2=(data["high"]-prev_close).abs()
-    tr3=(data["low"]-prev_close).abs()
-    # 向量化计算最大值
-    data["tr"]=pd.concat([tr1,tr2,tr3],axis=1).max(axis=1)
-
-    #计算ATR
-    data["atr"]=data["tr"].rolling(atr_window).mean()
-
-    #计算NATR(波动率百分比)->方便我们设定统一的阈值
-    data["natr"]=(data["atr"]/data["close"])*100
+    add_atr_columns(data,atr_window)
 
     #part C:生成信号(加入风控逻辑)
     condition_trend=data["ma_short"]>data["ma_long"]
@@ -159,119 +208,29 @@ def run_backtest_with_stoploss(df:pd.DataFrame,fee_rate:float,initial_capital:fl
     事件驱动回测：支持固定比例止损+冷却机制
     stop_loss_pct: 止损比例 (例如 0.05 代表亏 5% 止损)
     """
-    #准备数据容器
-    capital=initial_capital
-    position=0.0 #当前持仓数量(币)
-    entry_price=0.0 #入场价格
-    equity_curve=[] #记录每天的资金
-    #将dataFrame转换为命名元组列表(急速遍历)
-    #我们需要time.open.high,low,close,signal
-    #注意:这里假设df索引是时间。且列名包含signal close low
-
-    #True：代表这波上涨已经出局，不要再买回来
-    stop_triggered=False
-    # --- 0. 状态重置逻辑 (关键!) ---
-        # 如果信号变成了 0 (死叉/空仓信号)，说明上一波趋势结束了
-        # 我们就可以解除 "冷却状态"，准备迎接下一次金叉
-    
-    for row in df.itertuples():
-        # --- A. 每日结算前，先记录当前的资产净值 ---
-        # 如果持仓，市值 = 币数 * 当前收盘价
-        # 如果空仓，市值 = 现金
-        if row.signal==0:
-            stop_triggered=False
-        if position>0:
-            current_equity=position*row.close
-        else:
-            current_equity=capital
-        equity_curve.append(current_equity)
-        # 情况1：持有仓位，检查是否要卖
-    #情况1:持有仓位，检查是否要卖
-        if position>0:
-        #1. 🛑 止损检查 (优先级最高！)
-        # 为什么用 Low？因为只要这一小时内最低价跌破了，就会触发止损单
-            stop_price=entry_price*(1-stop_loss_pct)
-
-            if row.low<=stop_price:
-                #触发止损 卖出
-                #实际成交价格通常就是止损价格
-                sell_price=stop_price
-
-                #卖出逻辑
-                revenue=position*sell_price
-                fee=revenue*fee_rate
-                capital=revenue-fee #变现回现金
-                position=0.0 #仓位归零
-                entry_price=0.0
-                # 🆕 标记：这波我不玩了！
-                stop_triggered=True
-                continue #遍历完一行去到下一行
-        #2.正常离场检查(死叉)
-        #如果没有触发止损，但策略要卖(signal==0)
-            elif row.signal==0:
-                sell_price=row.close
-                revenue=position*sell_price
-                fee=revenue*fee_rate
-                capital=revenue-fee
-                position=0.0
-                entry_price=0.0
-                continue
-        #情况2:空仓，检查是否要购买
-        elif position==0:
-            # ✅ 买入条件升级：
-            # 1. 信号必须是 1
-            # 2. 必须没有处于 "冷却状态" (not stop_triggered)
-            if row.signal==1 and not stop_triggered:
-                buy_price=row.close
-                #全仓买入(扣除手续费)
-                cost=capital*(1-fee_rate)
-                position=cost/buy_price
-                capital=0.0#现金变成币
-                entry_price=buy_price#记录成本价格 关键
-    return pd.Series(equity_curve,index=df.index)    
+    # 逐根 K 线的状态机 (持仓 / 入场价 / 冷却标记) 在 kernels 里实现:
+    # 止损优先 (用 Low 判断是否击穿)，其次死叉离场；止损后直到信号归零才允许再次买入
+    equity_curve=stoploss_backtest(df["close"].values,df["low"].values,df["signal"].values,
+                                   fee_rate,initial_capital,stop_loss_pct)
+    return pd.Series(equity_curve,index=df.index)
 
 # ==== 4. 结果分析模块（(升级版：加入 Calmar)） ====
-import numpy as np
-def calculate_metrics(equity_curve:pd.Series)->dict:
+def calculate_metrics(equity_curve:pd.Series,periods_per_year:int=24*365)->dict:
     """
-    计算核心指标:总回报、最大回撤、sharpe
+    计算核心指标:总回报、最大回撤、sharpe、Calmar
+    统一走 jarvis_engine.metrics (与 main.py 同一套口径)，年数按 K 线根数 / periods_per_year 推算，
+    不再写死 8 年。
     """
-    #1基础数据
-    final_equity=equity_curve[-1]
-    initial_capital=equity_curve.iloc[0]
-    ##或者我们可以函数传参
-    total_return=final_equity/initial_capital-1
-    # ---- 🆕 新增：计算年化收益率 (用于 Calmar) ----
-    # 数据大约 8 年 (2018-2026)
-    years=8.0
-    #年化公式:(1+总收益)^(1/年数)-1
-    cagr=(final_equity/initial_capital)**(1/years)-1
-    #最大回撤 向量版
-    running_max=equity_curve.cummax()
-    drawdown=(running_max-equity_curve)/running_max
-    max_dd=drawdown.max()
-    #==== 计算sharpe =====
-    #先反推出每根k线的收益率序列
-    ret_series=equity_curve.pct_change().dropna()
-
+    perf=performance_summary(equity_curve,periods_per_year=periods_per_year)
+    #最大回撤这里记为正数
+    max_dd=abs(perf["max_drawdown"])
     #防止0错误(如果策略从头到尾都没有开单，std是0)
-    if len(ret_series)>1 and ret_series.std()>0:
-        # 核心公式：(均值 / 标准差) * sqrt(年化周期数)
-        # 你的数据是 1小时级别，一年有 365 * 24 = 8760 小时
-        annual_factor=8760**0.5
-        sharpe=(ret_series.mean()/ret_series.std())*annual_factor
-    else:
-        sharpe=0.0
-    # ---- 🆕 新增：卡玛比率 (Calmar Ratio) ----
-    # 核心公式：年化收益 / 最大回撤
-    if max_dd>0:
-        calmar=cagr/max_dd
-    else:
-        # 如果没有回撤（神仙策略），给个极大的数字
-        calmar=999.0
+    sharpe=perf["sharpe"] if np.isfinite(perf["sharpe"]) and perf["ann_volatility"]>0 else 0.0
+    # 如果没有回撤（神仙策略），给个极大的数字
+    calmar=perf["ann_return"]/max_dd if max_dd>0 else 999.0
     return{
-        "Final Equity":final_equity,
-        "Total Return":total_return,
+        "Final Equity":perf["final_equity"],
+        "Total Return":perf["total_return"],
         "Max Drawdown":max_dd,
         "Sharpe":sharpe,
         "Calmar":calmar,
@@ -328,97 +287,196 @@ import time
 #         #转成DataFrame并且排序
 #         df_res=pd.DataFrame(results)
 #     return df_res.sort_values(by="Calmar",ascending=False)
-def get_best_params(df_train,short_params,long_params,stop_loss_params,fee,capital):
+# ---- 网格搜索加速: 共享与参数无关的中间结果 ----
+class _GridContext:
     """
-    安静版的网格搜索，只返回 best_params 字典
+    一份训练集上的网格搜索上下文:
+    - NATR 波动率过滤只算一次 (与 short/long 无关)
+    - 均线按窗口缓存，相同窗口的组合直接复用
+    信号与 calc_ma_signal(..., atr_threshold=0.001) 逐位一致。
+    """
+    def __init__(self,close,high,low,atr_window=20,atr_threshold=0.001):
+        self.close=pd.Series(close,copy=False)
+        self.low=low
+        data=pd.DataFrame({"close":close,"high":high,"low":low})
+        add_atr_columns(data,atr_window)
+        self.vol_ok=((data["natr"]>atr_threshold)&(data["natr"]<5.0)).to_numpy()
+        self.ma_cache={}
+
+    def moving_average(self,window):
+        if window not in self.ma_cache:
+            self.ma_cache[window]=self.close.rolling(window).mean().to_numpy()
+        return self.ma_cache[window]
+
+    def signal(self,short,long):
+        trend=self.moving_average(short)>self.moving_average(long)
+        return (trend&self.vol_ok).astype(np.int64)
+
+def _calmar_score(curve)->float:
     """
+    评分: 总收益 / 最大回撤 (卡玛比率)，回撤 < 1% 或 > 30% 记 0 分
+    """
+    if len(curve)==0:
+        return 0
+    # A. 算年化收益 (CAGR)
+    total_ret=curve[-1]/curve[0]-1
+    # B. 算最大回撤 (MaxDD)，fmax / nanmax 与 pandas 的 cummax / max 一样跳过 NaN
+    cummax=np.fmax.accumulate(curve)
+    dd=(cummax-curve)/cummax
+    max_dd=np.nanmax(dd)
+    # C. 核心修改：用 "卡玛比率" 作为评分标准！
+    # 如果回撤太小(比如0)，给个极大值防止除以0
+    if max_dd>0.01:
+        score=total_ret/max_dd
+    else:
+        score=0.0 # 没回撤通常意味着没交易，给0分
+    # D. 额外惩罚：如果最大回撤超过 30%，直接判死刑 (Score = 0)
+    # 这一句是强行让 Jarvis 选保守参数！
+    if max_dd>0.30:
+        score=0
+    return score
+
+def _score_combos(ctx,combos,fee,capital):
     results=[]
+    for s,l,sl in combos:
+        signal=ctx.signal(int(s),int(l))
+        curve=stoploss_backtest(ctx.close.values,ctx.low,signal,fee,capital,sl)
+        results.append({"s":s,"l":l,"sl":sl,"score":_calmar_score(curve)})
+    return results
+
+# 子进程里的全局状态 (每个 worker 进程一份，跨任务复用均线缓存)
+_WORKER_STATE={}
+
+def _grid_worker_init(shm_name,shape,fee,capital):
+    shm=shared_memory.SharedMemory(name=shm_name)
+    arrays=np.ndarray(shape,dtype=np.float64,buffer=shm.buf)
+    _WORKER_STATE["shm"]=shm # 保持引用，防止共享内存被提前关闭
+    _WORKER_STATE["ctx"]=_GridContext(arrays[0],arrays[1],arrays[2])
+    _WORKER_STATE["fee"]=fee
+    _WORKER_STATE["capital"]=capital
+
+def _grid_worker_score(combos):
+    return _score_combos(_WORKER_STATE["ctx"],combos,_WORKER_STATE["fee"],_WORKER_STATE["capital"])
+
+def _score_combos_parallel(df_train,combos,fee,capital,n_jobs):
+    """
+    多进程网格搜索: 训练集的 close/high/low 放进共享内存，worker 直接映射，不再逐任务 pickle DataFrame。
+    组合按原顺序切成连续块 (同一块内 short/long 大多相同，均线缓存命中率高)，
+    map 保序返回，因此结果顺序与串行完全一致。
+    """
+    arrays=np.ascontiguousarray(df_train[["close","high","low"]].to_numpy(dtype=np.float64).T)
+    shm=shared_memory.SharedMemory(create=True,size=arrays.nbytes)
+    try:
+        np.ndarray(arrays.shape,dtype=np.float64,buffer=shm.buf)[:]=arrays
+        n_chunks=min(len(combos),n_jobs*4)
+        bounds=np.linspace(0,len(combos),n_chunks+1).astype(int)
+        chunks=[combos[bounds[i]:bounds[i+1]] for i in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=n_jobs,initializer=_grid_worker_init,
+                                 initargs=(shm.name,arrays.shape,fee,capital)) as pool:
+            results=[]
+            for part in pool.map(_grid_worker_score,chunks):
+                results.extend(part)
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+def resolve_n_jobs(n_jobs)->int:
+    """None / -1 表示用满所有 CPU 核"""
+    if n_jobs is None or n_jobs<1:
+        return os.cpu_count() or 1
+    return int(n_jobs)
+
+def get_best_params(df_train,short_params,long_params,stop_loss_params,fee,capital,n_jobs=1):
+    """
+    安静版的网格搜索，只返回 best_params 字典
+    n_jobs: 并行进程数 (1 = 串行，None / -1 = 全部核心)，结果与串行完全一致
+    """
     from itertools import product
-    combinations=list(product(short_params,long_params,stop_loss_params))
     if len(df_train) < 300: 
             print(f"   ⚠️ 数据不足 ({len(df_train)}行), 跳过此训练集")
             return None # 返回空，让主程序跳过
-    for s,l,sl in combinations:
-        if s>=l:continue
-        #算信号
-        df_sig=calc_ma_signal(df_train,int(s),int(l),atr_threshold=0.001)
-        #跑回测
-        curve=run_backtest_with_stoploss(df_sig,fee,capital,stop_loss_pct=sl)
-        # 🆕 新增：如果这一年的数据太少（少于最长均线），直接放弃，别浪费时间算
-        #算指标
-        
-        #只算Sharpe和Calmar
-        if len(curve)>0:
-            # A. 算年化收益 (CAGR)
-            total_ret = curve.iloc[-1] / curve.iloc[0] - 1
-            # B. 算最大回撤 (MaxDD)
-            cummax = curve.cummax()
-            dd = (cummax - curve) / cummax
-            max_dd = dd.max()
-            # C. 核心修改：用 "卡玛比率" 作为评分标准！
-            # 如果回撤太小(比如0)，给个极大值防止除以0
-            if max_dd > 0.01:
-                score = total_ret / max_dd
-            else:
-                score = 0.0 # 没回撤通常意味着没交易，给0分
-            # D. 额外惩罚：如果最大回撤超过 30%，直接判死刑 (Score = 0)
-            # 这一句是强行让 Jarvis 选保守参数！
-            if max_dd > 0.30:
-                score = 0     
-        else:
-            score = 0
-        results.append({"s":s,"l":l,"sl":sl,"score":score})
-    if not results:
+    combinations=[(s,l,sl) for s,l,sl in product(short_params,long_params,stop_loss_params) if s<l]
+    if not combinations:
         return None
+
+    n_jobs=resolve_n_jobs(n_jobs)
+    if n_jobs>1 and len(combinations)>1:
+        results=_score_combos_parallel(df_train,combinations,fee,capital,n_jobs)
+    else:
+        ctx=_GridContext(df_train["close"].to_numpy(dtype=np.float64),
+                         df_train["high"].to_numpy(dtype=np.float64),
+                         df_train["low"].to_numpy(dtype=np.float64))
+        results=_score_combos(ctx,combinations,fee,capital)
     best=sorted(results,key=lambda x:x["score"],reverse=True)[0]
     return best
-def run_walk_forward(df_raw,short_params,long_params,stop_loss_params,fee,initial_capital):
+def year_slices(index:pd.DatetimeIndex)->list:
+    """
+    按自然年切分 (索引须已排序)，返回 [(year, start, end), ...] 位置区间。
+    用 searchsorted 二分定位年初边界，代替逐年 df[df.index.year==y] 的全表扫描。
+    """
+    if len(index)==0:
+        return []
+    first_year,last_year=index[0].year,index[-1].year
+    edges=[pd.Timestamp(year=y,month=1,day=1,tz=index.tz) for y in range(first_year,last_year+2)]
+    bounds=index.searchsorted(edges)
+    return [(y,int(bounds[k]),int(bounds[k+1]))
+            for k,y in enumerate(range(first_year,last_year+1)) if bounds[k+1]>bounds[k]]
+
+def _optimize_fold(args):
+    df_train,short_params,long_params,stop_loss_params,fee,capital=args
+    return get_best_params(df_train,short_params,long_params,stop_loss_params,fee,capital)
+
+def run_walk_forward(df_raw,short_params,long_params,stop_loss_params,fee,initial_capital,n_jobs=1):
     """
     滚动回测主引擎
+    n_jobs: 各年份的参数优化互相独立，可并行跑 (1 = 串行，None / -1 = 全部核心)；
+            只有实战阶段的复利滚动是顺序的，放在最后统一拼接 (很便宜)。
     """
     # 1. 按年份切分数据
     # df.index 必须是 datetime 类型
-    years=df_raw.index.year.unique().sort_values()
-    print(f"📅 数据涵盖年份: {years.tolist()}")
-    #2.初始化
-    final_equity_curve=pd.Series(dtype="float64")
+    slices=year_slices(df_raw.index)
+    years=[y for y,_,_ in slices]
+    print(f"📅 数据涵盖年份: {years}")
+
+    # 2. Train: Year i / Test: Year i+1 (从第2年开始，因为第1年只能用来做训练)
+    folds=[(slices[i],slices[i+1]) for i in range(len(slices)-1)]
+
+    # 3. 所有年份的参数优化一起跑 (Optimization)
+    # 评分是收益/回撤的比值，与本金无关，所以统一用初始资金优化，不必等上一年的结果
+    tasks=[(df_raw.iloc[tr_start:tr_end],short_params,long_params,stop_loss_params,fee,initial_capital)
+           for (_,tr_start,tr_end),_ in folds]
+    n_jobs=min(resolve_n_jobs(n_jobs),max(len(tasks),1))
+    print(f" Searching best params in {len(tasks)} folds (n_jobs={n_jobs})...")
+    if n_jobs>1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            best_list=list(pool.map(_optimize_fold,tasks))
+    else:
+        best_list=[_optimize_fold(task) for task in tasks]
+
+    # 4. 顺序实战 + 复利滚动 (Validation)
+    curves=[]
     current_capital=initial_capital# 这一年的本金是上一年的余额
     history_params=[]#记录每一年使用的参数
-
-    # 3. 开始滚动 (从第2年开始，因为第1年只能用来做训练)
-    # Train: Year i
-    # Test: Year i+1
-    for i in range(len(years)-1):
-        train_year=years[i]
-        test_year=years[i+1]
+    for ((train_year,_,_),(test_year,te_start,te_end)),best in zip(folds,best_list):
         print(f"\n🔄 正在进行滚动: 训练 {train_year} -> 实战 {test_year}")
-        # 切分数据
-        df_train=df_raw[df_raw.index.year==train_year].copy()
-        df_test=df_raw[df_raw.index.year==test_year].copy() 
-        # A. 在训练集上找最佳参数 (Optimization)
-        print(f" Searching best params in{train_year}...")
-        best=get_best_params(df_train,short_params,long_params,stop_loss_params,fee,current_capital)
         if best is None:
             print("   ❌ 这一年数据不足或无法交易，跳过")
             continue
         print(f"   ✅ 冠军参数: MA {best['s']}/{best['l']} | SL {best['sl']:.1%}")
         history_params.append({"year":test_year,"params": best})
-        # B. 在测试集上跑实盘 (Validation)
         # 注意：这里用的是刚刚算出来的 best 参数！
         print(f"   🏃 Running trade in {test_year}...")
-        df_test_sig=calc_ma_signal(df_test,int(best['s']),int(best['l']),atr_threshold=0.001)
+        df_test_sig=calc_ma_signal(df_raw.iloc[te_start:te_end],int(best['s']),int(best['l']),atr_threshold=0.001)
         #跑回测,初始资金是current_capital(复利滚动)
         curve_test=run_backtest_with_stoploss(df_test_sig,fee,current_capital,stop_loss_pct=best['sl'])
-
-        #C.拼接资金曲线
-        if final_equity_curve.empty:
-            final_equity_curve=curve_test
-        else:
-            #拼接到后面
-            final_equity_curve=pd.concat([final_equity_curve,curve_test])
-        #D.更新本金，为明年做准备
-        current_capital=final_equity_curve.iloc[-1]
+        curves.append(curve_test)
+        #更新本金，为明年做准备
+        current_capital=curve_test.iloc[-1]
         print(f"   💰 {test_year} 年底资产: {current_capital:,.0f}")
+
+    #拼接资金曲线
+    final_equity_curve=pd.concat(curves) if curves else pd.Series(dtype="float64")
     return final_equity_curve,history_params
 
 # ==========================================
@@ -436,6 +494,7 @@ if __name__ == "__main__":
     
     INITIAL_CAPITAL = 10000
     FEE_RATE = 0.0005 
+    N_JOBS = None # 滚动优化的并行进程数 (None = 全部核心)
     
     # 定义稳健的参数池
     short_params = [20, 30,50] 
@@ -454,9 +513,9 @@ if __name__ == "__main__":
         print(f"🔥 正在部署策略进入战场: {symbol} ...")
         print(f"{'='*60}")
         
-        # A. 加载数据
+        # A. 加载数据 (走本地 K 线库，只映射需要的字节)
         try:
-            df = load_price_data(csv_path)
+            df = load_bars(csv_path)
             print(f"   📊 数据加载成功: {len(df)} 行 | 时间: {df.index[0].year} - {df.index[-1].year}")
         except Exception as e:
             print(f"   ❌ 错误: 无法加载 {csv_path} ({e})")
@@ -464,7 +523,7 @@ if __name__ == "__main__":
             
         # B. 启动滚动回测
         # 注意：这里我们确信 run_walk_forward 里面已经加上了 int() 修复
-        wfa_curve, wfa_history = run_walk_forward(df, short_params, long_params, stop_loss_params, FEE_RATE, INITIAL_CAPITAL)
+        wfa_curve, wfa_history = run_walk_forward(df, short_params, long_params, stop_loss_params, FEE_RATE, INITIAL_CAPITAL, n_jobs=N_JOBS)
 
         # C1. 计算囤币曲线 (Buy & Hold)
         # 逻辑：每一天的钱 = 初始资金 * (今天的价格 / 起始价格)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🖼️ 作图降采样 (Downsampling for Plots)
+# ==========================================
+# 长历史的全景图每条线有几万到几百万个点，但横轴只有几千个像素。
+#   - minmax: 每个桶 (约一个像素宽) 保留最小值和最大值，折线 / fill_between 的上下包络与原图一致。
+#             无论历史多长，输出点数只取决于桶数。
+#   - lttb:   Largest-Triangle-Three-Buckets，每桶保留一个 "最能保持形状" 的点，适合平滑曲线。
+# 两者都保留首尾点，返回的是原序列的子集 (不会插值出新数值)。
+
+
+def minmax_indices(y, n_buckets: int) -> np.ndarray:
+    """
+    把 y 均分成 n_buckets 个桶，返回每桶最小值 / 最大值所在位置 (升序、去重，含首尾)。
+    全 NaN 的桶保留桶首位置，让 NaN 断线在图上依然可见。
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.empty(n_buckets * size)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    blocks = padded.reshape(n_buckets, size)
+
+    nan = np.isnan(blocks)
+    lo = np.where(nan, np.inf, blocks).argmin(axis=1)
+    hi = np.where(nan, -np.inf, blocks).argmax(axis=1)
+    base = np.arange(n_buckets) * size
+    idx = np.concatenate(([0, n - 1], base + lo, base + hi))
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def lttb_indices(y, n_out: int, x=None) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: 从 y 中挑出 n_out 个点的位置 (升序，含首尾)"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    # NaN 不参与面积比较 (当作 0 面积)，避免整个桶被 NaN 污染
+    y_filled = np.where(np.isnan(y), 0.0, y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # 下一个桶的均值点作为三角形的第三个顶点
+        nxt_start, nxt_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        nxt_end = max(nxt_end, nxt_start + 1)
+        cx = x[nxt_start:nxt_end].mean()
+        cy = y_filled[nxt_start:nxt_end].mean()
+        bx, by = x[start:end], y_filled[start:end]
+        area = np.abs((x[a] - cx) * (by - y_filled[a]) - (x[a] - bx) * (cy - y_filled[a]))
+        a = start + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample_series(series: pd.Series, n_points, method: str = "minmax") -> pd.Series:
+    """
+    降采样一条序列，n_points 为 0 / None 时原样返回。
+    minmax 模式下 n_points 指桶数 (输出最多 2 * n_points + 2 个点)。
+    """
+    if not n_points or len(series) <= n_points:
+        return series
+    if method == "minmax":
+        idx = minmax_indices(series.to_numpy(dtype=np.float64), n_points)
+    elif method == "lttb":
+        idx = lttb_indices(series.to_numpy(dtype=np.float64), n_points)
+    else:
+        raise ValueError(f"未知的降采样方法: {method!r} (可选 'minmax' / 'lttb')")
+    return series.iloc[idx]
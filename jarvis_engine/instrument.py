@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import functools
+import threading
+import tracemalloc
+from collections import deque
+from config import Config
+
+try:
+    import resource  # Windows 上没有，此时 'rss' 模式不记录内存
+except ImportError:
+    resource = None
+
+# ==========================================
+# ⏱️ 阶段埋点 (Stage Instrumentation)
+# ==========================================
+# 用法:
+#   with stage("alpha") as s:
+#       df = calculate_scaled_forecast(df)
+#       s.rows = len(df)
+#
+#   @instrumented("risk")
+#   def calculate_xxx(df): ...       # 返回 DataFrame / ndarray 时自动记录行数
+#
+# 每个阶段记录: 墙钟时间 / 本线程 CPU 时间 (thread_time，线程池里互不计入) / 峰值内存 / 行数，
+# 支持嵌套 (子阶段的峰值会计入父阶段)。PROFILER.report() 输出结构化结果，
+# print_table() 打印控制台表格，save_json() 落盘。
+#
+# 开关 (Config，或 stage(..., config=cfg) 传入的显式配置):
+#   INSTRUMENT = False                   -> stage() 直接返回空上下文，几乎零开销
+#   INSTRUMENT_MEMORY = 'rss' (默认)      -> 峰值内存 = 阶段内进程最大常驻内存 (getrusage maxrss) 的增长，
+#                                           每个阶段两次系统调用，可常开；只反映刷新了历史最高点的部分
+#   INSTRUMENT_MEMORY = 'tracemalloc'    -> 阶段内 Python 分配的精确峰值 (对大量小对象分配约 +15% 开销)
+#   INSTRUMENT_MEMORY = None             -> 只计时
+#
+# 线程: 阶段栈按线程分开 (threading.local)，线程池里并行跑流水线时各自嵌套、互不串层。
+# 两种内存口径都是整个进程共享的，因此只在主线程上统计内存，其它线程的阶段只计时。
+
+
+def _max_rss() -> int:
+    """进程最大常驻内存 (字节)；Linux 的 ru_maxrss 单位是 KB，macOS 是字节"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class _NullStage:
+    """关闭埋点时使用的空上下文"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "path", "depth", "rows", "record", "memory", "stack",
+                 "_wall0", "_cpu0", "_mem0", "_peak")
+
+    def __init__(self, profiler, name, rows, memory, stack):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.memory = memory
+        self.stack = stack
+
+    def __enter__(self):
+        p = self.profiler
+        stack = self.stack
+        parent = stack[-1] if stack else None
+        self.path = f"{parent.path}/{self.name}" if parent else self.name
+        self.depth = len(stack)
+        # 占位，保证报告按进入顺序排列
+        self.record = {"name": self.name, "path": self.path, "depth": self.depth}
+        p._records.append(self.record)
+
+        if self.memory == 'rss':
+            self._mem0 = _max_rss()
+        elif self.memory == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                p._started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            # reset_peak 是全局的: 先把目前为止的峰值折算进所有外层阶段
+            for outer in stack:
+                outer._peak = max(outer._peak, peak)
+            tracemalloc.reset_peak()
+            self._mem0 = self._peak = current
+        stack.append(self)
+        self._cpu0 = time.thread_time()
+        self._wall0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall0
+        cpu = time.thread_time() - self._cpu0
+        p = self.profiler
+        stack = self.stack
+        stack.pop()
+
+        peak_mb = None
+        if self.memory == 'rss':
+            peak_mb = (_max_rss() - self._mem0) / 1e6
+        elif self.memory == 'tracemalloc' and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            self._peak = max(self._peak, peak)
+            peak_mb = (self._peak - self._mem0) / 1e6
+            for outer in stack:
+                outer._peak = max(outer._peak, self._peak)
+            if not stack and p._started_tracing:
+                tracemalloc.stop()
+                p._started_tracing = False
+
+        rows = self.rows
+        self.record.update({
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_mem_mb": peak_mb,
+            "rows": rows,
+            "rows_per_sec": rows / wall if rows and wall > 0 else None,
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+class Profiler:
+    """
+    收集各阶段记录；enabled / memory 为 None 时跟随配置的 INSTRUMENT / INSTRUMENT_MEMORY。
+    memory: 'rss' / 'tracemalloc' / False (只计时)
+    """
+
+    def __init__(self, enabled=None, memory=None, max_records=10_000):
+        self.enabled = enabled
+        self.memory = memory
+        # 长时间运行 (参数扫描里反复调用被埋点的函数) 时只保留最近的记录
+        self._records = deque(maxlen=max_records)
+        self._local = threading.local()   # 每个线程自己的阶段栈 / 内存开关
+        self._started_tracing = False
+
+    @property
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _is_enabled(self, config=None) -> bool:
+        if self.enabled is not None:
+            return self.enabled
+        return getattr(Config if config is None else config, 'INSTRUMENT', True)
+
+    def stage(self, name: str, rows=None, config=None):
+        """config: 显式配置 (Config.freeze(...))，None 时读全局 Config"""
+        if not self._is_enabled(config):
+            return _NULL_STAGE
+        local, stack = self._local, self._stack
+        if not stack:
+            # 最外层阶段决定整棵阶段树是否追踪内存 (只在主线程上)
+            cfg = Config if config is None else config
+            mode = self.memory if self.memory is not None else getattr(cfg, 'INSTRUMENT_MEMORY', 'rss')
+            if mode == 'rss' and resource is None:
+                mode = None
+            on_main = threading.current_thread() is threading.main_thread()
+            local.memory = mode if on_main and mode in ('rss', 'tracemalloc') else None
+        return _Stage(self, name, rows, local.memory, stack)
+
+    def reset(self):
+        """清空记录与当前线程的阶段栈"""
+        self._records.clear()
+        self._local.stack = []
+
+    def report(self) -> dict:
+        top = [r for r in self._records if r["depth"] == 0 and "wall_s" in r]
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_wall_s": sum(r["wall_s"] for r in top),
+            "stages": [dict(r) for r in self._records if "wall_s" in r],
+        }
+
+    def save_json(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+    def print_table(self):
+        stages = self.report()["stages"]
+        if not stages:
+            return
+        print("\n⏱️ --- Stage Profile ---")
+        print(f"{'stage':<28} {'wall(s)':>9} {'cpu(s)':>9} {'peak(MB)':>10} {'rows':>12} {'rows/s':>14}")
+        for r in stages:
+            name = "  " * r["depth"] + r["name"]
+            peak = f"{r['peak_mem_mb']:10.1f}" if r["peak_mem_mb"] is not None else f"{'-':>10}"
+            rows = f"{r['rows']:12,}" if r["rows"] is not None else f"{'-':>12}"
+            rate = f"{r['rows_per_sec']:14,.0f}" if r["rows_per_sec"] is not None else f"{'-':>14}"
+            err = f"  ❌ {r['error']}" if r["error"] else ""
+            print(f"{name:<28} {r['wall_s']:9.3f} {r['cpu_s']:9.3f} {peak} {rows} {rate}{err}")
+        print("-" * 88)
+
+
+# 全局默认 Profiler，jarvis_engine 内部与 main.py 共用
+PROFILER = Profiler()
+
+
+def stage(name: str, rows=None, config=None):
+    """在全局 PROFILER 上开一个阶段 (上下文管理器)；config 为显式配置 (可选)"""
+    return PROFILER.stage(name, rows, config)
+
+
+def instrumented(name=None):
+    """
+    装饰器版本: 整个函数调用记为一个阶段，返回 DataFrame / Series / ndarray 时自动记录行数。
+    关闭埋点时只多一次开关判断。
+    """
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with PROFILER.stage(stage_name) as s:
+                result = fn(*args, **kwargs)
+                shape = getattr(result, "shape", None)
+                if shape:
+                    s.rows = shape[0]
+                return result
+        return wrapper
+    return decorator
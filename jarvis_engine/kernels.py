@@ -0,0 +1,264 @@
+import numpy as np
+
+# ==========================================
+# ⚙️ 路径依赖状态机内核 (Path-Dependent Kernels)
+# ==========================================
+# 缓冲器 / 止损回测 / 信号回测 都是 "今天的状态取决于昨天" 的逐根循环，
+# 无法直接向量化。这里统一实现为数组内核：
+#   - 装了 numba: 编译成机器码 (njit)
+#   - 没装 numba: 退回纯 Python 版本 (在 list 上循环，比 .iloc / itertuples 快一个数量级)
+# 两个版本逐行执行完全相同的浮点运算，结果逐位一致 (bit-identical)。
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# 设为 False 可强制使用纯 Python 版本 (调试 / 对拍用)
+USE_JIT = HAS_NUMBA
+
+
+# 循环本体只写一份: 结果写入调用方预分配的 out (纯 Python 传 list, numba 传 ndarray)
+def _buffer_hysteresis_loop(ideal, buffer, out):
+    current_pos = 0.0
+    for i in range(len(ideal)):
+        if abs(ideal[i] - current_pos) > buffer:
+            current_pos = ideal[i]
+        out[i] = current_pos
+
+
+def _buffer_hysteresis_2d_loop(ideal, buffer, out):
+    n, m = ideal.shape
+    for j in range(m):
+        current_pos = 0.0
+        for i in range(n):
+            if abs(ideal[i, j] - current_pos) > buffer:
+                current_pos = ideal[i, j]
+            out[i, j] = current_pos
+
+
+def _stoploss_backtest_loop(close, low, signal, fee_rate, initial_capital, stop_loss_pct, equity):
+    n = len(close)
+    capital = initial_capital
+    position = 0.0
+    entry_price = 0.0
+    stop_triggered = False
+    for i in range(n):
+        sig = signal[i]
+        if sig == 0:
+            stop_triggered = False
+        if position > 0:
+            equity[i] = position * close[i]
+        else:
+            equity[i] = capital
+
+        if position > 0:
+            stop_price = entry_price * (1 - stop_loss_pct)
+            if low[i] <= stop_price:
+                revenue = position * stop_price
+                capital = revenue - revenue * fee_rate
+                position = 0.0
+                entry_price = 0.0
+                stop_triggered = True
+            elif sig == 0:
+                revenue = position * close[i]
+                capital = revenue - revenue * fee_rate
+                position = 0.0
+                entry_price = 0.0
+        elif position == 0:
+            if sig == 1 and not stop_triggered:
+                buy_price = close[i]
+                position = capital * (1 - fee_rate) / buy_price
+                capital = 0.0
+                entry_price = buy_price
+
+
+def _signal_backtest_loop(close, signal, initial_capital, fee_rate, equity):
+    n = len(close)
+    balance = initial_capital
+    position = 0.0
+    for i in range(n):
+        price = close[i]
+        sig = signal[i]
+        if sig == 1 and position == 0:
+            position = balance * (1 - fee_rate) / price
+            balance = 0.0
+        elif sig == -1 and position > 0:
+            balance = position * price * (1 - fee_rate)
+            position = 0.0
+        equity[i] = balance + position * price
+
+
+# 绩效统计的累加量 (每列一行): 见 performance_pass_2d
+PERF_ACC_FIELDS = ("count", "mean", "m2", "down_sq", "down_n", "mdd", "pos_sum", "pos_n", "pos_max")
+
+
+def _performance_pass_2d_loop(equity, returns, position, out):
+    # 只扫一遍: Welford 均值 / 方差、下行平方和、滚动峰值回撤、|仓位| 均值与最大值
+    # 按行推进、每列的状态放在 out 里 (矩阵按行存储，逐行读取对缓存友好)
+    # returns 行数为 0 时直接由 equity 推出简单收益 (pct_change)；position 行数为 0 时不统计仓位
+    n, m = equity.shape
+    derive = returns.shape[0] == 0
+    has_pos = position.shape[0] > 0
+    peak = np.full(m, -np.inf)
+    for j in range(m):
+        for k in range(8):
+            out[j, k] = 0.0
+        out[j, 8] = np.nan
+    for i in range(n):
+        for j in range(m):
+            e = equity[i, j]
+            if e > peak[j]:
+                peak[j] = e
+            dd = e / peak[j] - 1.0
+            if dd < out[j, 5]:
+                out[j, 5] = dd
+
+            if derive:
+                r = e / equity[i - 1, j] - 1.0 if i > 0 else np.nan
+            else:
+                r = returns[i, j]
+            if r == r:
+                count = out[j, 0] + 1.0
+                mean = out[j, 1]
+                delta = r - mean
+                mean += delta / count
+                out[j, 0] = count
+                out[j, 1] = mean
+                out[j, 2] += delta * (r - mean)
+                if r < 0.0:
+                    out[j, 3] += r * r
+                    out[j, 4] += 1.0
+
+            if has_pos:
+                p = abs(position[i, j])
+                if p == p:
+                    out[j, 6] += p
+                    out[j, 7] += 1.0
+                    if not (p <= out[j, 8]):
+                        out[j, 8] = p
+
+if HAS_NUMBA:
+    # nogil: 内核只读写传入的数组，执行期间释放 GIL，线程池里并行评估多套配置时可以真正重叠
+    _buffer_hysteresis_nb = njit(cache=True, nogil=True)(_buffer_hysteresis_loop)
+    _buffer_hysteresis_2d_nb = njit(cache=True, nogil=True)(_buffer_hysteresis_2d_loop)
+    _stoploss_backtest_nb = njit(cache=True, nogil=True)(_stoploss_backtest_loop)
+    _signal_backtest_nb = njit(cache=True, nogil=True)(_signal_backtest_loop)
+    _performance_pass_2d_nb = njit(cache=True, nogil=True)(_performance_pass_2d_loop)
+
+
+def _as_float_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def buffer_hysteresis(ideal, buffer: float) -> np.ndarray:
+    """
+    缓冲器 (阻尼器): 只有当 |目标仓位 - 当前仓位| > buffer 时才调仓。
+    NaN 目标不会触发调仓 (与原始循环一致)。
+    """
+    ideal = _as_float_array(ideal)
+    if USE_JIT:
+        out = np.empty(len(ideal))
+        _buffer_hysteresis_nb(ideal, float(buffer), out)
+        return out
+    out = [0.0] * len(ideal)
+    _buffer_hysteresis_loop(ideal.tolist(), float(buffer), out)
+    return np.array(out, dtype=np.float64)
+
+
+def buffer_hysteresis_2d(ideal, buffer: float) -> np.ndarray:
+    """
+    多品种缓冲器: ideal 为 (时间 x 品种) 矩阵，每一列独立做 buffer_hysteresis。
+    纯 Python 回退版本按行推进、列方向用 NumPy 向量化。
+    """
+    ideal = _as_float_array(ideal)
+    if USE_JIT:
+        out = np.empty_like(ideal)
+        _buffer_hysteresis_2d_nb(ideal, float(buffer), out)
+        return out
+    out = np.empty_like(ideal)
+    current_pos = np.zeros(ideal.shape[1])
+    for i in range(ideal.shape[0]):
+        current_pos = np.where(np.abs(ideal[i] - current_pos) > buffer, ideal[i], current_pos)
+        out[i] = current_pos
+    return out
+
+
+def stoploss_backtest(close, low, signal, fee_rate: float, initial_capital: float,
+                      stop_loss_pct: float) -> np.ndarray:
+    """
+    Day 12 事件驱动回测: 全仓做多 + 固定比例止损 + 止损后冷却 (信号归零才解除)。
+    返回每根 K 线 (交易前) 的账户净值。
+    """
+    close = _as_float_array(close)
+    low = _as_float_array(low)
+    signal = np.ascontiguousarray(signal, dtype=np.int64)
+    args = (float(fee_rate), float(initial_capital), float(stop_loss_pct))
+    if USE_JIT:
+        equity = np.empty(len(close))
+        _stoploss_backtest_nb(close, low, signal, *args, equity)
+        return equity
+    equity = [0.0] * len(close)
+    _stoploss_backtest_loop(close.tolist(), low.tolist(), signal.tolist(), *args, equity)
+    return np.array(equity, dtype=np.float64)
+
+
+def signal_backtest(close, signal, initial_capital: float, fee_rate: float) -> np.ndarray:
+    """
+    Day 18 简化回测: 信号 1 空仓时全仓买入，信号 -1 持仓时清仓，其余保持。
+    返回每根 K 线 (交易后) 的账户净值。
+    """
+    close = _as_float_array(close)
+    signal = np.ascontiguousarray(signal, dtype=np.int64)
+    if USE_JIT:
+        equity = np.empty(len(close))
+        _signal_backtest_nb(close, signal, float(initial_capital), float(fee_rate), equity)
+        return equity
+    equity = [0.0] * len(close)
+    _signal_backtest_loop(close.tolist(), signal.tolist(), float(initial_capital), float(fee_rate), equity)
+    return np.array(equity, dtype=np.float64)
+
+
+def performance_pass_2d(equity, returns=None, position=None) -> np.ndarray:
+    """
+    绩效统计的单遍扫描: equity / returns / position 均为 (K 线 x 策略) 矩阵，
+    返回 (策略数 x len(PERF_ACC_FIELDS)) 的累加量，由 jarvis_engine.metrics 换算成 Sharpe / MDD 等指标。
+    NaN 收益 / 仓位跳过 (与 pandas 的 skipna 一致)。
+    纯 NumPy 回退版本按列向量化 (多遍扫描)，与 numba 版的差异仅在末位舍入 (方差算法不同)。
+    """
+    equity = _as_float_array(equity)
+    n, m = equity.shape
+    returns = np.empty((0, m)) if returns is None else _as_float_array(returns)
+    position = np.empty((0, m)) if position is None else _as_float_array(position)
+    if USE_JIT:
+        out = np.empty((m, len(PERF_ACC_FIELDS)))
+        _performance_pass_2d_nb(equity, returns, position, out)
+        return out
+
+    out = np.full((m, len(PERF_ACC_FIELDS)), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if returns.shape[0] == 0:
+            returns = np.full((n, m), np.nan)
+            returns[1:] = equity[1:] / equity[:-1] - 1.0
+        valid = ~np.isnan(returns)
+        count = valid.sum(axis=0).astype(np.float64)
+        mean = np.where(valid, returns, 0.0).sum(axis=0) / count
+        out[:, 0] = count
+        out[:, 1] = np.where(count > 0, mean, 0.0)
+        out[:, 2] = np.where(valid, (returns - mean) ** 2, 0.0).sum(axis=0)
+        neg = np.where(returns < 0.0, returns, 0.0)
+        out[:, 3] = (neg * neg).sum(axis=0)
+        out[:, 4] = (returns < 0.0).sum(axis=0)
+        peak = np.fmax.accumulate(equity, axis=0)
+        dd = equity / peak - 1.0
+        out[:, 5] = np.fmin(np.fmin.reduce(dd, axis=0), 0.0) if n else 0.0
+        if position.shape[0] > 0:
+            p = np.abs(position)
+            pvalid = ~np.isnan(p)
+            out[:, 6] = np.where(pvalid, p, 0.0).sum(axis=0)
+            out[:, 7] = pvalid.sum(axis=0)
+            out[:, 8] = np.fmax.reduce(p, axis=0) if n else np.nan
+        else:
+            out[:, 6:8] = 0.0
+    return out
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+from config import Config
+from jarvis_engine.alpha import resolve_config, compute_dtype, _forecast_volatility, _rsi_forecast, _trend_forecast
+from jarvis_engine.kernels import buffer_hysteresis
+from jarvis_engine.instrument import stage
+
+# ==========================================
+# 🪶 精简流水线 (Lean Pipeline)
+# ==========================================
+# calculate_scaled_forecast -> calculate_position_target -> run_vectorized_backtest
+# 每一步都 df.copy() 再追加十几列中间结果，长历史 (如 10 年 1 分钟线) 下会同时持有好几份宽表。
+# 这里把三个阶段拆成只收发 NumPy 数组的函数:
+#   - 不复制原始 DataFrame，只按需读取 open / high / low / close 列
+#   - 每个阶段只把下一阶段用得到的数组传下去，中间结果用完即释放
+#   - 调用方通过 columns 指定要落地成列的诊断字段，其余一律不保留
+# 数值与原流水线逐位一致 (bit-identical)。
+# Config.COMPUTE_DTYPE='float32' 时派生序列以 float32 存储 (判断条件仍在 float64 下完成)，
+# equity / buy_hold_equity 始终以 float64 累乘。
+
+# 原流水线产出的全部字段 (fc_* 分规则信号除外)
+LEAN_COLUMNS = (
+    "close", "volatility", "trend_forecast", "rsi_forecast", "forecast",
+    "regime_ma", "dynamic_max_cap", "ann_vol_pct", "leverage_ratio", "sl_threshold",
+    "sigma_event", "is_meltdown", "raw_target", "buffered_pos", "position",
+    "market_ret", "strat_ret_raw", "net_ret", "equity", "buy_hold_equity",
+    "net_log_ret", "market_log_ret",
+)
+
+DEFAULT_COLUMNS = ("position", "net_ret", "equity", "buy_hold_equity")
+
+# main.py 的统计与作图用到的字段
+REPORT_COLUMNS = (
+    "close", "position", "sigma_event", "sl_threshold", "ann_vol_pct", "leverage_ratio",
+    "equity", "buy_hold_equity", "net_log_ret", "market_log_ret",
+)
+
+
+def forecast_stage(close: pd.Series, keep=(), config=None) -> dict:
+    """Alpha 阶段: 返回 {'forecast': ndarray, ...keep 中要求的诊断字段}"""
+    cfg = resolve_config(config)
+    dtype = compute_dtype(cfg)
+    volatility = _forecast_volatility(close, cfg)
+    trend = np.clip(_trend_forecast(close, volatility.to_numpy(), cfg), -20, 20).astype(dtype, copy=False)
+    rsi = _rsi_forecast(close, cfg).clip(-20, 20).fillna(0).to_numpy().astype(dtype, copy=False)
+
+    w_trend = getattr(cfg, 'TREND_WEIGHT', 0.9)
+    w_rsi = getattr(cfg, 'RSI_WEIGHT', 0.1)
+    out = {"forecast": trend * w_trend + rsi * w_rsi}
+
+    if "volatility" in keep:
+        out["volatility"] = volatility.to_numpy().astype(dtype, copy=False)
+    if "trend_forecast" in keep:
+        out["trend_forecast"] = trend
+    if "rsi_forecast" in keep:
+        out["rsi_forecast"] = rsi
+    return out
+
+
+def regime_cap(close: pd.Series, config=None):
+    """环境过滤器: (regime_ma, dynamic_max_cap)，价格在长均线之上用 MAX_LEVERAGE，否则用熊市上限"""
+    cfg = resolve_config(config)
+    ma_window = getattr(cfg, 'REGIME_MA_WINDOW', 4800)
+    regime_ma = close.rolling(window=ma_window).mean().to_numpy()
+    normal_cap = getattr(cfg, 'MAX_LEVERAGE', 2.5)
+    bear_cap = getattr(cfg, 'BEAR_MODE_MAX_LEVERAGE', 1.0)
+    dynamic_max_cap = np.where(close.to_numpy() > regime_ma, normal_cap, bear_cap).astype(compute_dtype(cfg), copy=False)
+    return regime_ma, dynamic_max_cap
+
+
+def vol_scaling(close: pd.Series, config=None):
+    """波动率目标: (hourly_ret, ann_vol_pct, raw_leverage_ratio)，hourly_ret 保持 float64 (熔断判断用)"""
+    cfg = resolve_config(config)
+    dtype = compute_dtype(cfg)
+    hourly_ret = close.pct_change().fillna(0)
+    ann_vol_pct = hourly_ret.ewm(span=cfg.VOL_LOOKBACK).std().fillna(0).to_numpy() * np.sqrt(365 * 24)
+    hourly_ret = hourly_ret.to_numpy()
+    safe_vol = np.where(ann_vol_pct == 0, 1e-6, ann_vol_pct)
+    raw_leverage_ratio = (getattr(cfg, 'TARGET_VOLATILITY', 0.8) / safe_vol).astype(dtype, copy=False)
+    del safe_vol
+    return hourly_ret, ann_vol_pct.astype(dtype, copy=False), raw_leverage_ratio
+
+
+def survival_atr(close: pd.Series, high, low, config=None) -> np.ndarray:
+    """灾难阻断器的 ATR (True Range 的 EWMA，float64)"""
+    h, l = np.asarray(high), np.asarray(low)
+    pc = close.shift(1).fillna(close).to_numpy()
+    tr = np.maximum(h - l, np.maximum(np.abs(h - pc), np.abs(l - pc)))
+    del pc
+    return pd.Series(tr).ewm(span=getattr(resolve_config(config), 'SURVIVAL_ATR_WINDOW', 24)).mean().fillna(0).to_numpy()
+
+
+def survival_threshold(close: pd.Series, atr: np.ndarray, hourly_ret: np.ndarray, config=None):
+    """熔断阈值与触发标记: (crash_threshold, is_crash)，都在 float64 下判断"""
+    cfg = resolve_config(config)
+    multiplier = getattr(cfg, 'SURVIVAL_ATR_MULTIPLIER', 4.5)
+    min_vol = getattr(cfg, 'MIN_HOURLY_VOL', 0.005)
+    crash_threshold = np.maximum((atr * multiplier) / close.to_numpy(), min_vol * multiplier)
+    return crash_threshold, hourly_ret < -crash_threshold
+
+
+def shift_position(buffered_position: np.ndarray) -> np.ndarray:
+    """下一根 K 线才按缓冲后的目标仓位成交"""
+    position = np.empty_like(buffered_position)
+    position[0] = 0.0
+    position[1:] = buffered_position[:-1]
+    return position
+
+
+def position_stage(close: pd.Series, high, low, forecast: np.ndarray, buffer: float, keep=(), config=None) -> dict:
+    """
+    风控阶段 (与 calculate_position_target 同一套逻辑)
+    返回 {'position', 'hourly_ret', 'sigma_event', 'sl_threshold', ...keep}，
+    hourly_ret 即回测阶段的 market_ret，直接复用。
+    各步骤拆成 regime_cap / vol_scaling / survival_atr / survival_threshold，DAG 流水线 (pipeline.py) 分别缓存。
+    """
+    cfg = resolve_config(config)
+    dtype = compute_dtype(cfg)
+
+    # --- 1. 环境过滤器 (Regime Filter) ---
+    regime_ma, dynamic_max_cap = regime_cap(close, cfg)
+
+    # --- 2. 波动率目标管理 (Vol Scaling) ---
+    hourly_ret, ann_vol_pct, raw_leverage_ratio = vol_scaling(close, cfg)
+
+    # --- 3. 仓位计算 ---
+    ideal_position = np.clip((forecast / 2.0) * raw_leverage_ratio, -dynamic_max_cap, dynamic_max_cap)
+    del raw_leverage_ratio
+
+    # --- 4. 灾难阻断器 (Survival Hard Stop) ---
+    atr = survival_atr(close, high, low, cfg)
+    crash_threshold, is_crash = survival_threshold(close, atr, hourly_ret, cfg)
+    del atr
+    hourly_ret = hourly_ret.astype(dtype, copy=False)
+    crash_threshold = crash_threshold.astype(dtype, copy=False)
+
+    out = {"hourly_ret": hourly_ret, "sigma_event": is_crash, "sl_threshold": crash_threshold}
+    if "regime_ma" in keep:
+        out["regime_ma"] = regime_ma.astype(dtype, copy=False)
+    if "dynamic_max_cap" in keep:
+        out["dynamic_max_cap"] = dynamic_max_cap
+    if "ann_vol_pct" in keep:
+        out["ann_vol_pct"] = ann_vol_pct
+    if "leverage_ratio" in keep:
+        out["leverage_ratio"] = np.abs(ideal_position)
+    if "is_meltdown" in keep:
+        out["is_meltdown"] = is_crash
+    del regime_ma, dynamic_max_cap, ann_vol_pct
+
+    ideal_position[is_crash] = 0.0
+
+    # --- 5. 缓冲器 (Buffer) ---
+    buffered_position = buffer_hysteresis(ideal_position, buffer).astype(dtype, copy=False)
+    out["position"] = shift_position(buffered_position)
+    if "raw_target" in keep:
+        out["raw_target"] = ideal_position
+    if "buffered_pos" in keep:
+        out["buffered_pos"] = buffered_position
+    return out
+
+
+def _log_ret(ret: np.ndarray) -> np.ndarray:
+    # float64 与原流水线写法一致 (逐位相同)；float32 下 1 + r 会吃掉 r 的低位，改用 log1p
+    if ret.dtype == np.float64:
+        return np.log(1 + ret)
+    return np.log1p(ret)
+
+
+def backtest_stage(close: pd.Series, open_, risk: dict, fee_rate: float, funding_rate: float, keep=(),
+                   config=None) -> dict:
+    """回测阶段 (与 run_vectorized_backtest 同一套逻辑)，risk 为 position_stage 的输出"""
+    c = close.to_numpy()
+    market_ret = risk["hourly_ret"]
+    position = risk["position"]
+    risk_mask = risk["sigma_event"]
+
+    # 灾难止损修正: 只在触发行上计算劣后成交价
+    adjusted_ret = market_ret
+    if risk_mask.any():
+        idx = np.flatnonzero(risk_mask)
+        prev_close = close.shift(1).to_numpy()[idx]
+        sl_values = risk["sl_threshold"][idx].astype(np.float64)
+        execution_price = np.minimum(np.asarray(open_)[idx] * (1.0 - sl_values), c[idx]) * 0.995
+        adjusted_ret = market_ret.copy()
+        adjusted_ret[idx] = (execution_price / prev_close) - 1.0
+
+    strat_ret_raw = position * adjusted_ret
+    del adjusted_ret
+    pos_change = np.abs(np.diff(position, prepend=position[:1]))
+    net_ret = strat_ret_raw - pos_change * fee_rate
+    del pos_change
+    net_ret -= np.abs(position) * funding_rate
+
+    initial_cap = resolve_config(config).INITIAL_CAPITAL
+    out = {"net_ret": net_ret}
+    if "strat_ret_raw" in keep:
+        out["strat_ret_raw"] = strat_ret_raw
+    del strat_ret_raw
+    if "market_ret" in keep:
+        out["market_ret"] = market_ret
+    # 净值始终在 float64 下累乘 (1 + r 先升精度，避免 float32 的 1e-7 舍入随 cumprod 累积)
+    if "equity" in keep:
+        out["equity"] = initial_cap * np.cumprod(np.add(1.0, net_ret, dtype=np.float64))
+    if "buy_hold_equity" in keep:
+        out["buy_hold_equity"] = initial_cap * np.cumprod(np.add(1.0, market_ret, dtype=np.float64))
+    if "net_log_ret" in keep:
+        out["net_log_ret"] = _log_ret(net_ret)
+    if "market_log_ret" in keep:
+        out["market_log_ret"] = _log_ret(market_ret)
+    return out
+
+
+def run_lean_pipeline(df: pd.DataFrame, columns=DEFAULT_COLUMNS, buffer=None, fee_rate=None,
+                      funding_rate=0.00001, config=None) -> pd.DataFrame:
+    """
+    精简模式全流程: 不复制 df，只返回 columns 指定的字段 (columns='all' 返回 LEAN_COLUMNS 全部)。
+    对应列与 calculate_scaled_forecast -> calculate_position_target -> run_vectorized_backtest 逐位一致。
+    config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+    cfg = resolve_config(config)
+    if columns == "all":
+        columns = LEAN_COLUMNS
+    unknown = set(columns) - set(LEAN_COLUMNS)
+    if unknown:
+        raise ValueError(f"未知字段: {sorted(unknown)}，可选: {LEAN_COLUMNS}")
+    if buffer is None:
+        buffer = getattr(cfg, 'POSITION_BUFFER', 0.1)
+    if fee_rate is None:
+        fee_rate = getattr(cfg, 'FEE_RATE', 0.0005)
+
+    close = df["close"]
+    with stage("alpha", rows=len(df), config=cfg):
+        result = forecast_stage(close, keep=columns, config=cfg)
+    with stage("risk", rows=len(df), config=cfg):
+        risk = position_stage(close, df["high"].to_numpy(), df["low"].to_numpy(), result["forecast"], buffer,
+                              keep=columns, config=cfg)
+    with stage("backtest", rows=len(df), config=cfg):
+        result.update(backtest_stage(close, df["open"].to_numpy(), risk, fee_rate, funding_rate, keep=columns,
+                                     config=cfg))
+    result.update(risk)
+    del risk
+    result["close"] = close.to_numpy()
+
+    return pd.DataFrame({name: result[name] for name in columns}, index=df.index, copy=False)
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from config import Config
+from jarvis_engine.alpha import load_price_data, compute_dtype, _forecast_volatility, _rsi_forecast, _trend_forecast
+from jarvis_engine.kernels import buffer_hysteresis_2d
+from jarvis_engine.bar_store import BarStore
+
+# ==========================================
+# 🧮 面板回测 (Panel / Multi-Asset)
+# ==========================================
+# 输入是对齐好的 (时间 x 品种) 价格矩阵，alpha -> risk -> backtest 全部按列向量化，
+# 一次跑完所有品种，而不是把单品种流水线循环 N 遍。
+# 每一列的结果与对该品种单独跑 calculate_scaled_forecast / calculate_position_target /
+# run_vectorized_backtest 一致 (上市前的空白行记为空仓)。
+# Config.COMPUTE_DTYPE='float32' 时各矩阵以 float32 存储，净值仍以 float64 累乘 (同 lean.py)。
+
+PANEL_FIELDS = ("open", "high", "low", "close")
+
+
+def build_panel(frames: dict, fields=PANEL_FIELDS) -> dict:
+    """
+    {symbol: 单品种 DataFrame} -> {field: (时间 x 品种) DataFrame}
+    时间轴取并集 (outer join)，缺失的 open/high/low 用 close 补齐。
+    """
+    panel = {}
+    for field in fields:
+        columns = {sym: (df[field] if field in df.columns else df["close"]) for sym, df in frames.items()}
+        panel[field] = pd.concat(columns, axis=1).sort_index()
+    return panel
+
+
+def load_panel(csv_paths: dict) -> dict:
+    """{symbol: csv 路径} -> 面板 (逐个走 load_price_data，命中二进制缓存)"""
+    frames = {}
+    for sym, path in csv_paths.items():
+        df = load_price_data(path)
+        if df.empty:
+            print(f"⚠️ {sym}: 数据为空，已跳过")
+            continue
+        frames[sym] = df[~df.index.duplicated(keep="last")]
+    return build_panel(frames)
+
+
+def load_store_panel(symbols, interval: str = "1h", start=None, end=None, store=None, config=None) -> dict:
+    """
+    从本地 K 线库 (bar_store.BarStore) 读取多品种同一时间窗口的面板，
+    每个品种只映射窗口内的字节 (对齐成矩阵时才会复制)。
+    config: 不给 store 时用它定位库目录 (None 时读全局 Config)
+    """
+    store = BarStore(config=config) if store is None else store
+    return build_panel(store.frames(symbols, interval, start, end))
+
+
+def _listed_mask(close: pd.DataFrame) -> np.ndarray:
+    """每个品种从第一根有效 K 线开始为 True"""
+    return close.ffill().notna().to_numpy()
+
+
+def calculate_panel_forecast(close: pd.DataFrame) -> pd.DataFrame:
+    """calculate_scaled_forecast 的面板版本，返回 (时间 x 品种) 的 forecast"""
+    dtype = compute_dtype()
+    trend = np.clip(_trend_forecast(close, _forecast_volatility(close).to_numpy()), -20, 20).astype(dtype, copy=False)
+    rsi = _rsi_forecast(close).clip(-20, 20).fillna(0).to_numpy().astype(dtype, copy=False)
+    w_trend = getattr(Config, 'TREND_WEIGHT', 0.9)
+    w_rsi = getattr(Config, 'RSI_WEIGHT', 0.1)
+
+    forecast = trend * w_trend + rsi * w_rsi
+    return pd.DataFrame(forecast, index=close.index, columns=close.columns)
+
+
+def calculate_panel_position(panel: dict, forecast: pd.DataFrame, buffer=None) -> dict:
+    """
+    calculate_position_target 的面板版本
+    返回 {'position', 'buffered_pos', 'sigma_event', 'sl_threshold', 'ann_vol_pct'} 矩阵
+    """
+    if buffer is None:
+        buffer = getattr(Config, 'POSITION_BUFFER', 0.1)
+    dtype = compute_dtype()
+    close = panel["close"]
+    c = close.to_numpy()
+    listed = _listed_mask(close)
+
+    # --- 1. 环境过滤器 (Regime Filter) ---
+    ma_window = getattr(Config, 'REGIME_MA_WINDOW', 4800)
+    regime_ma = close.rolling(window=ma_window).mean().to_numpy()
+    normal_cap = getattr(Config, 'MAX_LEVERAGE', 2.5)
+    bear_cap = getattr(Config, 'BEAR_MODE_MAX_LEVERAGE', 1.0)
+    dynamic_max_cap = np.where(c > regime_ma, normal_cap, bear_cap).astype(dtype, copy=False)
+
+    # --- 2. 波动率目标管理 (Vol Scaling) ---
+    # 与 pct_change 默认行为一致: 先向前填充再算收益；上市前的行不参与 EWMA
+    c_ffill = close.ffill()
+    hourly_ret = (c_ffill / c_ffill.shift(1) - 1).fillna(0)
+    long_term_vol = hourly_ret.where(listed).ewm(span=Config.VOL_LOOKBACK).std().fillna(0).to_numpy()
+    ann_vol_pct = long_term_vol * np.sqrt(365 * 24)
+    safe_vol = np.where(ann_vol_pct == 0, 1e-6, ann_vol_pct)
+    raw_leverage_ratio = (getattr(Config, 'TARGET_VOLATILITY', 0.8) / safe_vol).astype(dtype, copy=False)
+
+    # --- 3. 仓位计算 ---
+    ideal_position = np.clip((forecast.to_numpy() / 2.0) * raw_leverage_ratio, -dynamic_max_cap, dynamic_max_cap)
+
+    # --- 4. 灾难阻断器 (Survival Hard Stop) ---
+    h, l = panel["high"].to_numpy(), panel["low"].to_numpy()
+    pc = close.shift(1).fillna(close).to_numpy()
+    tr = pd.DataFrame(np.maximum(h - l, np.maximum(np.abs(h - pc), np.abs(l - pc))), index=close.index)
+    atr = tr.ewm(span=getattr(Config, 'SURVIVAL_ATR_WINDOW', 24)).mean().fillna(0).to_numpy()
+
+    multiplier = getattr(Config, 'SURVIVAL_ATR_MULTIPLIER', 4.5)
+    min_vol = getattr(Config, 'MIN_HOURLY_VOL', 0.005)
+    crash_threshold = np.maximum((atr * multiplier) / c, min_vol * multiplier)
+    is_crash = hourly_ret.to_numpy() < -crash_threshold
+    ideal_position = np.where(is_crash, 0.0, ideal_position)
+
+    # --- 5. 缓冲器 (Buffer) ---
+    buffered_position = buffer_hysteresis_2d(ideal_position, buffer).astype(dtype, copy=False)
+    position = np.zeros_like(buffered_position)
+    position[1:] = buffered_position[:-1]
+
+    wrap = lambda a: pd.DataFrame(a, index=close.index, columns=close.columns)
+    return {
+        "position": wrap(position),
+        "buffered_pos": wrap(buffered_position),
+        "sigma_event": wrap(is_crash),
+        "sl_threshold": wrap(crash_threshold.astype(dtype, copy=False)),
+        "ann_vol_pct": wrap(ann_vol_pct.astype(dtype, copy=False)),
+    }
+
+
+def run_panel_backtest(panel: dict, fee_rate=None, funding_rate=0.00001, buffer=None) -> dict:
+    """
+    面板全流程: forecast -> position -> 收益 / 费用 / 资金费 / 净值，全部一次性矩阵运算。
+    返回 dict: 各 (时间 x 品种) 矩阵 + 'portfolio_equity' (已上市品种等权、逐根再平衡)
+    """
+    if fee_rate is None:
+        fee_rate = getattr(Config, 'FEE_RATE', 0.0005)
+    dtype = compute_dtype()
+    close = panel["close"]
+    forecast = calculate_panel_forecast(close)
+    risk = calculate_panel_position(panel, forecast, buffer=buffer)
+
+    c = close.to_numpy()
+    listed = _listed_mask(close)
+    c_ffill = close.ffill().to_numpy()
+    prev_close = close.shift(1).to_numpy()
+    position = risk["position"].to_numpy()
+    risk_mask = risk["sigma_event"].to_numpy()
+
+    market_ret = np.empty_like(c)
+    market_ret[0] = 0.0
+    market_ret[1:] = c_ffill[1:] / c_ffill[:-1] - 1
+    market_ret = np.nan_to_num(market_ret, nan=0.0).astype(dtype, copy=False)
+
+    # 灾难止损修正: 劣后成交 + 0.5% 极端滑点
+    sl_threshold = risk["sl_threshold"].to_numpy().astype(np.float64, copy=False)
+    execution_price = np.minimum(panel["open"].to_numpy() * (1.0 - sl_threshold), c) * 0.995
+    adjusted_ret = np.where(risk_mask, execution_price / prev_close - 1.0, market_ret).astype(dtype, copy=False)
+
+    pos_change = np.abs(np.diff(position, axis=0, prepend=0.0))
+    net_ret = position * adjusted_ret - pos_change * fee_rate - np.abs(position) * funding_rate
+
+    initial_cap = Config.INITIAL_CAPITAL
+    equity = initial_cap * np.cumprod(np.add(1.0, net_ret, dtype=np.float64), axis=0)
+    buy_hold_equity = initial_cap * np.cumprod(np.add(1.0, market_ret, dtype=np.float64), axis=0)
+
+    n_listed = listed.sum(axis=1)
+    portfolio_ret = np.divide(np.where(listed, net_ret, 0.0).sum(axis=1, dtype=np.float64), n_listed,
+                              out=np.zeros(len(n_listed)), where=n_listed > 0)
+
+    wrap = lambda a: pd.DataFrame(a, index=close.index, columns=close.columns)
+    result = dict(risk)
+    result.update({
+        "forecast": forecast,
+        "market_ret": wrap(market_ret),
+        "net_ret": wrap(net_ret),
+        "equity": wrap(equity),
+        "buy_hold_equity": wrap(buy_hold_equity),
+        "portfolio_equity": pd.Series(initial_cap * np.cumprod(1 + portfolio_ret), index=close.index),
+    })
+    return result
@@ -0,0 +1,245 @@
+import json
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from jarvis_engine.alpha import load_price_data, resolve_config, compute_dtype, _forecast_volatility, _rsi_forecast, _trend_forecast
+from jarvis_engine.kernels import buffer_hysteresis
+from jarvis_engine.lean import (LEAN_COLUMNS, REPORT_COLUMNS, regime_cap, vol_scaling, survival_atr,
+                                survival_threshold, shift_position, backtest_stage)
+from jarvis_engine.metrics import performance_summary, trade_analytics
+from jarvis_engine.instrument import stage
+from jarvis_engine.result_cache import config_snapshot
+
+# ==========================================
+# 🕸️ 阶段依赖图 (Stage DAG) + 局部重算
+# ==========================================
+# 只改 POSITION_BUFFER / FEE_RATE 时，没必要重算预测信号、2400 根的环境均线和 ATR。
+# 这里把精简流水线拆成一张有向无环图，每个阶段声明:
+#   deps   上游阶段
+#   config 自己读取的 Config 字段
+# 阶段输出缓存在内存里，签名 = (自身 Config 字段的取值, 上游阶段的版本号)。
+# run() 时签名没变的阶段直接复用，变了的阶段重算并递增版本号，下游随之失效。
+#
+#   load ─┬─ volatility ── trend ──┐
+#         ├─ rsi ──────────────────┴─ forecast ─┐
+#         ├─ regime ────────────────────────────┤
+#         ├─ vol_scaling ───────────────────────┼─ target ── buffer ── backtest ── metrics
+#         └─ atr ── survival ───────────────────┘
+#
+# 数值与 run_lean_pipeline 逐位一致 (各阶段调用同一组函数，见 lean.py)。
+# 用法 (交互调参):
+#   dag = PipelineDAG(df)
+#   dag.run()                     # 首次全量
+#   Config.POSITION_BUFFER = 0.2
+#   dag.run()                     # 只重算 buffer -> backtest -> metrics
+#   df_res = dag.frame(REPORT_COLUMNS); metrics = dag.outputs("metrics")["metrics"]
+# 显式配置: PipelineDAG(df, config=Config.freeze())，各阶段只读这份配置；
+# 冻结的配置不会变，换参数时赋值新的快照即可: dag.config = Config.freeze(POSITION_BUFFER=0.2); dag.run()
+
+# 所有阶段共同依赖的字段 (存储精度影响每个阶段的输出)
+GLOBAL_FIELDS = ("COMPUTE_DTYPE",)
+
+Stage = namedtuple("Stage", ["deps", "config", "fn"])
+
+
+def _load(dag, up):
+    df = dag.df if dag.df is not None else load_price_data(dag.cfg.DATA_PATH)
+    return {"df": df, "close": df["close"], "open": df["open"].to_numpy(), "high": df["high"].to_numpy(),
+            "low": df["low"].to_numpy()}
+
+
+def _volatility(dag, up):
+    # float64 留给趋势信号做分母，落地成列时再按 COMPUTE_DTYPE 转换 (与 forecast_stage 一致)
+    return {"volatility": _forecast_volatility(up["load"]["close"], config=dag.cfg).to_numpy()}
+
+
+def _trend(dag, up):
+    trend = _trend_forecast(up["load"]["close"], up["volatility"]["volatility"], config=dag.cfg)
+    return {"trend_forecast": np.clip(trend, -20, 20).astype(compute_dtype(dag.cfg), copy=False)}
+
+
+def _rsi(dag, up):
+    rsi = _rsi_forecast(up["load"]["close"], config=dag.cfg).clip(-20, 20).fillna(0).to_numpy()
+    return {"rsi_forecast": rsi.astype(compute_dtype(dag.cfg), copy=False)}
+
+
+def _forecast(dag, up):
+    w_trend = getattr(dag.cfg, 'TREND_WEIGHT', 0.9)
+    w_rsi = getattr(dag.cfg, 'RSI_WEIGHT', 0.1)
+    return {"forecast": up["trend"]["trend_forecast"] * w_trend + up["rsi"]["rsi_forecast"] * w_rsi}
+
+
+def _regime(dag, up):
+    regime_ma, dynamic_max_cap = regime_cap(up["load"]["close"], config=dag.cfg)
+    return {"regime_ma": regime_ma.astype(compute_dtype(dag.cfg), copy=False), "dynamic_max_cap": dynamic_max_cap}
+
+
+def _vol_scaling(dag, up):
+    hourly_ret, ann_vol_pct, raw_leverage_ratio = vol_scaling(up["load"]["close"], config=dag.cfg)
+    return {"hourly_ret": hourly_ret, "ann_vol_pct": ann_vol_pct, "raw_leverage_ratio": raw_leverage_ratio}
+
+
+def _atr(dag, up):
+    load = up["load"]
+    return {"atr": survival_atr(load["close"], load["high"], load["low"], config=dag.cfg)}
+
+
+def _survival(dag, up):
+    hourly_ret = up["vol_scaling"]["hourly_ret"]
+    crash_threshold, is_crash = survival_threshold(up["load"]["close"], up["atr"]["atr"], hourly_ret,
+                                                  config=dag.cfg)
+    dtype = compute_dtype(dag.cfg)
+    return {"sl_threshold": crash_threshold.astype(dtype, copy=False), "sigma_event": is_crash,
+            "market_ret": hourly_ret.astype(dtype, copy=False)}
+
+
+def _target(dag, up):
+    cap = up["regime"]["dynamic_max_cap"]
+    ideal_position = np.clip((up["forecast"]["forecast"] / 2.0) * up["vol_scaling"]["raw_leverage_ratio"], -cap, cap)
+    leverage_ratio = np.abs(ideal_position)
+    ideal_position[up["survival"]["sigma_event"]] = 0.0
+    return {"raw_target": ideal_position, "leverage_ratio": leverage_ratio}
+
+
+def _buffer(dag, up):
+    buffered_position = buffer_hysteresis(up["target"]["raw_target"], getattr(dag.cfg, 'POSITION_BUFFER', 0.1))
+    buffered_position = buffered_position.astype(compute_dtype(dag.cfg), copy=False)
+    return {"buffered_pos": buffered_position, "position": shift_position(buffered_position)}
+
+
+def _backtest(dag, up):
+    survival = up["survival"]
+    risk = {"hourly_ret": survival["market_ret"], "sigma_event": survival["sigma_event"],
+            "sl_threshold": survival["sl_threshold"], "position": up["buffer"]["position"]}
+    keep = ("strat_ret_raw", "equity", "buy_hold_equity", "net_log_ret", "market_log_ret")
+    return backtest_stage(up["load"]["close"], up["load"]["open"], risk, getattr(dag.cfg, 'FEE_RATE', 0.0005),
+                          getattr(dag.cfg, 'FUNDING_RATE', 0.00001), keep=keep, config=dag.cfg)
+
+
+def _metrics(dag, up):
+    bt, index = up["backtest"], up["load"]["df"].index
+    position = up["buffer"]["position"]
+    perf = performance_summary(bt["equity"], returns=bt["net_log_ret"], position=position,
+                               benchmark=bt["buy_hold_equity"], benchmark_returns=bt["market_log_ret"])
+    frame = pd.DataFrame({"position": position, "net_log_ret": bt["net_log_ret"]}, index=index, copy=False)
+    _, trade_stats = trade_analytics(frame)
+    perf.update({f"trade_{k}": v for k, v in trade_stats.items()})
+    return {"metrics": {k: (v.item() if isinstance(v, np.generic) else v) for k, v in perf.items()}}
+
+
+# 阶段表 (按拓扑序排列)
+STAGES = {
+    "load": Stage((), ("DATA_PATH",), _load),
+    "volatility": Stage(("load",), ("VOL_LOOKBACK",), _volatility),
+    "trend": Stage(("load", "volatility"), ("STRATEGY_PARAMS", "TREND_INTERNAL_WEIGHTS"), _trend),
+    "rsi": Stage(("load",), ("RSI_PERIOD", "RSI_SCALAR"), _rsi),
+    "forecast": Stage(("trend", "rsi"), ("TREND_WEIGHT", "RSI_WEIGHT"), _forecast),
+    "regime": Stage(("load",), ("REGIME_MA_WINDOW", "MAX_LEVERAGE", "BEAR_MODE_MAX_LEVERAGE"), _regime),
+    "vol_scaling": Stage(("load",), ("VOL_LOOKBACK", "TARGET_VOLATILITY"), _vol_scaling),
+    "atr": Stage(("load",), ("SURVIVAL_ATR_WINDOW",), _atr),
+    "survival": Stage(("load", "atr", "vol_scaling"), ("SURVIVAL_ATR_MULTIPLIER", "MIN_HOURLY_VOL"), _survival),
+    "target": Stage(("forecast", "vol_scaling", "regime", "survival"), (), _target),
+    "buffer": Stage(("target",), ("POSITION_BUFFER",), _buffer),
+    "backtest": Stage(("load", "survival", "buffer"), ("FEE_RATE", "FUNDING_RATE", "INITIAL_CAPITAL"), _backtest),
+    "metrics": Stage(("load", "backtest", "buffer"), (), _metrics),
+}
+
+# 每个输出字段由哪个阶段产出 (frame() 按需只跑到对应阶段)
+COLUMN_STAGE = {
+    "close": "load", "volatility": "volatility", "trend_forecast": "trend", "rsi_forecast": "rsi",
+    "forecast": "forecast", "regime_ma": "regime", "dynamic_max_cap": "regime", "ann_vol_pct": "vol_scaling",
+    "leverage_ratio": "target", "sl_threshold": "survival", "sigma_event": "survival", "is_meltdown": "survival",
+    "raw_target": "target", "buffered_pos": "buffer", "position": "buffer", "market_ret": "survival",
+    "strat_ret_raw": "backtest", "net_ret": "backtest", "equity": "backtest", "buy_hold_equity": "backtest",
+    "net_log_ret": "backtest", "market_log_ret": "backtest",
+}
+
+
+class PipelineDAG:
+    """
+    带缓存的阶段依赖图。df 为 None 时由 load 阶段按 DATA_PATH 读取 (路径变化才重读，
+    文件内容变化请调用 invalidate('load'))。
+    config: 显式配置 (Config.freeze(...))，None 时每次 run() 读全局 Config。
+    """
+
+    def __init__(self, df: pd.DataFrame = None, stages=None, config=None):
+        self.df = df
+        self.config = config
+        self.stages = STAGES if stages is None else stages
+        if df is not None:
+            # 直接给了数据时 load 阶段不依赖 DATA_PATH
+            self.stages = dict(self.stages, load=self.stages["load"]._replace(config=()))
+        self._cache = {}        # name -> (signature, version, outputs)
+        self._version = 0       # 全局递增，保证 invalidate 之后下游也能看到版本变化
+        self.last_run = []      # 最近一次 run() 实际重算的阶段 (调试 / 计时用)
+
+    @property
+    def cfg(self):
+        """各阶段读取的配置"""
+        return resolve_config(self.config)
+
+    def _signature(self, name: str):
+        spec = self.stages[name]
+        own = json.dumps(config_snapshot(GLOBAL_FIELDS + spec.config, self.cfg), sort_keys=True, default=repr)
+        return own, tuple(self._cache[dep][1] for dep in spec.deps)
+
+    def _ensure(self, name: str, seen: set):
+        if name in seen:
+            return
+        spec = self.stages[name]
+        for dep in spec.deps:
+            self._ensure(dep, seen)
+        seen.add(name)
+
+        signature = self._signature(name)
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == signature:
+            return
+        up = {dep: self._cache[dep][2] for dep in spec.deps}
+        with stage(name, config=self.cfg):
+            outputs = spec.fn(self, up)
+        self._version += 1
+        self._cache[name] = (signature, self._version, outputs)
+        self.last_run.append(name)
+
+    def run(self, targets=("metrics",)) -> list:
+        """把 targets 及其上游更新到当前 Config，返回本次重算的阶段名"""
+        self.last_run = []
+        seen = set()
+        for name in targets:
+            self._ensure(name, seen)
+        return list(self.last_run)
+
+    def outputs(self, name: str) -> dict:
+        """某个阶段的输出 (先按当前 Config 更新)"""
+        self.run((name,))
+        return self._cache[name][2]
+
+    def frame(self, columns=REPORT_COLUMNS) -> pd.DataFrame:
+        """与 run_lean_pipeline(df, columns) 同样的结果表 (columns='all' 返回 LEAN_COLUMNS 全部)"""
+        if columns == "all":
+            columns = LEAN_COLUMNS
+        unknown = set(columns) - set(COLUMN_STAGE)
+        if unknown:
+            raise ValueError(f"未知字段: {sorted(unknown)}，可选: {tuple(COLUMN_STAGE)}")
+        self.run(tuple(dict.fromkeys(COLUMN_STAGE[c] for c in columns)))
+
+        data = {}
+        for col in columns:
+            outputs = self._cache[COLUMN_STAGE[col]][2]
+            if col == "close":
+                data[col] = outputs["close"].to_numpy()
+            elif col == "is_meltdown":
+                data[col] = outputs["sigma_event"]
+            elif col == "volatility":
+                data[col] = outputs[col].astype(compute_dtype(self.cfg), copy=False)
+            else:
+                data[col] = outputs[col]
+        return pd.DataFrame(data, index=self._cache["load"][2]["df"].index, copy=False)
+
+    def invalidate(self, name: str = None):
+        """丢弃某个阶段 (及其下游，通过版本号自然失效) 的缓存；name=None 清空全部"""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
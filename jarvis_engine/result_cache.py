@@ -0,0 +1,176 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from config import Config
+from jarvis_engine.data_cache import load_frame, save_frame, _source_fingerprint, _prune_stale_tmp
+
+# ==========================================
+# 🗃️ 回测结果缓存 (Result Cache)
+# ==========================================
+# Config 与数据都没变时，mission_start / 参数扫描没必要从头再算一遍。
+# 缓存键 = 影响结果的 Config 字段 (RESULT_FIELDS) 的哈希 + 数据指纹:
+#   - CSV: 绝对路径 + 文件大小 + mtime (与列式数据缓存同一指纹，不用读文件)
+#   - 内存中的 DataFrame: 时间索引与 OHLC 列的字节哈希 (frame_fingerprint)
+# 目录结构 (与数据缓存同一种列式格式，读取走内存映射):
+#   RESULT_CACHE_DIR (默认 CACHE_DIR/results)/<key>/
+#       meta.json      列信息 + 指标 (metrics) + 生成时的 Config 字段
+#       index.npy / c*.npy
+# 容量上限 RESULT_CACHE_MAX_MB，超出后按最近使用时间 (meta.json 的 mtime，命中时刷新) 淘汰最旧的条目 (LRU)。
+# 流水线逻辑改变 (结果口径不同) 时递增 RESULT_CACHE_VERSION，旧缓存自动失效。
+
+RESULT_CACHE_VERSION = 1
+
+# 参与缓存键的 Config 字段: Alpha / 风控 / 仿真参数 + 影响输出的执行模式
+RESULT_FIELDS = (
+    "STRATEGY_PARAMS", "TREND_INTERNAL_WEIGHTS", "WEIGHTS", "VOL_LOOKBACK", "RSI_PERIOD", "RSI_SCALAR",
+    "TREND_WEIGHT", "RSI_WEIGHT", "TARGET_VOLATILITY", "MAX_LEVERAGE", "REGIME_MA_WINDOW",
+    "BEAR_MODE_MAX_LEVERAGE", "SURVIVAL_ATR_WINDOW", "SURVIVAL_ATR_MULTIPLIER", "MIN_HOURLY_VOL",
+    "POSITION_BUFFER", "FEE_RATE", "INITIAL_CAPITAL", "COMPUTE_DTYPE", "LEAN_PIPELINE",
+)
+
+_META_FILE = "meta.json"
+
+
+def _cache_root(config=None) -> str:
+    cfg = Config if config is None else config
+    root = getattr(cfg, 'RESULT_CACHE_DIR', None)
+    if root:
+        return root
+    return os.path.join(getattr(cfg, 'CACHE_DIR', os.path.join(cfg.BASE_DIR, "data_cache")), "results")
+
+
+def config_snapshot(fields=RESULT_FIELDS, config=None) -> dict:
+    """配置中参与缓存键的字段 (缺省字段记为 None)；config 为 None 时读全局 Config"""
+    cfg = Config if config is None else config
+    return {name: getattr(cfg, name, None) for name in fields}
+
+
+def config_fingerprint(fields=RESULT_FIELDS, config=None) -> str:
+    raw = json.dumps(config_snapshot(fields, config), sort_keys=True, default=repr)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def frame_fingerprint(df: pd.DataFrame, columns=("open", "high", "low", "close")) -> str:
+    """内存中行情数据的指纹: 时间索引 + OHLC 列的原始字节 (几十万行在毫秒级)"""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(df.index.asi8).tobytes())
+    for col in columns:
+        if col in df.columns:
+            h.update(col.encode("utf-8"))
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()[:16]
+
+
+def result_key(data, config=None) -> str:
+    """data: CSV 路径或行情 DataFrame -> 缓存键 (文件不存在时返回 None)；config 为显式配置 (可选)"""
+    if isinstance(data, pd.DataFrame):
+        data_fp = frame_fingerprint(data)
+    else:
+        try:
+            data_fp = _source_fingerprint(data)
+        except OSError:
+            return None
+    raw = f"{config_fingerprint(config=config)}|{data_fp}|v{RESULT_CACHE_VERSION}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def load_result(key: str, with_frame: bool = True, config=None):
+    """
+    命中返回 (df_res, metrics)，未命中 / 损坏返回 None。
+    with_frame=False 时只读 meta.json，df_res 为 None (只要指标的批量任务)。
+    config: 显式配置 (决定缓存目录)，None 时读全局 Config
+    """
+    if key is None:
+        return None
+    entry = os.path.join(_cache_root(config), key)
+    meta_path = os.path.join(entry, _META_FILE)
+    if with_frame:
+        loaded = load_frame(entry)
+        if loaded is None:
+            return None
+        df_res, meta = loaded
+    else:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        df_res = None
+    if meta.get("result_version") != RESULT_CACHE_VERSION:
+        return None
+    try:
+        os.utime(meta_path)  # 刷新最近使用时间 (LRU)
+    except OSError:
+        pass
+    return df_res, meta.get("metrics", {})
+
+
+def store_result(key: str, df_res: pd.DataFrame, metrics: dict, config=None) -> bool:
+    """写入一条结果并按容量上限淘汰旧条目 (开关 / 目录 / 容量都读 config，None 时读全局 Config)"""
+    cfg = Config if config is None else config
+    if key is None or not getattr(cfg, 'USE_RESULT_CACHE', True):
+        return False
+    root = _cache_root(cfg)
+    os.makedirs(root, exist_ok=True)
+    extra = {
+        "result_version": RESULT_CACHE_VERSION,
+        "metrics": metrics,
+        "config": json.loads(json.dumps(config_snapshot(config=config), default=repr)),
+    }
+    ok = save_frame(os.path.join(root, key), df_res, extra)
+    if ok:
+        evict(getattr(cfg, 'RESULT_CACHE_MAX_MB', 512) * 1024 * 1024, cfg)
+    return ok
+
+
+def _entry_size(entry: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+
+
+def evict(max_bytes: int, config=None):
+    """总大小超过 max_bytes 时，按最近使用时间从旧到新删除条目 (先回收崩溃进程留下的临时目录)"""
+    root = _cache_root(config)
+    _prune_stale_tmp(root)
+    try:
+        names = [n for n in os.listdir(root) if ".tmp" not in n]
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        entry = os.path.join(root, name)
+        try:
+            entries.append((os.stat(os.path.join(entry, _META_FILE)).st_mtime_ns, _entry_size(entry), entry))
+        except OSError:
+            shutil.rmtree(entry, ignore_errors=True)  # 半成品 / 损坏条目
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def cached_run(data, compute, with_frame: bool = True, config=None):
+    """
+    参数扫描用的包装: 命中直接返回 (df_res, metrics)；否则调用 compute() -> (df_res, metrics) 并写入缓存。
+    data 为 CSV 路径或行情 DataFrame (只用于算指纹)；调用前按需修改 Config 字段，
+    或传入显式配置 config (Config.freeze(...)，compute 里同样用它)。
+    """
+    use_cache = getattr(Config if config is None else config, 'USE_RESULT_CACHE', True)
+    key = result_key(data, config) if use_cache else None
+    hit = load_result(key, with_frame=with_frame, config=config)
+    if hit is not None:
+        return hit
+    df_res, metrics = compute()
+    if use_cache:
+        store_result(key, df_res, metrics, config)
+    return df_res, metrics
+
+
+def clear_results(config=None):
+    """删除全部结果缓存"""
+    shutil.rmtree(_cache_root(config), ignore_errors=True)
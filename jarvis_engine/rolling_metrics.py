@@ -0,0 +1,220 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 📉 滚动绩效指标 (Rolling Performance Metrics)
+# ==========================================
+# 监控用的 30 / 90 / 365 天滚动 Sharpe / Sortino / 波动率 / 回撤。
+# 每个窗口逐个重算是 O(n·w)；这里全部做到 O(n):
+#   - Sharpe / Sortino / 波动率: 前缀和 (收益、收益平方、负收益平方、负收益个数)，窗口统计量 = 两个前缀和之差
+#   - 回撤: 当前净值相对窗口内最高点的回撤，窗口最大值用单调队列 (pandas rolling max 同一算法)
+# RollingPerformance 是同一套指标的逐点更新版本 (实盘每来一根 K 线 O(1) 均摊)，与批量版在浮点误差以内一致。
+# 窗口内收益全部相同 (停盘 / 空仓时的 0 收益) 时两边都把方差精确置 0: 前缀和相减、Welford 增删的残差
+# 会留下 1e-20 量级的假方差，除出来就是有限的 Sharpe；这里显式识别平坦窗口，输出 Sharpe = NaN、波动率 = 0。
+#
+# 口径与 jarvis_engine.metrics 一致:
+#   Sharpe = mean / std(ddof=1) * sqrt(年化周期数)
+#   Sortino = 年化均值 / (sqrt(mean(负收益^2)) * sqrt(年化周期数))
+#   窗口未满 (min_periods = window) 时输出 NaN。
+
+ROLLING_FIELDS = ("sharpe", "sortino", "volatility", "drawdown")
+
+
+def bars_per_day(index) -> float:
+    """由时间索引的中位间隔推算每天的 K 线数 (1h -> 24)"""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return 24.0
+    step = np.median(np.diff(index.asi8))
+    return 86400e9 / step if step > 0 else 24.0
+
+
+def _window_sum(prefix: np.ndarray, window: int) -> np.ndarray:
+    """prefix 为前面补 0 的累加和，返回每个位置结尾的 window 长度窗口之和 (窗口未满为 NaN)"""
+    out = np.full(len(prefix) - 1, np.nan)
+    if window <= len(out):
+        out[window - 1:] = prefix[window:] - prefix[:-window]
+    return out
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    out = np.empty(len(values) + 1)
+    out[0] = 0.0
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def rolling_return_stats(net_ret, window: int, periods_per_year: float = 24 * 365) -> dict:
+    """
+    滚动 Sharpe / Sortino / 年化波动率 (O(n) 前缀和)
+    NaN 收益按缺失处理 (不计入样本数)。
+    """
+    r = np.asarray(net_ret, dtype=np.float64)
+    valid = ~np.isnan(r)
+    # 先减去全局均值再累加: 方差对平移不变，前缀和量级变小，相减时的抵消误差也更小
+    shift = r[valid].mean() if valid.any() else 0.0
+    x = np.where(valid, r - shift, 0.0)
+    neg = valid & (r < 0)
+
+    n = _window_sum(_prefix(valid.astype(np.float64)), window)
+    s1 = _window_sum(_prefix(x), window)
+    s2 = _window_sum(_prefix(x * x), window)
+    down_sq = _window_sum(_prefix(np.where(neg, r * r, 0.0)), window)
+    down_n = _window_sum(_prefix(neg.astype(np.float64)), window)
+
+    # 平坦窗口: 最近一次 "有效收益与前一个有效收益不同" 时，前一个有效收益已经在窗口之外
+    pos = np.arange(len(r))
+    filled = pd.Series(r).ffill().to_numpy()
+    prev_valid = np.empty(len(r))
+    prev_valid[:1] = np.nan
+    prev_valid[1:] = pd.Series(np.where(valid, pos, np.nan)).ffill().to_numpy()[:-1]
+    changed = valid & ~np.isnan(prev_valid)
+    changed[1:] &= filled[1:] != filled[:-1]
+    last_break = pd.Series(np.where(changed, prev_valid, np.nan)).ffill().fillna(-1).to_numpy()
+    flat = (last_break < pos - window + 1) & ~np.isnan(n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(flat, filled, s1 / n + shift)
+        var = np.where(flat, 0.0, (s2 - s1 * s1 / n) / (n - 1))
+        std = np.sqrt(np.maximum(var, 0.0))
+        std[n < 2] = np.nan
+        sharpe = np.where(std > 0, mean / std * math.sqrt(periods_per_year), np.nan)
+        downside_std = np.sqrt(down_sq / down_n) * math.sqrt(periods_per_year)
+        sortino = np.where((down_n > 0) & (downside_std > 0), mean * periods_per_year / downside_std, np.nan)
+    sortino[np.isnan(n)] = np.nan
+    return {"sharpe": sharpe, "sortino": sortino, "volatility": std * math.sqrt(periods_per_year)}
+
+
+def rolling_drawdown(equity, window: int) -> np.ndarray:
+    """当前净值相对最近 window 根 K 线内最高点的回撤 (负数)，窗口最大值 O(n) 单调队列"""
+    equity = pd.Series(np.asarray(equity, dtype=np.float64))
+    peak = equity.rolling(window, min_periods=window).max().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return equity.to_numpy() / peak - 1.0
+
+
+def rolling_metrics(df_res: pd.DataFrame, windows_days=(30, 90, 365), ret_col=None) -> pd.DataFrame:
+    """
+    回测结果 -> 滚动指标表，列名形如 sharpe_30d / sortino_30d / volatility_30d / drawdown_30d。
+    收益默认取 net_ret (run_vectorized_backtest)，没有时退回 net_log_ret (精简流水线的报告列)。
+    """
+    if ret_col is None:
+        ret_col = "net_ret" if "net_ret" in df_res.columns else "net_log_ret"
+    per_day = bars_per_day(df_res.index)
+    periods_per_year = per_day * 365
+    net_ret = df_res[ret_col].to_numpy()
+    equity = df_res["equity"].to_numpy()
+
+    out = {}
+    for days in windows_days:
+        window = max(int(round(days * per_day)), 2)
+        stats = rolling_return_stats(net_ret, window, periods_per_year)
+        for name in ("sharpe", "sortino", "volatility"):
+            out[f"{name}_{days}d"] = stats[name]
+        out[f"drawdown_{days}d"] = rolling_drawdown(equity, window)
+    return pd.DataFrame(out, index=df_res.index)
+
+
+class RollingPerformance:
+    """
+    滚动指标的逐点更新版本: 每根 K 线调用 update(net_ret, equity) -> {sharpe, sortino, volatility, drawdown}
+    --------------------------------------------
+    内部状态:
+      - 收益环形缓冲 + Welford 增删 (均值 / 平方差和，与 pandas rolling var 同一递推)
+      - 最近一次收益变化前的那个有效收益的位置 (已移出窗口时方差精确置 0，消除增删递推的残差)
+      - 负收益平方和 / 个数
+      - 净值单调递减队列 (队首即窗口最大值)
+    """
+
+    def __init__(self, window: int, periods_per_year: float = 24 * 365):
+        self.window = int(window)
+        self.ann = math.sqrt(periods_per_year)
+        self.periods_per_year = periods_per_year
+        self.returns = deque()
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.down_sq = 0.0
+        self.down_n = 0
+        self.peaks = deque()   # (序号, 净值)，净值单调递减
+        self.i = 0
+        self.last = float("nan")   # 最近一个有效收益
+        self.last_i = -1           # 它的序号
+        self.break_i = -1          # 最近一次收益变化时，前一个 (不同的) 有效收益的序号
+
+    def _add(self, r: float):
+        if r == r:
+            self.nobs += 1
+            delta = r - self.mean
+            self.mean += delta / self.nobs
+            self.ssqdm += delta * (r - self.mean)
+            if r < 0:
+                self.down_sq += r * r
+                self.down_n += 1
+
+    def _remove(self, r: float):
+        if r == r:
+            self.nobs -= 1
+            if self.nobs:
+                delta = r - self.mean
+                self.mean -= delta / self.nobs
+                self.ssqdm = max(self.ssqdm - delta * (r - self.mean), 0.0)
+            else:
+                self.mean = self.ssqdm = 0.0
+            if r < 0:
+                self.down_sq -= r * r
+                self.down_n -= 1
+                if not self.down_n:
+                    self.down_sq = 0.0
+
+    def update(self, net_ret: float, equity: float) -> dict:
+        net_ret, equity = float(net_ret), float(equity)
+        if len(self.returns) == self.window:
+            self._remove(self.returns.popleft())
+        self.returns.append(net_ret)
+        self._add(net_ret)
+        if net_ret == net_ret:
+            if net_ret != self.last and self.last_i >= 0:
+                self.break_i = self.last_i
+            self.last, self.last_i = net_ret, self.i
+        if self.nobs and self.break_i <= self.i - len(self.returns):
+            # 窗口内有效收益全部相同: 均值 / 方差取精确值，不让递推残差留下假方差
+            self.mean, self.ssqdm = self.last, 0.0
+
+        # 单调队列: 队尾比新值小的都不可能再成为窗口最大值
+        peaks = self.peaks
+        if equity == equity:
+            while peaks and peaks[-1][1] <= equity:
+                peaks.pop()
+            peaks.append((self.i, equity))
+        while peaks and peaks[0][0] <= self.i - self.window:
+            peaks.popleft()
+        self.i += 1
+        return self.value(equity)
+
+    def value(self, equity: float) -> dict:
+        nan = float("nan")
+        if self.i < self.window:
+            return {name: nan for name in ROLLING_FIELDS}
+        std = math.sqrt(max(self.ssqdm / (self.nobs - 1), 0.0)) if self.nobs > 1 else nan
+        mean = self.mean if self.nobs else nan
+        sharpe = mean / std * self.ann if std > 0 else nan
+        sortino = nan
+        if self.down_n > 0:
+            downside_std = math.sqrt(max(self.down_sq, 0.0) / self.down_n) * self.ann
+            if downside_std > 0:
+                sortino = mean * self.periods_per_year / downside_std
+        peak = self.peaks[0][1] if self.peaks else nan
+        return {
+            "sharpe": sharpe,
+            "sortino": sortino,
+            "volatility": std * self.ann,
+            "drawdown": equity / peak - 1.0 if peak == peak else nan,
+        }
+
+    def update_many(self, net_ret, equity) -> pd.DataFrame:
+        """按顺序回放 (预热 / 对拍用)，返回每根 K 线的指标"""
+        rows = [self.update(r, e) for r, e in zip(np.asarray(net_ret, dtype=np.float64).tolist(),
+                                                     np.asarray(equity, dtype=np.float64).tolist())]
+        return pd.DataFrame(rows, columns=list(ROLLING_FIELDS))
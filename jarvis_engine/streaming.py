@@ -0,0 +1,382 @@
+import math
+from collections import deque
+import numpy as np
+from config import Config
+
+# ==========================================
+# 📡 流式引擎 (Streaming / Online)
+# ==========================================
+# 实盘每来一根新 K 线只需 O(1) 更新，而不是用 pandas 把整段历史重算一遍。
+# 下面的基础算子逐行复刻 pandas 的 Cython 递推 (ewm / ewm std / rolling mean)，
+# 包括 center-of-mass 换算、常数序列保护和 Kahan 补偿求和，
+# 因此与批量版本的输出在浮点误差以内一致 (实测通常逐位相同)。
+
+_NAN = float("nan")
+
+
+def _com_to_alpha(span=None, alpha=None) -> float:
+    """与 pandas get_center_of_mass + ewm 内核一致的 alpha 换算"""
+    if span is not None:
+        com = (span - 1) / 2.0
+    else:
+        com = (1 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+def _safe_div(a: float, b: float) -> float:
+    """numpy 语义的除法: x/0 -> ±inf, 0/0 -> NaN (Python float 会直接抛异常)"""
+    if b == 0.0:
+        if a != a or a == 0.0:
+            return _NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _clip(value: float, lower: float, upper: float) -> float:
+    if value != value:
+        return value
+    return min(max(value, lower), upper)
+
+
+def _bar_value(bar, key="close") -> float:
+    """bar 可以是数字 (收盘价) 或带字段的映射 / Series"""
+    if isinstance(bar, (int, float, np.floating, np.integer)):
+        return float(bar)
+    return float(bar[key])
+
+
+class EwmMean:
+    """pandas Series.ewm(...).mean() 的逐点版本 (ignore_na=False, min_periods=0)"""
+
+    def __init__(self, span=None, alpha=None, adjust=True):
+        a = _com_to_alpha(span, alpha)
+        self.old_wt_factor = 1.0 - a
+        self.new_wt = 1.0 if adjust else a
+        self.adjust = adjust
+        self.weighted = _NAN
+        self.old_wt = 1.0
+
+    def update(self, cur: float) -> float:
+        weighted = self.weighted
+        if weighted == weighted:
+            self.old_wt *= self.old_wt_factor
+            if cur == cur:
+                # 常数序列保护 (与 pandas 相同)
+                if weighted != cur:
+                    weighted = self.old_wt * weighted + self.new_wt * cur
+                    weighted /= (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        self.weighted = weighted
+        return weighted
+
+
+class EwmStd:
+    """pandas Series.ewm(span).std() 的逐点版本 (adjust=True, bias=False)"""
+
+    def __init__(self, span=None, alpha=None):
+        a = _com_to_alpha(span, alpha)
+        self.old_wt_factor = 1.0 - a
+        self.new_wt = 1.0
+        self.mean = _NAN
+        self.cov = 0.0
+        self.sum_wt = 1.0
+        self.sum_wt2 = 1.0
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, cur: float) -> float:
+        is_obs = cur == cur
+        self.nobs += is_obs
+        mean = self.mean
+        if mean == mean:
+            self.sum_wt *= self.old_wt_factor
+            self.sum_wt2 *= self.old_wt_factor * self.old_wt_factor
+            self.old_wt *= self.old_wt_factor
+            if is_obs:
+                old_mean = mean
+                if mean != cur:
+                    mean = (self.old_wt * old_mean + self.new_wt * cur) / (self.old_wt + self.new_wt)
+                self.cov = ((self.old_wt * (self.cov + (old_mean - mean) * (old_mean - mean)))
+                            + self.new_wt * ((cur - mean) * (cur - mean))) / (self.old_wt + self.new_wt)
+                self.sum_wt += self.new_wt
+                self.sum_wt2 += self.new_wt * self.new_wt
+                self.old_wt += self.new_wt
+            self.mean = mean
+        elif is_obs:
+            self.mean = cur
+
+        if self.nobs < 1:
+            return _NAN
+        numerator = self.sum_wt * self.sum_wt
+        denominator = numerator - self.sum_wt2
+        if denominator <= 0:
+            return _NAN
+        var = (numerator / denominator) * self.cov
+        # 与 pandas zsqrt 一致: 负数 (舍入误差) 记为 0, NaN 保持 NaN
+        return 0.0 if var < 0 else math.sqrt(var)
+
+
+class RollingMean:
+    """
+    pandas Series.rolling(window).mean() 的逐点版本 (min_periods = window)
+    环形缓冲 + 运行和，加/减各自带 Kahan 补偿，与 pandas roll_mean 相同。
+    """
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self.buffer = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = None
+
+    def _add(self, val):
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            if val == self.prev_value:
+                self.same_count += 1
+            else:
+                self.same_count = 1
+            self.prev_value = val
+
+    def _remove(self, val):
+        if val == val:
+            self.nobs -= 1
+            y = -val - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct -= 1
+
+    def update(self, val: float) -> float:
+        if self.prev_value is None or self.window == 1:
+            # 首个窗口 (pandas 的 setup 分支): 状态清零
+            self.nobs = self.neg_ct = 0
+            self.sum_x = self.comp_add = self.comp_remove = 0.0
+            self.same_count = 0
+            self.prev_value = val
+            self.buffer.clear()
+        elif len(self.buffer) == self.window:
+            self._remove(self.buffer.popleft())
+        self.buffer.append(val)
+        self._add(val)
+
+        nobs = self.nobs
+        if nobs < self.window or nobs == 0:
+            return _NAN
+        result = self.sum_x / nobs
+        if self.same_count >= nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class StreamingForecast:
+    """
+    calculate_scaled_forecast 的流式版本
+    --------------------------------------------
+    每根新 K 线调用一次 update(bar) -> forecast，内部只保存:
+      - 各 EWMA span 的均值状态 + 价格 EWMA 标准差 (含 ffill 的上一次有效值)
+      - Wilder RSI 的 gain / loss EWMA
+      - RSI 12 根平滑窗口 + 输出端 24-span EWMA
+    时间与内存都是 O(1) (与历史长度无关)。
+    config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+
+    def __init__(self, config=None):
+        cfg = Config if config is None else config
+        vol_span = getattr(cfg, 'VOL_LOOKBACK', 480)
+        self.rules = list(zip(cfg.STRATEGY_PARAMS['fast_span'],
+                              cfg.STRATEGY_PARAMS['slow_span'],
+                              cfg.STRATEGY_PARAMS['scalars'],
+                              getattr(cfg, 'TREND_INTERNAL_WEIGHTS', [0.25, 0.25, 0.25, 0.25])))
+        spans = sorted({span for f, s, _, _ in self.rules for span in (f, s)})
+        self.ewma = {span: EwmMean(span=span) for span in spans}
+        self.vol = EwmStd(span=vol_span)
+        self.last_vol = _NAN
+
+        rsi_period = getattr(cfg, 'RSI_PERIOD', 14)
+        self.rsi_scalar = getattr(cfg, 'RSI_SCALAR', 1.0)
+        self.gain = EwmMean(alpha=1 / rsi_period, adjust=False)
+        self.loss = EwmMean(alpha=1 / rsi_period, adjust=False)
+        self.rsi_window = RollingMean(12)
+        self.rsi_smooth = EwmMean(span=24)
+        self.prev_close = _NAN
+
+        self.w_trend = getattr(cfg, 'TREND_WEIGHT', 0.9)
+        self.w_rsi = getattr(cfg, 'RSI_WEIGHT', 0.1)
+        self.volatility = _NAN
+        self.trend_forecast = 0.0
+        self.rsi_forecast = 0.0
+        self.forecast = 0.0
+
+    def update(self, bar) -> float:
+        close = _bar_value(bar)
+
+        # --- 1. 波动率 (0 视为缺失，向前填充) ---
+        vol = self.vol.update(close)
+        if vol == vol and vol != 0:
+            self.last_vol = vol
+        volatility = self.last_vol + 1e-8
+        self.volatility = volatility
+
+        # --- 2. 趋势信号 ---
+        means = {span: ewm.update(close) for span, ewm in self.ewma.items()}
+        trend = 0.0
+        for fast, slow, scalar, weight in self.rules:
+            fc = ((means[fast] - means[slow]) * scalar) / volatility * weight
+            if fc == fc:
+                trend += fc
+
+        # --- 3. RSI 反转信号 ---
+        delta = close - self.prev_close
+        self.prev_close = close
+        gain = self.gain.update(delta if delta > 0 else 0.0)
+        loss = self.loss.update(-(delta if delta < 0 else 0.0))
+        rs = _safe_div(gain, loss)
+        raw_rsi = 100 - (100 / (1 + rs))
+        smooth_rsi = self.rsi_window.update(raw_rsi)
+        if smooth_rsi != smooth_rsi:
+            smooth_rsi = 50.0
+        rsi_diff = 50 - smooth_rsi
+        sign = (rsi_diff > 0) - (rsi_diff < 0)
+        rsi_raw = sign * max(0.0, abs(rsi_diff) - 10) * self.rsi_scalar
+        rsi = self.rsi_smooth.update(rsi_raw)
+
+        # --- 4. 信号融合 ---
+        self.trend_forecast = _clip(trend, -20, 20)
+        rsi = _clip(rsi, -20, 20)
+        self.rsi_forecast = rsi if rsi == rsi else 0.0
+        self.forecast = self.trend_forecast * self.w_trend + self.rsi_forecast * self.w_rsi
+        return self.forecast
+
+    def update_many(self, closes) -> np.ndarray:
+        """按顺序回放一段收盘价 (用于预热 / 对拍)"""
+        return np.array([self.update(c) for c in np.asarray(closes, dtype=np.float64).tolist()])
+
+
+def _nan_max(a: float, b: float) -> float:
+    """np.maximum 语义: 任一为 NaN 则结果为 NaN"""
+    if a != a or b != b:
+        return _NAN
+    return a if a >= b else b
+
+
+class StreamingRiskEngine:
+    """
+    calculate_position_target 的流式版本
+    --------------------------------------------
+    每根 K 线调用 update(bar, forecast) -> 缓冲后的目标仓位 (buffered_pos)。
+    下一根 K 线实际持有的仓位 = 上一次的返回值 (见 self.position，对应批量版的 shift(1))。
+    内部状态:
+      - Regime MA: 环形缓冲 + 运行和 (REGIME_MA_WINDOW 根)
+      - 收益率 EWMA 标准差 (年化波动) / TR 的 EWMA (ATR)
+      - 缓冲器当前仓位
+    config: 显式配置 (Config.freeze())，None 时读全局 Config
+    """
+
+    def __init__(self, buffer=None, config=None):
+        cfg = Config if config is None else config
+        self.buffer = getattr(cfg, 'POSITION_BUFFER', 0.1) if buffer is None else buffer
+        self.regime_ma = RollingMean(getattr(cfg, 'REGIME_MA_WINDOW', 4800))
+        self.normal_cap = getattr(cfg, 'MAX_LEVERAGE', 2.5)
+        self.bear_cap = getattr(cfg, 'BEAR_MODE_MAX_LEVERAGE', 1.0)
+
+        self.ret_vol = EwmStd(span=cfg.VOL_LOOKBACK)
+        self.ann_factor = math.sqrt(365 * 24)
+        self.target_vol = getattr(cfg, 'TARGET_VOLATILITY', 0.8)
+
+        self.atr = EwmMean(span=getattr(cfg, 'SURVIVAL_ATR_WINDOW', 24))
+        self.multiplier = getattr(cfg, 'SURVIVAL_ATR_MULTIPLIER', 4.5)
+        self.min_vol = getattr(cfg, 'MIN_HOURLY_VOL', 0.005)
+
+        self.prev_close = _NAN      # 上一根收盘 (算 TR)
+        self.last_valid_close = _NAN  # pct_change 的向前填充
+        self.buffered_pos = 0.0
+        self.position = 0.0
+
+        # 诊断输出 (与批量版同名列对应)
+        self.regime_ma_value = _NAN
+        self.dynamic_max_cap = self.bear_cap
+        self.hourly_ret = 0.0
+        self.ann_vol_pct = 0.0
+        self.leverage_ratio = 0.0
+        self.sl_threshold = _NAN
+        self.is_crash = False
+        self.raw_target = 0.0
+
+    def update(self, bar, forecast: float) -> float:
+        return self.step(_bar_value(bar, 'high'), _bar_value(bar, 'low'), _bar_value(bar, 'close'), float(forecast))
+
+    def step(self, high: float, low: float, close: float, forecast: float) -> float:
+        # 实际持仓 = 上一根 K 线算出的缓冲仓位
+        self.position = self.buffered_pos
+
+        # --- 1. 环境过滤器 (Regime Filter) ---
+        ma = self.regime_ma.update(close)
+        self.regime_ma_value = ma
+        cap = self.normal_cap if close > ma else self.bear_cap
+        self.dynamic_max_cap = cap
+
+        # --- 2. 波动率目标管理 (Vol Scaling) ---
+        filled = close if close == close else self.last_valid_close
+        hourly_ret = _safe_div(filled, self.last_valid_close) - 1
+        if hourly_ret != hourly_ret:
+            hourly_ret = 0.0
+        self.last_valid_close = filled
+        self.hourly_ret = hourly_ret
+
+        long_term_vol = self.ret_vol.update(hourly_ret)
+        if long_term_vol != long_term_vol:
+            long_term_vol = 0.0
+        ann_vol_pct = long_term_vol * self.ann_factor
+        self.ann_vol_pct = ann_vol_pct
+        safe_vol = 1e-6 if ann_vol_pct == 0 else ann_vol_pct
+        raw_leverage_ratio = self.target_vol / safe_vol
+
+        # --- 3. 仓位计算 ---
+        ideal = _clip((forecast / 2.0) * raw_leverage_ratio, -cap, cap)
+        self.leverage_ratio = abs(ideal)
+
+        # --- 4. 灾难阻断器 (Survival Hard Stop) ---
+        pc = self.prev_close if self.prev_close == self.prev_close else close
+        self.prev_close = close
+        tr = _nan_max(high - low, _nan_max(abs(high - pc), abs(low - pc)))
+        atr = self.atr.update(tr)
+        if atr != atr:
+            atr = 0.0
+        raw_threshold = (atr * self.multiplier) / close
+        crash_threshold = _nan_max(raw_threshold, self.min_vol * self.multiplier)
+        self.sl_threshold = crash_threshold
+        self.is_crash = hourly_ret < -crash_threshold
+        if self.is_crash:
+            ideal = 0.0
+        self.raw_target = ideal
+
+        # --- 5. 缓冲器 (Buffer) ---
+        if abs(ideal - self.buffered_pos) > self.buffer:
+            self.buffered_pos = ideal
+        return self.buffered_pos
+
+    def update_many(self, high, low, close, forecast) -> np.ndarray:
+        """按顺序回放 (用于预热 / 对拍)，返回每根 K 线的 buffered_pos"""
+        rows = zip(*(np.asarray(a, dtype=np.float64).tolist() for a in (high, low, close, forecast)))
+        return np.array([self.step(h, l, c, f) for h, l, c, f in rows])
@@ -1,42 +1,102 @@
 import sys
 import os
+import json
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+# matplotlib 较重 (导入约占启动时间的一半)，只在真正出图时才导入，见 _render_full_report / _render_snapshot
 
 # 引入 Config
 from config import Config
 from jarvis_engine.alpha import load_price_data, calculate_scaled_forecast
 from jarvis_engine.alpha import calculate_position_target, run_vectorized_backtest
+from jarvis_engine.lean import run_lean_pipeline, REPORT_COLUMNS
+from jarvis_engine.instrument import PROFILER, stage
+from jarvis_engine.downsample import downsample_series
+from jarvis_engine.metrics import trade_analytics, performance_summary
+from jarvis_engine.rolling_metrics import rolling_metrics
+from jarvis_engine.result_cache import result_key, load_result, store_result
+
+# ==========================================
+# 🖼️ 作图数据准备 (降采样后再画)
+# ==========================================
+# 全景图横轴只有几千个像素，长历史直接画会把几十万个点塞进同一条线，耗时随历史长度线性增长。
+# 这里先按 min-max 每桶保留极值 (折线与 fill_between 的包络与原图一致)，事件点 (熔断 / 刺穿) 全部保留，
+# 作图进程只拿到这些小数组，出图耗时基本与历史长度无关。
+def _plot_payload(frame, max_points, cfg=Config):
+    """从回测结果里抽出作图用的序列 (已降采样)，max_points 为 0 / None 时不降采样；图例用到的参数取自 cfg"""
+    ds = lambda s: downsample_series(s, max_points)
+    hourly_ret = frame['close'].pct_change().fillna(0)
+    melt_mask = frame['sigma_event'] == True if 'sigma_event' in frame.columns else np.zeros(len(frame), dtype=bool)
+
+    payload = {
+        "close": ds(frame['close']),
+        "hourly_ret": ds(hourly_ret),
+        "meltdowns": frame.loc[melt_mask, 'close'],
+        "threshold": None,
+        "crashes": None,
+        # 作图进程拿不到调用方的配置，图例 / 目标线用到的参数随数据一起传过去
+        "survival_atr_multiplier": cfg.SURVIVAL_ATR_MULTIPLIER,
+        "vol_lookback": cfg.VOL_LOOKBACK,
+        "target_volatility": cfg.TARGET_VOLATILITY,
+    }
+    for col in ('equity', 'buy_hold_equity', 'ann_vol_pct', 'leverage_ratio'):
+        if col in frame.columns:
+            payload[col] = ds(frame[col])
+    payload['position_abs'] = ds(frame['position'].abs())
+
+    # sl_threshold 是正数 (e.g. 0.06)，我们需要画成 -0.06
+    if 'sl_threshold' in frame.columns:
+        threshold_line = -1 * frame['sl_threshold']
+        payload['threshold'] = ds(threshold_line)
+        payload['crashes'] = hourly_ret[hourly_ret < threshold_line]
+    return payload
+
+
+def _results_dir(cfg=Config):
+    results_dir = os.path.join(cfg.BASE_DIR, "data_results")
+    if not os.path.exists(results_dir): os.makedirs(results_dir)
+    return results_dir
+
 
 # ==========================================
 # 📊 全景战报 (Full History Report)
 # ==========================================
-def plot_full_report(df_res):
-    print("🎨 Generating Institutional Static Report (Matplotlib)...")
+# 可选的滚动指标子图: (字段, 标题, 纵轴)
+_ROLLING_PANELS = (
+    ("sharpe", "📐 Rolling Sharpe", "Sharpe"),
+    ("sortino", "📐 Rolling Sortino", "Sortino"),
+    ("volatility", "🌪️ Rolling Volatility (Annualized)", "Ann Vol"),
+    ("drawdown", "📉 Rolling Drawdown (vs Window Peak)", "Drawdown"),
+)
+
+def _render_full_report(p, save_path):
+    import matplotlib.pyplot as plt
     
     plt.style.use('bmh') 
     
     # 改为 5 行子图，新增 "Survival Monitor"
-    fig, axes = plt.subplots(5, 1, figsize=(14, 24), sharex=True)
+    # 开启滚动指标时在下方追加 4 个子图 (Sharpe / Sortino / 波动率 / 回撤)
+    rolling = p.get('rolling')
+    n_rows = 5 + (len(_ROLLING_PANELS) if rolling else 0)
+    fig, axes = plt.subplots(n_rows, 1, figsize=(14, 24 * n_rows / 5), sharex=True)
     
     # --- 子图 1: 净值曲线 ---
     ax0 = axes[0]
-    ax0.plot(df_res.index, df_res['equity'], color='#FF9900', linewidth=2, label='Jarvis Strategy')
-    ax0.plot(df_res.index, df_res['buy_hold_equity'], color='gray', linestyle='--', alpha=0.6, label='Buy & Hold')
+    ax0.plot(p['equity'].index, p['equity'], color='#FF9900', linewidth=2, label='Jarvis Strategy')
+    ax0.plot(p['buy_hold_equity'].index, p['buy_hold_equity'], color='gray', linestyle='--', alpha=0.6, label='Buy & Hold')
     ax0.set_title("🏆 Equity Curve (Survival Mode)", fontweight='bold', fontsize=12)
     ax0.set_ylabel("Account Value ($)")
     ax0.legend(loc='upper left')
     
     # --- 子图 2: 价格与熔断点 ---
     ax1 = axes[1]
-    ax1.plot(df_res.index, df_res['close'], color='black', alpha=0.6, linewidth=1, label='Price')
+    ax1.plot(p['close'].index, p['close'], color='black', alpha=0.6, linewidth=1, label='Price')
     
     # 标记熔断点 (Red Triangle)
-    meltdowns = df_res[df_res.get('sigma_event', False) == True]
+    meltdowns = p['meltdowns']
     if not meltdowns.empty:
-        ax1.scatter(meltdowns.index, meltdowns['close'], color='red', marker='v', s=80, zorder=5, label=f'Survival Stop Triggered')
+        ax1.scatter(meltdowns.index, meltdowns, color='red', marker='v', s=80, zorder=5, label=f'Survival Stop Triggered')
         
     ax1.set_title(f"📉 Price Action", fontweight='bold', fontsize=12)
     ax1.legend(loc='upper left')
@@ -45,22 +105,19 @@ def plot_full_report(df_res):
     # 核心特征分析：为什么归零？
     ax2 = axes[2]
     
-    # 1. 计算每小时涨跌幅
-    hourly_ret = df_res['close'].pct_change().fillna(0)
-    
-    # 2. 绘制涨跌幅 (灰色区域)
-    ax2.fill_between(df_res.index, hourly_ret, 0, color='gray', alpha=0.3, label='Hourly Return')
+    # 1. 绘制每小时涨跌幅 (灰色区域)
+    hourly_ret = p['hourly_ret']
+    ax2.fill_between(hourly_ret.index, hourly_ret, 0, color='gray', alpha=0.3, label='Hourly Return')
     
-    # 3. 绘制灾难阈值 (红线, 负值)
-    # sl_threshold 是正数 (e.g. 0.06)，我们需要画成 -0.06
-    if 'sl_threshold' in df_res.columns:
-        threshold_line = -1 * df_res['sl_threshold']
-        ax2.plot(df_res.index, threshold_line, color='red', linewidth=1.5, linestyle='--', label=f'Crash Threshold ({Config.SURVIVAL_ATR_MULTIPLIER}x ATR)')
+    # 2. 绘制灾难阈值 (红线, 负值)
+    if p['threshold'] is not None:
+        threshold_line = p['threshold']
+        ax2.plot(threshold_line.index, threshold_line, color='red', linewidth=1.5, linestyle='--', label=f"Crash Threshold ({p['survival_atr_multiplier']}x ATR)")
         
-        # 4. 标记刺穿时刻 (特征)
-        crashes = df_res[hourly_ret < threshold_line]
+        # 3. 标记刺穿时刻 (特征)
+        crashes = p['crashes']
         if not crashes.empty:
-            ax2.scatter(crashes.index, hourly_ret.loc[crashes.index], color='red', marker='x', s=50, label='Breach Point')
+            ax2.scatter(crashes.index, crashes, color='red', marker='x', s=50, label='Breach Point')
 
     ax2.set_title("☠️ Survival Monitor (Return vs Threshold)", fontweight='bold', fontsize=12)
     ax2.set_ylabel("Return %")
@@ -69,56 +126,137 @@ def plot_full_report(df_res):
 
     # --- 子图 4: 波动率 ---
     ax3 = axes[3]
-    ax3.plot(df_res.index, df_res['ann_vol_pct'], color='blue', linewidth=1.5, label=f'Long-Term Vol (Span={Config.VOL_LOOKBACK})')
-    ax3.axhline(Config.TARGET_VOLATILITY, color='green', linestyle='--', linewidth=2, label=f'Target ({Config.TARGET_VOLATILITY})')
+    ax3.plot(p['ann_vol_pct'].index, p['ann_vol_pct'], color='blue', linewidth=1.5, label=f"Long-Term Vol (Span={p['vol_lookback']})")
+    ax3.axhline(p['target_volatility'], color='green', linestyle='--', linewidth=2, label=f"Target ({p['target_volatility']})")
     ax3.set_title("🌊 Volatility Regime", fontweight='bold', fontsize=12)
     ax3.set_ylabel("Ann Vol %")
     ax3.legend(loc='upper left')
 
     # --- 子图 5: 仓位/杠杆 ---
     ax4 = axes[4]
-    ax4.plot(df_res.index, df_res['leverage_ratio'], color='gray', alpha=0.5, label='Max Leverage Cap')
+    ax4.plot(p['leverage_ratio'].index, p['leverage_ratio'], color='gray', alpha=0.5, label='Max Leverage Cap')
     # 绘制实际仓位 (填充橙色)
-    ax4.fill_between(df_res.index, df_res['position'].abs(), 0, color='#FF9900', alpha=0.5, label='Actual Position')
+    ax4.fill_between(p['position_abs'].index, p['position_abs'], 0, color='#FF9900', alpha=0.5, label='Actual Position')
     
     # 再次强调归零点
     if not meltdowns.empty:
-        # 在归零的地方画红竖线
-        for date in meltdowns.index:
-            ax4.axvline(date, color='red', alpha=0.3, linestyle=':')
+        # 在归零的地方画红竖线 (一次性画成一个集合，效果等同逐条 axvline)
+        ax4.vlines(meltdowns.index, 0, 1, transform=ax4.get_xaxis_transform(), color='red', alpha=0.3, linestyle=':')
 
     ax4.set_title("⚙️ Leverage System (Zero = Meltdown)", fontweight='bold', fontsize=12)
     ax4.set_ylabel("Leverage")
     ax4.legend(loc='upper left')
 
+    # --- [可选] 滚动指标: 每个窗口一条线 ---
+    if rolling:
+        for ax, (field, title, ylabel) in zip(axes[5:], _ROLLING_PANELS):
+            for days, series in rolling[field].items():
+                ax.plot(series.index, series, linewidth=1, label=f'{days}D')
+            if field in ('sharpe', 'sortino'):
+                ax.axhline(0, color='black', linewidth=0.8, alpha=0.5)
+            ax.set_title(title, fontweight='bold', fontsize=12)
+            ax.set_ylabel(ylabel)
+            ax.legend(loc='upper left')
+
     plt.tight_layout()
-    
-    results_dir = os.path.join(Config.BASE_DIR, "data_results")
-    if not os.path.exists(results_dir): os.makedirs(results_dir)
-    save_path = os.path.join(results_dir, "Jarvis_Full_Report.png")
-    
     plt.savefig(save_path, dpi=300)
+    plt.close(fig)
     print(f"✅ 全景报告已保存: {save_path}")
 
+
+def _full_report_task(df_res, max_points, cfg=Config):
+    payload = _plot_payload(df_res, max_points, cfg)
+    windows = getattr(cfg, 'REPORT_ROLLING_WINDOWS', ())
+    if windows:
+        # 滚动指标在主进程里 O(n) 算好，降采样后交给作图进程
+        table = rolling_metrics(df_res, windows_days=windows)
+        payload['rolling'] = {
+            field: {days: downsample_series(table[f"{field}_{days}d"], max_points) for days in windows}
+            for field, _, _ in _ROLLING_PANELS
+        }
+    return _render_full_report, (payload, os.path.join(_results_dir(cfg), "Jarvis_Full_Report.png"))
+
+
+def plot_full_report(df_res, max_points=None, config=None):
+    print("🎨 Generating Institutional Static Report (Matplotlib)...")
+    cfg = Config if config is None else config
+    if max_points is None:
+        max_points = getattr(cfg, 'REPORT_MAX_POINTS', 4000)
+    fn, args = _full_report_task(df_res, max_points, cfg)
+    fn(*args)
+
 # ==========================================
 # 📸 2. 智能特写快照 (增强版)
 # ==========================================
-def plot_crash_snapshots(df_res, top_n=3):
-    print(f"📸 Generating Top {top_n} Crash Snapshots...")
+def _render_snapshot(p, date_str, save_path):
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    # 4行特写
+    fig, axes = plt.subplots(4, 1, figsize=(10, 16), sharex=True)
+    fig.suptitle(f"🚨 DISASTER FORENSICS: {date_str}", fontsize=16, fontweight='bold', color='darkred')
+    
+    # 图1: 价格
+    ax0 = axes[0]
+    ax0.plot(p['close'].index, p['close'], color='black', label='Price')
+    local_melt = p['meltdowns']
+    ax0.scatter(local_melt.index, local_melt, color='red', marker='v', s=100, label='Survival Trigger')
+    ax0.legend()
+    ax0.grid(True, alpha=0.3)
+    
+    # [NEW] 图2: 刺穿特征 (Return vs Threshold)
+    ax1 = axes[1]
+    hourly_ret = p['hourly_ret']
+    ax1.bar(hourly_ret.index, hourly_ret, color='gray', alpha=0.5, label='Hourly Ret', width=0.04) # bar chart
+    
+    if p['threshold'] is not None:
+        thresh = p['threshold']
+        ax1.plot(thresh.index, thresh, color='red', linestyle='--', label='Crash Threshold')
+        
+        # 标记刺穿
+        breach = p['crashes']
+        ax1.scatter(breach.index, breach, color='red', marker='x', s=100, zorder=5)
+        
+    ax1.set_title("Why Zero? (Return pierced Threshold)", fontsize=10, fontweight='bold')
+    ax1.legend(loc='lower left')
+    ax1.grid(True, alpha=0.3)
+    
+    # 图3: 仓位归零
+    ax2 = axes[2]
+    ax2.fill_between(p['position_abs'].index, p['position_abs'], 0, color='#FF9900', alpha=0.6, label='Position')
+    ax2.set_ylabel("Position")
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    
+    # 图4: 波动率
+    ax3 = axes[3]
+    ax3.plot(p['ann_vol_pct'].index, p['ann_vol_pct'], color='blue', label='Vol')
+    ax3.axhline(p['target_volatility'], color='green', linestyle='--', label='Target')
+    ax3.grid(True, alpha=0.3)
     
-    risk_events = df_res[df_res.get('sigma_event', False) == True].copy()
+    ax3.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %Hh'))
+    plt.xticks(rotation=45)
     
+    plt.savefig(save_path, dpi=200)
+    plt.close(fig)
+    print(f"📸 快照已生成: {os.path.basename(save_path)}")
+
+
+def _snapshot_tasks(df_res, top_n, max_points, cfg=Config):
+    """挑出波动最剧烈的 top_n 个熔断日，每个生成一个 (渲染函数, 参数) 任务；没有熔断时返回 []"""
+    if 'sigma_event' not in df_res.columns:
+        return []
+    risk_events = df_res.loc[df_res['sigma_event'] == True, ['ann_vol_pct']]
     if risk_events.empty:
-        print("🎉 Good News: No DISASTER events triggered.")
-        return
+        return []
 
     risk_events = risk_events.sort_values('ann_vol_pct', ascending=False)
     risk_events['date'] = risk_events.index.date
     top_days = risk_events.drop_duplicates(subset=['date']).head(top_n)
     
-    results_dir = os.path.join(Config.BASE_DIR, "data_results")
-
-    for idx, (timestamp, row) in enumerate(top_days.iterrows()):
+    results_dir = _results_dir(cfg)
+    tasks = []
+    for idx, timestamp in enumerate(top_days.index):
         # 缩短观察窗口，放大细节 (前后 2 天)
         start_t = timestamp - pd.Timedelta(days=2) 
         end_t = timestamp + pd.Timedelta(days=2)
@@ -126,186 +264,79 @@ def plot_crash_snapshots(df_res, top_n=3):
         
         if subset.empty: continue
 
-        # 4行特写
-        fig, axes = plt.subplots(4, 1, figsize=(10, 16), sharex=True)
         date_str = timestamp.strftime('%Y-%m-%d')
-        fig.suptitle(f"🚨 DISASTER FORENSICS: {date_str}", fontsize=16, fontweight='bold', color='darkred')
-        
-        # 图1: 价格
-        ax0 = axes[0]
-        ax0.plot(subset.index, subset['close'], color='black', label='Price')
-        local_melt = subset[subset.get('sigma_event', False) == True]
-        ax0.scatter(local_melt.index, local_melt['close'], color='red', marker='v', s=100, label='Survival Trigger')
-        ax0.legend()
-        ax0.grid(True, alpha=0.3)
-        
-        # [NEW] 图2: 刺穿特征 (Return vs Threshold)
-        ax1 = axes[1]
-        hourly_ret = subset['close'].pct_change().fillna(0)
-        ax1.bar(subset.index, hourly_ret, color='gray', alpha=0.5, label='Hourly Ret', width=0.04) # bar chart
-        
-        if 'sl_threshold' in subset.columns:
-            thresh = -1 * subset['sl_threshold']
-            ax1.plot(subset.index, thresh, color='red', linestyle='--', label='Crash Threshold')
-            
-            # 标记刺穿
-            breach = subset[hourly_ret < thresh]
-            ax1.scatter(breach.index, hourly_ret.loc[breach.index], color='red', marker='x', s=100, zorder=5)
-            
-        ax1.set_title("Why Zero? (Return pierced Threshold)", fontsize=10, fontweight='bold')
-        ax1.legend(loc='lower left')
-        ax1.grid(True, alpha=0.3)
-        
-        # 图3: 仓位归零
-        ax2 = axes[2]
-        ax2.fill_between(subset.index, subset['position'].abs(), 0, color='#FF9900', alpha=0.6, label='Position')
-        ax2.set_ylabel("Position")
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        
-        # 图4: 波动率
-        ax3 = axes[3]
-        ax3.plot(subset.index, subset['ann_vol_pct'], color='blue', label='Vol')
-        ax3.axhline(Config.TARGET_VOLATILITY, color='green', linestyle='--', label='Target')
-        ax3.grid(True, alpha=0.3)
-        
-        ax3.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %Hh'))
-        plt.xticks(rotation=45)
-        
-        fname = f"Snapshot_{idx+1}_{date_str}.png"
-        save_path = os.path.join(results_dir, fname)
-        plt.savefig(save_path, dpi=200)
-        plt.close()
-        print(f"📸 快照已生成: {fname}")
+        save_path = os.path.join(results_dir, f"Snapshot_{idx+1}_{date_str}.png")
+        tasks.append((_render_snapshot, (_plot_payload(subset, max_points, cfg), date_str, save_path)))
+    return tasks
+
+
+def plot_crash_snapshots(df_res, top_n=3, max_points=None, config=None):
+    print(f"📸 Generating Top {top_n} Crash Snapshots...")
+    cfg = Config if config is None else config
+    if max_points is None:
+        max_points = getattr(cfg, 'REPORT_MAX_POINTS', 4000)
+    tasks = _snapshot_tasks(df_res, top_n, max_points, cfg)
+    if not tasks:
+        print("🎉 Good News: No DISASTER events triggered.")
+        return
+    for fn, args in tasks:
+        fn(*args)
+
 # ==========================================
-# 📊 [V3.5 New] Sortino Metric
+# 🏭 3. 并行出图 (全景图 + 快照各占一个进程)
 # ==========================================
-def calculate_sortino(series, target_return=0, periods=24*365):
-
+def render_reports(df_res, top_n=3, workers=None, max_points=None, config=None):
     """
-    辅助函数：计算年化 Sortino Ratio
-    只考虑下行偏差 (Downside Deviation)，不惩罚上涨波动。
+    全景图与各张快照互不依赖，放进进程池并行渲染 (matplotlib 不是线程安全的，只能用进程)。
+    子进程只收到降采样后的小数组，序列化开销可以忽略。
+    workers=1 时在当前进程里依次渲染。config: 显式配置，None 时读全局 Config。
     """
-    # 1. 计算年化收益
-    mean_ret = series.mean() * periods
-    
-    # 2. 计算下行偏差 (只取负收益部分)
-    downside_returns = series[series < target_return]
-    
-    if len(downside_returns) == 0:
-        return np.nan
-        
-    # 下行标准差
-    downside_std = np.sqrt(np.mean(downside_returns**2)) * np.sqrt(periods)
-    
-    if downside_std == 0:
-        return np.nan
-        
-    return mean_ret / downside_std
+    from concurrent.futures import ProcessPoolExecutor
+
+    cfg = Config if config is None else config
+    if max_points is None:
+        max_points = getattr(cfg, 'REPORT_MAX_POINTS', 4000)
+    print(f"🎨 Generating Full Report + Top {top_n} Crash Snapshots...")
+    tasks = [_full_report_task(df_res, max_points, cfg)] + _snapshot_tasks(df_res, top_n, max_points, cfg)
+    if len(tasks) == 1:
+        print("🎉 Good News: No DISASTER events triggered.")
+
+    if workers is None:
+        workers = getattr(cfg, 'REPORT_WORKERS', None) or min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1:
+        for fn, args in tasks:
+            fn(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in tasks]
+        for f in futures:
+            f.result()
+
 # ==========================================
-# 🚀 主任务
+# 📊 4. 绩效统计 (Analytics)
 # ==========================================
-def calculate_drawdown_metrics(equity_series):
-
-    """
-    计算最大回撤 (MDD) 和 Calmar 比率
-    """
-    # 1. 计算累计最大值 (Running Max)
-    roll_max = equity_series.cummax()
-    
-    # 2. 计算回撤序列 (Drawdown Series)
-    drawdown = (equity_series / roll_max) - 1.0
-    
-    # 3. 提取最大回撤 (是一个负数，例如 -0.40)
-    max_drawdown = drawdown.min()
-    
-    # 4. 计算 Calmar Ratio (年化收益 / |最大回撤|)
-    # 假设数据是 1小时频率，总长度 N
-    total_ret = (equity_series.iloc[-1] / equity_series.iloc[0]) - 1.0
-    n_years = len(equity_series) / (365 * 24)
-    ann_ret = (1 + total_ret) ** (1 / n_years) - 1
-    
-    # 防止分母为 0
-    if max_drawdown == 0:
-        calmar = np.nan
-    else:
-        calmar = ann_ret / abs(max_drawdown)
-        
-    return max_drawdown, calmar
 def calculate_trade_metrics(df_res):
 
     """
     [V3.7 Analytics] 交易维度统计
     将连续的持仓序列拆解为独立的 'Round-Trip' 交易进行统计。
+    拆分与聚合见 jarvis_engine/metrics.py (纯数组运算)，这里负责打印并返回汇总指标。
     """
-    df = df_res.copy()
-    
-    # 1. 定义交易分组 (Trade Grouping)
-    # 逻辑: 只要仓位符号(多/空)发生变化，就算作新的一笔交易
-    # 0 (空仓) 也会被分一组，后面会过滤掉
-    # 精度过滤: 忽略 < 0.01 的微小仓位(可能是浮点误差)
-    df['pos_sign'] = np.sign(df['position'])
-    df.loc[df['position'].abs() < 0.01, 'pos_sign'] = 0
-    
-    # 当符号变化时，累加 group_id
-    df['trade_id'] = (df['pos_sign'] != df['pos_sign'].shift(1)).cumsum()
-    
-    # 2. 聚合统计
-    # 只统计非空仓的组 (pos_sign != 0)
-    trade_stats = []
-    
-    # 获取时间索引 (假设索引是 datetime，如果不是请先转换)
-    if not isinstance(df.index, pd.DatetimeIndex):
-         df.index = pd.to_datetime(df.index)
-
-    # 按交易ID分组
-    groups = df[df['pos_sign'] != 0].groupby('trade_id')
-    
-    for tid, group in groups:
-        # 基础数据
-        start_time = group.index[0]
-        end_time = group.index[-1]
-        
-        # 持续时长 (小时)
-        duration_hours = (end_time - start_time).total_seconds() / 3600
-        
-        # 交易总收益 (Sum of Log Returns)
-        # 注意: net_log_ret 已包含手续费和资金费
-        trade_ret = group['net_log_ret'].sum()
+    _, summary = trade_analytics(df_res)
         
-        # 记录
-        trade_stats.append({
-            'trade_id': tid,
-            'direction': 'Long' if group['pos_sign'].iloc[0] > 0 else 'Short',
-            'duration': duration_hours,
-            'return': trade_ret
-        })
-        
-    if not trade_stats:
+    if summary["total_trades"] == 0:
         print("⚠️ No trades executed.")
-        return
+        return summary
         
-    df_trades = pd.DataFrame(trade_stats)
-    
-    # 3. 计算核心指标
-    total_trades = len(df_trades)
-    win_trades = len(df_trades[df_trades['return'] > 0])
-    loss_trades = len(df_trades[df_trades['return'] <= 0])
-    
-    win_rate = win_trades / total_trades if total_trades > 0 else 0
-    
-    # 盈亏比 (Profit Factor): 总盈利 / |总亏损|
-    gross_win = df_trades[df_trades['return'] > 0]['return'].sum()
-    gross_loss = abs(df_trades[df_trades['return'] <= 0]['return'].sum())
-    profit_factor = gross_win / gross_loss if gross_loss > 0 else np.inf
-    
-    # 平均持仓 (小时)
-    avg_duration = df_trades['duration'].mean()
-    
-    # 平均单笔收益 (已扣费)
-    avg_pnl = df_trades['return'].mean()
-    
-    # 4. 打印战报
+    total_trades = summary["total_trades"]
+    win_trades, loss_trades = summary["win_trades"], summary["loss_trades"]
+    win_rate = summary["win_rate"]
+    profit_factor = summary["profit_factor"]
+    avg_duration = summary["avg_duration_hours"]
+    avg_pnl = summary["avg_pnl"]
+    
+    # 打印战报
     print("\n📊 --- Trade Statistics (Round-Trip) ---")
     print(f"🔹 Total Trades    : {total_trades}")
     print(f"🔹 Win Rate        : {win_rate:.2%} ({win_trades} W / {loss_trades} L)")
@@ -320,105 +351,158 @@ def calculate_trade_metrics(df_res):
     else:
         print("⚠️ 风格: 胜率与赔率需进一步平衡。")
     print("------------------------------------------\n")
-def calculate_performance_summary(equity_series, periods_per_year=24*365):
-    """
-    [V4.6] 计算年化收益与复合增长率
-    """
-    # 1. 计算总收益率
-    total_return = (equity_series.iloc[-1] / equity_series.iloc[0]) - 1.0
-    
-    # 2. 计算回测跨越的年数
-    # 数据点总数 / (每年的小时数)
-    n_days = len(equity_series) / 24
-    n_years = len(equity_series) / periods_per_year
-    
-    # 3. 计算年化收益率 (CAGR - 复合年均增长率)
-    if n_years > 0:
-        ann_return = (1 + total_return) ** (1 / n_years) - 1
-    else:
-        ann_return = np.nan
-        
-    return total_return, ann_return, n_days
-def mission_start():
-    print("🚀 Jarvis System Initializing (V3.3 Visualization Upgrade + Leverage Stats)...")
-    
-    import importlib
-    import config
-    importlib.reload(config)
 
-    print(f"📂 Data Path: {Config.DATA_PATH}")
-    
-    df = load_price_data(Config.DATA_PATH)
-    if df.empty: 
-        print("❌ Data not found.")
-        return
+    return summary
+def print_analytics(df_res, config=None):
+    """控制台战报: 收益 / 杠杆 / Sortino / 交易统计 / 回撤，同时以 dict 返回全部指标 (config 为 None 时读全局 Config)"""
+    cfg = Config if config is None else config
+    # 策略与买入持有在同一遍扫描里统计 (jarvis_engine/metrics.py)
+    perf = performance_summary(df_res['equity'], returns=df_res['net_log_ret'], position=df_res['position'],
+                               benchmark=df_res['buy_hold_equity'], benchmark_returns=df_res['market_log_ret'])
+    n_days = perf['years'] * 365
 
-    print("🧠 Calculating Alpha...")
-    df = calculate_scaled_forecast(df)
-    
-    print(f"🛡️ Risk Engine V3.3 (Survival Threshold = {Config.SURVIVAL_ATR_MULTIPLIER}x ATR)...")
-    df = calculate_position_target(df, buffer=Config.POSITION_BUFFER)
-    
-    print("⚡ Backtesting...")
-    df_res = run_vectorized_backtest(df, fee_rate=Config.FEE_RATE)
-    
-    # ------------------------------------------------------
-    # [新增] 杠杆率统计 (Leverage Statistics)
-    # ------------------------------------------------------
-    # 计算平均持仓杠杆 (绝对值)
-    avg_leverage = df_res['position'].abs().mean()
-    # 计算最大使用杠杆
-    max_leverage_used = df_res['position'].abs().max()
-    # ------------------------------------------------------
-
-    final = df_res['equity'].iloc[-1]
-    sharpe = (df_res['net_log_ret'].mean() / df_res['net_log_ret'].std()) * np.sqrt(365*24)
-    total_ret_strat, ann_ret_strat, n_days = calculate_performance_summary(df_res['equity'])
-    total_ret_bh, ann_ret_bh, _ = calculate_performance_summary(df_res['buy_hold_equity'])
-    
-    mdd_strat, calmar_strat = calculate_drawdown_metrics(df_res['equity'])
-    # [V3.5 New] Sortino Analysis
     print("\n📊 --- Performance Analytics ---")
-    strat_sortino = calculate_sortino(df_res['net_log_ret'])
-    btc_sortino = calculate_sortino(df_res['market_log_ret'])
     print(f"🔹 Backtest Period : {n_days:.1f} Days ({n_days/365:.2f} Years)")
-    print(f"🔹 Total Return    : {total_ret_strat:.2%} (B&H: {total_ret_bh:.2%})")
-    print(f"🚀 Annualized Ret  : {ann_ret_strat:.2%} (B&H: {ann_ret_bh:.2%})")
-    print(f"🏆 Final Equity: ${final:,.2f} (Initial: ${Config.INITIAL_CAPITAL})")
-    print(f"📈 Sharpe Ratio : {sharpe:.2f}")
+    print(f"🔹 Total Return    : {perf['total_return']:.2%} (B&H: {perf['bh_total_return']:.2%})")
+    print(f"🚀 Annualized Ret  : {perf['ann_return']:.2%} (B&H: {perf['bh_ann_return']:.2%})")
+    print(f"🏆 Final Equity: ${perf['final_equity']:,.2f} (Initial: ${cfg.INITIAL_CAPITAL})")
+    print(f"📈 Sharpe Ratio : {perf['sharpe']:.2f}")
     
     # [新增] 打印杠杆率数据
-    print(f"⚖️ Avg Leverage  : {avg_leverage:.2f}x (Target: ~1.0x)")
-    print(f"🚀 Max Leverage  : {max_leverage_used:.2f}x (Cap: {Config.MAX_LEVERAGE}x)")
+    print(f"⚖️ Avg Leverage  : {perf['avg_leverage']:.2f}x (Target: ~1.0x)")
+    print(f"🚀 Max Leverage  : {perf['max_leverage']:.2f}x (Cap: {cfg.MAX_LEVERAGE}x)")
     
-    print(f"🔹 Strategy Sortino: {strat_sortino:.4f}")
-    print(f"🔸 Bitcoin Sortino : {btc_sortino:.4f}")
-    calculate_trade_metrics(df_res)
+    print(f"🔹 Strategy Sortino: {perf['sortino']:.4f}")
+    print(f"🔸 Bitcoin Sortino : {perf['bh_sortino']:.4f}")
+    trade_stats = calculate_trade_metrics(df_res)
     print("\n📉 --- Risk Analysis (Drawdown) ---")
+    print(f"🔹 Strategy MDD   : {perf['max_drawdown']:.2%} (Calmar: {perf['calmar']:.2f})")
+    print(f"🔸 Buy & Hold MDD : {perf['bh_max_drawdown']:.2%} (Calmar: {perf['bh_calmar']:.2f})")
     
-    # 1. 策略回撤
-    mdd_strat, calmar_strat = calculate_drawdown_metrics(df_res['equity'])
-    
-    # 2. 只有买入持有的回撤
-    mdd_bh, calmar_bh = calculate_drawdown_metrics(df_res['buy_hold_equity'])
-    
-    print(f"🔹 Strategy MDD   : {mdd_strat:.2%} (Calmar: {calmar_strat:.2f})")
-    print(f"🔸 Buy & Hold MDD : {mdd_bh:.2%} (Calmar: {calmar_bh:.2f})")
-    
-    if abs(mdd_strat) < abs(mdd_bh):
+    if abs(perf['max_drawdown']) < abs(perf['bh_max_drawdown']):
         print("✅ 结论: 策略显著降低了极端风险。")
     else:
         print("⚠️ 结论: 策略风险控制未跑赢大盘，请检查杠杆率。")
     print("------------------------------------------\n")
     
-    if strat_sortino > btc_sortino:
+    if perf['sortino'] > perf['bh_sortino']:
         print("✅ 结论: 策略在承担单位下行风险时，回报优于囤币。")
     else:
         print("⚠️ 结论: 策略下行风险控制仍需优化。")
     print("-" * 40)
-    
-    plot_full_report(df_res)
-    plot_crash_snapshots(df_res, top_n=3)
+
+    metrics = {
+        "n_days": n_days,
+        "total_return": perf['total_return'],
+        "ann_return": perf['ann_return'],
+        "bh_total_return": perf['bh_total_return'],
+        "bh_ann_return": perf['bh_ann_return'],
+        "final_equity": perf['final_equity'],
+        "sharpe": perf['sharpe'],
+        "avg_leverage": perf['avg_leverage'],
+        "max_leverage": perf['max_leverage'],
+        "sortino": perf['sortino'],
+        "bh_sortino": perf['bh_sortino'],
+        "max_drawdown": perf['max_drawdown'],
+        "calmar": perf['calmar'],
+        "bh_max_drawdown": perf['bh_max_drawdown'],
+        "bh_calmar": perf['bh_calmar'],
+    }
+    metrics.update({f"trade_{k}": v for k, v in trade_stats.items()})
+    # numpy 标量 -> Python float / int，方便直接 json.dump
+    return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in metrics.items()}
+
+def _run_backtest(cfg):
+    """加载 -> Alpha -> 风控 -> 回测 -> 指标 (全部使用 cfg)，返回 (df_res, metrics)，数据缺失时返回 None"""
+    with stage("load", config=cfg) as s:
+        df = load_price_data(cfg.DATA_PATH)
+        s.rows = len(df)
+    if df.empty: 
+        print("❌ Data not found.")
+        return None
+
+    if getattr(cfg, 'LEAN_PIPELINE', False):
+        print(f"🪶 Lean Pipeline: Alpha -> Risk (Survival = {cfg.SURVIVAL_ATR_MULTIPLIER}x ATR) -> Backtest...")
+        # alpha / risk / backtest 子阶段由 run_lean_pipeline 内部记录
+        df_res = run_lean_pipeline(df, columns=REPORT_COLUMNS, config=cfg)
+    else:
+        print("🧠 Calculating Alpha...")
+        with stage("alpha", rows=len(df), config=cfg):
+            df = calculate_scaled_forecast(df, config=cfg)
+
+        print(f"🛡️ Risk Engine V3.3 (Survival Threshold = {cfg.SURVIVAL_ATR_MULTIPLIER}x ATR)...")
+        with stage("risk", rows=len(df), config=cfg):
+            df = calculate_position_target(df, buffer=getattr(cfg, 'POSITION_BUFFER', 0.1), config=cfg)
+
+        print("⚡ Backtesting...")
+        with stage("backtest", rows=len(df), config=cfg):
+            df_res = run_vectorized_backtest(df, fee_rate=getattr(cfg, 'FEE_RATE', 0.0005), config=cfg)
+
+    with stage("metrics", rows=len(df_res), config=cfg):
+        metrics = print_analytics(df_res, cfg)
+    return df_res, metrics
+
+# ==========================================
+# 🚀 主任务
+# ==========================================
+def mission_start(headless=False, config=None):
+    """
+    主任务: 加载 -> Alpha -> 风控 -> 回测 -> 指标 (-> 出图)，返回指标 dict (数据缺失时返回 None)。
+    headless=True: 只算指标不出图，整个过程不会导入 matplotlib (批量任务 / 服务器上使用)。
+    config: 显式配置 (Config.freeze(...))；None 时在开始时给全局 Config 拍一份快照，
+    整个任务只读这份快照，运行中修改 Config 不会影响本次结果。
+    """
+    print("🚀 Jarvis System Initializing (V3.3 Visualization Upgrade + Leverage Stats)...")
+    cfg = Config.freeze() if config is None else config
+
+    print(f"📂 Data Path: {cfg.DATA_PATH}")
+
+    PROFILER.reset()
+    with stage("mission_start", config=cfg):
+        # Config 与数据都没变时直接取结果缓存 (jarvis_engine/result_cache.py)
+        use_cache = getattr(cfg, 'USE_RESULT_CACHE', True)
+        cache_key = result_key(cfg.DATA_PATH, cfg) if use_cache else None
+        with stage("result_cache", config=cfg):
+            cached = load_result(cache_key, with_frame=not headless, config=cfg)
+
+        if cached is not None:
+            df_res, metrics = cached
+            print(f"⚡ 结果缓存命中 ({cache_key})，跳过加载与回测")
+            print(f"🔹 Total Return: {metrics['total_return']:.2%} | Sharpe: {metrics['sharpe']:.2f} | "
+                  f"MDD: {metrics['max_drawdown']:.2%} | Calmar: {metrics['calmar']:.2f}")
+        else:
+            result = _run_backtest(cfg)
+            if result is None:
+                return
+            df_res, metrics = result
+            if use_cache:
+                store_result(cache_key, df_res, metrics, cfg)
+
+        if not headless:
+            with stage("plotting", rows=len(df_res), config=cfg):
+                render_reports(df_res, top_n=3, config=cfg)
+
+    if getattr(cfg, 'INSTRUMENT', True):
+        PROFILER.print_table()
+        profile_path = os.path.join(cfg.BASE_DIR, "data_results", "Jarvis_Profile.json")
+        PROFILER.save_json(profile_path)
+        print(f"⏱️ 阶段耗时报告已保存: {profile_path}")
+
+    return metrics
 
 if __name__ == "__main__":
-    mission_start()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Jarvis 回测主程序")
+    parser.add_argument("--headless", action="store_true", help="只计算指标，不出图 (不导入 matplotlib)")
+    parser.add_argument("--metrics-json", default=None, help="把指标写入该 JSON 文件")
+    parser.add_argument("--no-cache", action="store_true", help="忽略结果缓存，强制重新回测")
+    args = parser.parse_args()
+    if args.no_cache:
+        Config.USE_RESULT_CACHE = False
+
+    metrics = mission_start(headless=args.headless)
+    if metrics is None:
+        sys.exit(1)
+    if args.metrics_json:
+        with open(args.metrics_json, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2, ensure_ascii=False)
+        print(f"💾 指标已保存: {args.metrics_json}")
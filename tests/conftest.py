@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_ohlcv, write_binance_csv
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    """每个用例用自己的缓存目录，不读写仓库里的 data_cache"""
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def price_csv(tmp_path):
+    """写一份 CryptoDataDownload 格式的合成 CSV (网址表头 + Unix 毫秒)，含若干闪崩"""
+    def _write(n_bars=12_000, seed=7, crash_prob=0.002, name="Binance_BTCUSDT_1h.csv"):
+        path = tmp_path / name
+        write_binance_csv(make_ohlcv(n_bars, seed=seed, crash_prob=crash_prob), str(path))
+        return str(path)
+    return _write
@@ -0,0 +1,35 @@
+import os
+import pandas as pd
+import pytest
+from config import Config
+from jarvis_engine.bar_store import BarStore
+from jarvis_engine.panel import load_store_panel
+from jarvis_engine import day12_ma_backtest_pro as day12
+
+
+def test_store_root_follows_explicit_config(tmp_path, price_csv):
+    csv = price_csv(n_bars=500)
+    cfg = Config.freeze(BAR_STORE_DIR=str(tmp_path / "explicit_bars"))
+    store = BarStore(config=cfg)
+    store.import_csv(csv)
+    assert store.root == cfg.BAR_STORE_DIR
+    assert os.listdir(cfg.BAR_STORE_DIR) == ["BTCUSDT"]
+    assert not os.path.exists(os.path.join(Config.CACHE_DIR, "bars"))
+    assert len(load_store_panel(["BTCUSDT"], "1h", config=cfg)["close"]) == 500
+
+
+def test_load_bars_matches_day12_loader(price_csv, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "BAR_STORE_DIR", str(tmp_path / "bars"))
+    csv = price_csv(n_bars=2_000)
+    ref = day12.load_price_data(csv)
+    df = day12.load_bars(csv)
+    assert df.index.equals(ref.index)
+    for col in ("open", "high", "low", "close", "ret"):
+        assert df[col].to_numpy().tolist() == ref[col].to_numpy().tolist()
+
+
+def test_load_bars_raises_on_missing_column(tmp_path):
+    csv = tmp_path / "Binance_BTCUSDT_1h.csv"
+    pd.DataFrame({"unix": [1_600_000_000_000, 1_600_003_600_000], "close": [1.0, 2.0]}).to_csv(csv, index=False)
+    with pytest.raises(ValueError):
+        day12.load_bars(str(csv))
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import main
+from config import Config
+from jarvis_engine.alpha import (load_price_data, calculate_scaled_forecast, calculate_position_target,
+                                 run_vectorized_backtest)
+from jarvis_engine.instrument import PROFILER
+from jarvis_engine.lean import run_lean_pipeline, LEAN_COLUMNS
+from jarvis_engine.pipeline import PipelineDAG
+from jarvis_engine.result_cache import cached_run
+
+
+def _explicit(tmp_path, csv):
+    """与全局 Config 各处都不同的显式配置"""
+    return Config.freeze(DATA_PATH=csv, BASE_DIR=str(tmp_path / "explicit"),
+                         RESULT_CACHE_DIR=str(tmp_path / "explicit_results"), USE_RESULT_CACHE=True,
+                         INSTRUMENT=False, POSITION_BUFFER=0.2, FEE_RATE=0.0002, TARGET_VOLATILITY=0.6)
+
+
+def test_mission_start_reads_only_explicit_config(tmp_path, monkeypatch, price_csv):
+    csv = price_csv(n_bars=4_000)
+    monkeypatch.setattr(Config, "USE_RESULT_CACHE", False)
+    monkeypatch.setattr(Config, "INSTRUMENT", True)
+    monkeypatch.setattr(Config, "RESULT_CACHE_DIR", str(tmp_path / "global_results"))
+    cfg = _explicit(tmp_path, csv)
+
+    metrics = main.mission_start(headless=True, config=cfg)
+    # 缓存开关 / 目录、埋点开关都来自 cfg
+    assert os.listdir(cfg.RESULT_CACHE_DIR)
+    assert not os.path.exists(Config.RESULT_CACHE_DIR)
+    assert not PROFILER.report()["stages"]
+    assert not os.path.exists(os.path.join(cfg.BASE_DIR, "data_results"))
+
+    ref = run_lean_pipeline(load_price_data(csv), columns="all", config=cfg)
+    assert metrics["final_equity"] == ref["equity"].iloc[-1]
+
+    hit = cached_run(csv, lambda: (_ for _ in ()).throw(AssertionError("应命中缓存")), with_frame=False, config=cfg)
+    assert hit[1] == metrics
+
+
+def test_pipeline_dag_uses_explicit_config(tmp_path, monkeypatch, price_csv):
+    csv = price_csv(n_bars=4_000)
+    df = load_price_data(csv)
+    cfg = _explicit(tmp_path, csv)
+    monkeypatch.setattr(Config, "POSITION_BUFFER", 0.4)
+    monkeypatch.setattr(Config, "INITIAL_CAPITAL", 1.0)
+
+    dag = PipelineDAG(df, config=cfg)
+    ref = run_lean_pipeline(df, columns="all", config=cfg)
+    out = dag.frame("all")
+    for col in LEAN_COLUMNS:
+        assert np.array_equal(out[col].to_numpy(), ref[col].to_numpy(), equal_nan=True), col
+
+    # 冻结配置不变时不重算；换一份快照只重算下游
+    assert dag.run() == ["metrics"]
+    assert dag.run() == []
+    dag.config = cfg.replace(FEE_RATE=0.001)
+    assert dag.run() == ["backtest", "metrics"]
+
+
+def test_literal_defaults_do_not_follow_config(monkeypatch, price_csv):
+    df = load_price_data(price_csv(n_bars=4_000))
+    alpha = calculate_scaled_forecast(df)
+    monkeypatch.setattr(Config, "POSITION_BUFFER", 0.3)
+    monkeypatch.setattr(Config, "FEE_RATE", 0.001)
+    explicit = run_vectorized_backtest(calculate_position_target(alpha, buffer=0.1), fee_rate=0.0005)
+    default = run_vectorized_backtest(calculate_position_target(alpha))
+    assert np.array_equal(default["equity"].to_numpy(), explicit["equity"].to_numpy())
@@ -0,0 +1,53 @@
+import os
+import time
+import subprocess
+import sys
+from config import Config
+from jarvis_engine.alpha import load_price_data
+from jarvis_engine.data_cache import _source_dir, write_cached_frame, STALE_TMP_SECONDS
+from jarvis_engine.result_cache import evict
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _make_tmp_dirs(directory):
+    """进行中 (父进程存活)、进程已崩溃、超时未完成 三种临时目录"""
+    names = {"live": f"a.tmp{os.getppid()}", "dead": f"b.tmp{_dead_pid()}", "old": f"c.tmp{os.getpid()}"}
+    for name in names.values():
+        os.makedirs(os.path.join(directory, name))
+        open(os.path.join(directory, name, "c0.npy"), "w").close()
+    past = time.time() - STALE_TMP_SECONDS - 60
+    os.utime(os.path.join(directory, names["old"]), (past, past))
+    return names
+
+
+def test_write_keeps_in_flight_siblings(price_csv):
+    csv = price_csv(n_bars=500)
+    df = load_price_data(csv, use_cache=False)
+    source_dir = _source_dir(csv, Config.CACHE_DIR)
+
+    # 旧版本 (已写完)、还没写 meta.json 的目录、各种临时目录
+    for name in ("oldfingerprint", "partial"):
+        os.makedirs(os.path.join(source_dir, name))
+    open(os.path.join(source_dir, "oldfingerprint", "meta.json"), "w").close()
+    tmp = _make_tmp_dirs(source_dir)
+
+    assert write_cached_frame(csv, df, Config.CACHE_DIR)
+    left = set(os.listdir(source_dir))
+    assert "oldfingerprint" not in left
+    assert {tmp["live"], "partial"} <= left
+    assert tmp["dead"] not in left and tmp["old"] not in left
+    assert load_price_data(csv).equals(df)
+
+
+def test_evict_reclaims_crashed_tmp_dirs(tmp_path, monkeypatch):
+    root = tmp_path / "results"
+    monkeypatch.setattr(Config, "RESULT_CACHE_DIR", str(root))
+    os.makedirs(root)
+    tmp = _make_tmp_dirs(str(root))
+    evict(1 << 30)
+    assert set(os.listdir(root)) == {tmp["live"]}
@@ -0,0 +1,109 @@
+import os
+import socket
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+import download_async
+from benchmarks.bench_download import start_server
+from download_async import (download_many, update_many, read_last_bar, fetch_page, TokenBucket, FILENAME_FMT,
+                            KLINES_PATH)
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    """本地仿真 K 线服务器 (benchmarks/kline_server.py)，无延迟"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    start_server(port, latency=0.0, listing_ms={})
+    return f"http://127.0.0.1:{port}"
+
+
+def _download(base_url, out_dir, end_date, start_date="2020-01-01"):
+    options = dict(end_date=end_date, out_dir=str(out_dir), base_url=base_url, rate=1000.0)
+    done = download_many(["BTCUSDT"], start_date, **options)
+    return done["BTCUSDT"]
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_update_matches_full_download(tmp_path, base_url):
+    full = _download(base_url, tmp_path / "full", "2020-03-01")
+    part = _download(base_url, tmp_path / "inc", "2020-02-01")
+    assert _read(part) != _read(full)
+
+    done = update_many(["BTCUSDT"], end_date="2020-03-01", out_dir=str(tmp_path / "inc"), base_url=base_url,
+                       rate=1000.0)
+    assert _read(done["BTCUSDT"]) == _read(full)
+    # 已是最新时再更新一次，内容不变
+    update_many(["BTCUSDT"], end_date="2020-03-01", out_dir=str(tmp_path / "inc"), base_url=base_url, rate=1000.0)
+    assert _read(done["BTCUSDT"]) == _read(full)
+
+
+def test_update_converts_cryptodatadownload_file(tmp_path, base_url):
+    full = _download(base_url, tmp_path / "full", "2020-03-01")
+    part = _download(base_url, tmp_path / "cdd", "2020-02-01")
+
+    # 改写成 CryptoDataDownload 导出格式: 首行网址 + 多余的列 + 按时间倒序
+    with open(part, "r", encoding="utf-8") as f:
+        rows = [line.rstrip("\n").split(",") for line in f.readlines()[1:]]
+    with open(part, "w", encoding="utf-8") as f:
+        f.write("https://www.CryptoDataDownload.com\n")
+        f.write("Unix,Date,Symbol,Open,High,Low,Close,Volume BTC,Volume USDT,tradecount\n")
+        for unix, o, h, l, c, v in reversed(rows):
+            f.write(f"{unix},2020-01-01 00:00:00,BTCUSDT,{o},{h},{l},{c},{v},{float(v) * float(c):.2f},100\n")
+    assert read_last_bar(part) is None
+    original = _read(part)
+
+    # 默认不改动用户的文件，只跳过
+    done = update_many(["BTCUSDT"], end_date="2020-03-01", out_dir=str(tmp_path / "cdd"), base_url=base_url,
+                       rate=1000.0)
+    assert done == {} and _read(part) == original and not os.path.exists(part + ".orig")
+
+    done = update_many(["BTCUSDT"], end_date="2020-03-01", out_dir=str(tmp_path / "cdd"), base_url=base_url,
+                       rate=1000.0, convert=True)
+    assert done["BTCUSDT"] == os.path.join(str(tmp_path / "cdd"), FILENAME_FMT.format(symbol="BTCUSDT", interval="1h"))
+    assert _read(done["BTCUSDT"]) == _read(full)
+    assert _read(part + ".orig") == original
+
+
+async def _fetch_with_status(status: int):
+    """起一个固定返回 status 的服务器，调用 fetch_page，返回 (异常, 请求次数)"""
+    hits = []
+
+    async def klines(request):
+        hits.append(request.query["symbol"])
+        return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=status)
+
+    app = web.Application()
+    app.router.add_get(KLINES_PATH, klines)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            with pytest.raises(aiohttp.ClientResponseError) as err:
+                await fetch_page(session, TokenBucket(1000.0), f"http://127.0.0.1:{port}", "NOPEUSDT", "1h",
+                                 0, 3_600_000, retries=3)
+    finally:
+        await runner.cleanup()
+    return err.value, len(hits)
+
+
+def test_client_errors_are_not_retried():
+    err, hits = asyncio.run(_fetch_with_status(400))
+    assert err.status == 400 and hits == 1
+
+
+def test_server_errors_are_retried(monkeypatch):
+    async def no_sleep(_):
+        pass
+    monkeypatch.setattr(download_async.asyncio, "sleep", no_sleep)
+    err, hits = asyncio.run(_fetch_with_status(503))
+    assert err.status == 503 and hits == 3
@@ -0,0 +1,79 @@
+import time
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.synthetic import make_ohlcv
+from config import Config
+from jarvis_engine.instrument import Profiler, PROFILER, stage
+from jarvis_engine.lean import run_lean_pipeline
+
+
+# ==========================================
+# ⏱️ 埋点: 线程池并行时阶段栈互不串层
+# ==========================================
+def test_stages_do_not_nest_across_threads(monkeypatch):
+    monkeypatch.setattr(Config, "INSTRUMENT", True)
+    monkeypatch.setattr(Config, "INSTRUMENT_MEMORY", "tracemalloc")
+    df = make_ohlcv(20_000)
+    cfg = Config.freeze()
+    PROFILER.reset()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: run_lean_pipeline(df, config=cfg), range(16)))
+
+    stages = PROFILER.report()["stages"]
+    assert len(stages) == 16 * 3
+    assert {(r["path"], r["depth"]) for r in stages} == {("alpha", 0), ("risk", 0), ("backtest", 0)}
+    # 工作线程只计时，不去重置进程级的 tracemalloc 峰值
+    assert all(r["peak_mem_mb"] is None for r in stages)
+
+
+def test_nested_stages_on_main_thread_track_memory():
+    profiler = Profiler(enabled=True, memory="tracemalloc")
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            buf = bytearray(8_000_000)
+        del buf
+    records = {r["path"]: r for r in profiler.report()["stages"]}
+    assert set(records) == {"outer", "outer/inner"}
+    assert records["outer/inner"]["peak_mem_mb"] >= 7.5
+    assert records["outer"]["peak_mem_mb"] >= records["outer/inner"]["peak_mem_mb"]
+
+
+def test_default_memory_is_cheap_rss():
+    assert getattr(Config, "INSTRUMENT_MEMORY", None) == "rss"
+    profiler = Profiler(enabled=True)
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            buf = bytearray(64_000_000)
+            buf[::4096] = b"x" * len(buf[::4096])  # 逐页写入，计入常驻内存
+        del buf
+    records = {r["path"]: r for r in profiler.report()["stages"]}
+    # 默认不开 tracemalloc，峰值取进程最大常驻内存的增长
+    assert not tracemalloc.is_tracing()
+    assert records["outer/inner"]["peak_mem_mb"] >= 0
+    assert records["outer"]["peak_mem_mb"] >= records["outer/inner"]["peak_mem_mb"]
+
+    profiler = Profiler(enabled=True, memory=False)
+    with profiler.stage("timed"):
+        pass
+    assert profiler.report()["stages"][0]["peak_mem_mb"] is None
+
+
+def test_cpu_time_is_per_thread():
+    profiler = Profiler(enabled=True, memory=False)
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    worker = threading.Thread(target=spin)
+    worker.start()
+    try:
+        with profiler.stage("idle"):
+            time.sleep(0.3)
+    finally:
+        stop.set()
+        worker.join()
+    # 另一个线程在空转，本线程只是 sleep: CPU 时间不应把别的线程算进来
+    assert profiler.report()["stages"][0]["cpu_s"] < 0.05
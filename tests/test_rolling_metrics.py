@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from jarvis_engine.rolling_metrics import RollingPerformance, rolling_metrics, rolling_return_stats, ROLLING_FIELDS
+
+
+def _returns_with_flat_stretches(n=3_000, seed=3):
+    rng = np.random.default_rng(seed)
+    r = rng.normal(0.0002, 0.01, n)
+    r[500:600] = 0.0            # 空仓: 收益全为 0
+    r[1200:1300] = -0.001       # 恒定负收益 (资金费)
+    r[2000:2020] = np.nan       # 缺失
+    r[2020:2250] = 0.0
+    return r
+
+
+def test_flat_window_reports_no_sharpe():
+    r = np.concatenate([np.random.default_rng(0).normal(0, 0.01, 500), np.zeros(100)])
+    equity = np.cumprod(1 + r)
+    stream = RollingPerformance(48).update_many(r, equity).iloc[-1]
+    batch = rolling_return_stats(r, 48)
+    assert np.isnan(stream["sharpe"]) and np.isnan(batch["sharpe"][-1])
+    assert stream["volatility"] == 0.0 and batch["volatility"][-1] == 0.0
+
+
+@pytest.mark.parametrize("days", [2, 7])
+def test_update_many_matches_rolling_metrics(days):
+    r = _returns_with_flat_stretches()
+    index = pd.date_range("2020-01-01", periods=len(r), freq="h")
+    equity = 1000 * np.cumprod(1 + np.nan_to_num(r))
+    df_res = pd.DataFrame({"net_ret": r, "equity": equity}, index=index)
+
+    batch = rolling_metrics(df_res, windows_days=(days,))
+    stream = RollingPerformance(days * 24).update_many(r, equity)
+    for name in ROLLING_FIELDS:
+        a, b = stream[name].to_numpy(), batch[f"{name}_{days}d"].to_numpy()
+        assert np.array_equal(np.isnan(a), np.isnan(b)), name
+        np.testing.assert_allclose(a, b, rtol=1e-7, atol=1e-12, equal_nan=True, err_msg=name)
+    # 平坦窗口 (0 收益 / 恒定负收益) 确实出现，且两边都给出 NaN Sharpe、0 波动率
+    flat = batch[f"volatility_{days}d"].to_numpy() == 0
+    assert flat.sum() > 0
+    assert np.isnan(stream["sharpe"].to_numpy()[flat]).all()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from jarvis_engine.alpha import load_price_data, calculate_scaled_forecast, calculate_position_target
+from jarvis_engine.streaming import StreamingForecast, StreamingRiskEngine
+
+
+# ==========================================
+# 📡 流式引擎 vs 批量计算: 整段 CSV 逐根回放对拍
+# ==========================================
+def _replay_forecast(df):
+    engine = StreamingForecast()
+    cols = {"forecast": [], "trend_forecast": [], "rsi_forecast": []}
+    for bar in df[["open", "high", "low", "close"]].to_dict("records"):
+        cols["forecast"].append(engine.update(bar))
+        cols["trend_forecast"].append(engine.trend_forecast)
+        cols["rsi_forecast"].append(engine.rsi_forecast)
+    return {k: np.array(v) for k, v in cols.items()}
+
+
+def test_streaming_forecast_matches_batch(price_csv):
+    df = load_price_data(price_csv(), use_cache=False)
+    batch = calculate_scaled_forecast(df)
+    stream = _replay_forecast(df)
+    # 逐位相同 (bit-identical)，不是只在容差以内
+    for col, values in stream.items():
+        np.testing.assert_array_equal(values, batch[col].to_numpy(), err_msg=col)
+
+
+# 逐根记录的风控字段: 批量列名 -> 引擎属性
+RISK_FIELDS = {
+    "regime_ma": "regime_ma_value", "dynamic_max_cap": "dynamic_max_cap", "ann_vol_pct": "ann_vol_pct",
+    "leverage_ratio": "leverage_ratio", "sl_threshold": "sl_threshold", "sigma_event": "is_crash",
+    "raw_target": "raw_target", "position": "position",
+}
+
+
+@pytest.mark.parametrize("buffer", [0.1, 0.5])
+def test_streaming_risk_engine_matches_batch(price_csv, buffer):
+    df = load_price_data(price_csv(), use_cache=False)
+    batch = calculate_position_target(calculate_scaled_forecast(df), buffer=buffer)
+
+    engine = StreamingRiskEngine(buffer=buffer)
+    stream = {col: [] for col in RISK_FIELDS}
+    stream["buffered_pos"] = []
+    bars = df[["high", "low", "close"]].to_dict("records")
+    for bar, forecast in zip(bars, batch["forecast"].to_numpy()):
+        stream["buffered_pos"].append(engine.update(bar, forecast))
+        for col, attr in RISK_FIELDS.items():
+            stream[col].append(getattr(engine, attr))
+
+    for col, values in stream.items():
+        np.testing.assert_array_equal(np.array(values), batch[col].to_numpy(), err_msg=col)
+
+    # 确认整段历史确实走到了各个分支
+    assert batch["sigma_event"].sum() > 0                                   # 灾难阻断
+    assert batch["dynamic_max_cap"].nunique() == 2                          # 牛 / 熊两档杠杆上限
+    assert (batch["leverage_ratio"] == batch["dynamic_max_cap"]).any()      # 触及上限被截断
+    assert (batch["buffered_pos"] != batch["raw_target"]).any()             # 缓冲器保持旧仓位